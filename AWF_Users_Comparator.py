@@ -1,19 +1,38 @@
 import xml.etree.ElementTree as ET
-import pandas as pd
-from collections import defaultdict
+import argparse
+import itertools
+from collections import Counter, defaultdict
 import sys
 from datetime import datetime
 
-
-def parse_xml(xml_file):
-    """Parse XML file and extract all user IDs."""
+from excel_io import ENGINES, RowSpool, read_sheet, write_workbook
+from feed_profile import FeedProfile
+from id_keys import OriginalIds, finish_results, normalize_id, original_pair
+from parse_pipeline import parse_inputs
+from partition_compare import canonical_ids, merge_ordered, merge_sorted, run_partitions, split_ids, split_mapping
+from sort_merge import external_sort
+from stream_compare import BATCH_SIZE, count_accounts, iter_account_ids
+
+# (sheet, header row, columns) read by parse_excel, prefetched in parallel by parse_inputs
+EXCEL_SHEETS = [
+    ('AWF_ACF2IDNOVELL', 5, 'C:D'),
+    ('AWFEMPLOYEE', 5, None),
+    ('AWF_USERS', 5, None),
+    ('AWF_USERACCESSPROFILE', 5, None)
+]
+
+
+def parse_xml(xml_file, profile=None):
+    """Parse XML file and extract all user IDs; profile (a FeedProfile) observes each account."""
     try:
         tree = ET.parse(xml_file)
         root = tree.getroot()
         xml_users = set()
 
         for account in root.findall('.//account'):
-            user_id = account.get('id')
+            if profile is not None:
+                profile.observe(account)
+            user_id = normalize_id(account.get('id'))
             if user_id:  # Only add non-empty user IDs
                 xml_users.add(user_id)
         return xml_users
@@ -24,17 +43,20 @@ def parse_xml(xml_file):
         sys.exit(f"Unexpected error reading XML: {e}")
 
 
-def parse_excel(excel_file):
+def parse_excel(excel_file, engine='auto', sheets=None):
     """Parse Excel file and extract all user IDs with ACF2ID/NOVELLID mapping."""
     try:
         # Read ACF2ID to NOVELLID mapping sheet
-        id_map_df = pd.read_excel(excel_file, sheet_name='AWF_ACF2IDNOVELL', header=5, usecols="C:D")
+        _, id_rows = read_sheet(excel_file, 'AWF_ACF2IDNOVELL', header=5, usecols="C:D",
+                                engine=engine, prefetched=sheets)
+        original_ids = {}  # normalized id -> id as the workbook wrote it, where they differ
         id_map = {}
-        if not id_map_df.empty:
-            # Clean data - remove any rows with empty values
-            id_map_df = id_map_df.dropna()
-            id_map = dict(zip(id_map_df['ACF2ID'].astype(str).str.strip(),
-                              id_map_df['NOVELLID'].astype(str).str.strip()))
+        # Clean data - remove any rows with empty values
+        for row in id_rows:
+            acf2id = normalize_id(row['ACF2ID'], original_ids)
+            novellid = normalize_id(row['NOVELLID'], original_ids)
+            if acf2id and novellid:
+                id_map[acf2id] = novellid
         reverse_id_map = {v: k for k, v in id_map.items()}
 
         # Sheets to process (including AWFEMPLOYEE which appears to be the main sheet now)
@@ -47,15 +69,15 @@ def parse_excel(excel_file):
         for sheet in sheets_to_check:
             try:
                 # Try reading with header=5 first
-                df = pd.read_excel(excel_file, sheet_name=sheet, header=5)
+                columns, rows = read_sheet(excel_file, sheet, header=5, engine=engine, prefetched=sheets)
 
                 # If no data, try with header=0 as fallback
-                if df.empty:
-                    df = pd.read_excel(excel_file, sheet_name=sheet, header=0)
+                if not rows:
+                    columns, rows = read_sheet(excel_file, sheet, header=0, engine=engine, prefetched=sheets)
 
                 # Find User_ID column (case insensitive)
                 user_col = None
-                for col in df.columns:
+                for col in columns:
                     if 'user_id' in str(col).lower():
                         user_col = col
                         break
@@ -65,8 +87,8 @@ def parse_excel(excel_file):
                     continue
 
                 # Clean and add all User_IDs from this sheet
-                valid_users = df[user_col].dropna().astype(str).str.strip()
-                excel_users.update(valid_users[valid_users != ''])
+                valid_users = (normalize_id(row[user_col], original_ids) for row in rows)
+                excel_users.update(user_id for user_id in valid_users if user_id)
 
             except Exception as e:
                 print(f"Warning: Error processing {sheet} sheet - {str(e)}")
@@ -75,7 +97,8 @@ def parse_excel(excel_file):
         return {
             'excel_users': excel_users,
             'id_map': id_map,
-            'reverse_id_map': reverse_id_map
+            'reverse_id_map': reverse_id_map,
+            'original_ids': original_ids
         }
 
     except ImportError:
@@ -134,77 +157,242 @@ def compare_users(xml_users, excel_data):
     }
 
 
-def export_results(results, output_file):
-    """Export comparison results to Excel file."""
+def compare_partitioned(xml_users, excel_data, partitions, workers=None):
+    """
+    Compare like compare_users, split into hash partitions compared in a process pool
+
+    Both sides are partitioned by canonical user ID (ACF2ID/NOVELLID pairs share one), so each
+    partition holds every ID its users can be matched with, and the merged results are the same.
+    """
+    excel_users = excel_data['excel_users']
+    id_map = excel_data['id_map']
+    canonical = canonical_ids(id_map)
+
+    xml_parts = split_ids(xml_users, canonical, partitions)
+    excel_parts = split_ids(excel_users, canonical, partitions)
+    id_map_parts = split_mapping(id_map, canonical, partitions)
+    reverse_id_map_parts = split_mapping(excel_data['reverse_id_map'], canonical, partitions)
+    parts = [(xml_parts[i], {'excel_users': excel_parts[i], 'id_map': id_map_parts[i],
+                             'reverse_id_map': reverse_id_map_parts[i]}) for i in range(partitions)]
+    results = run_partitions(compare_users, parts, workers)
+
+    # Mapped pairs follow the ACF2ID/NOVELLID sheet order
+    acf2_order = {acf2id: i for i, acf2id in enumerate(id_map)}
+    mapped_users = merge_ordered((r['mapped_users'] for r in results),
+                                 key=lambda pair: acf2_order[pair[:pair.index(' (Excel) ↔ ')]])
+
+    return {
+        'only_in_xml': merge_sorted(r['only_in_xml'] for r in results),
+        'only_in_excel': merge_sorted(r['only_in_excel'] for r in results),
+        'mapped_users': mapped_users,
+        'total_xml_users': len(xml_users),
+        'total_excel_users': len(excel_users),
+        'total_mapped_pairs': len(mapped_users)
+    }
+
+
+def compare_prefiltered(xml_file, excel_data, fp_rate=0.01, batch_size=BATCH_SIZE, profile=None):
+    """
+    Compare like compare_users without holding the set of XML user IDs
+
+    Pass 1 streams the feed into a Bloom filter sized for fp_rate. It also checks each ID
+    exactly against the in-memory Excel side and sorts the XML-only ones externally. The Excel
+    users are then probed against the filter: a miss is certain, a hit is only a candidate.
+    Pass 2 over the feed confirms the candidates and possible duplicate accounts exactly, so the
+    results are exact. Memory holds the filter, the Excel side and the candidates. profile, a
+    FeedProfile, observes every account during pass 1; if it is bounded (a Bloom filter of seen
+    IDs), pass 2 also confirms its duplicate-id candidates.
+    """
+    from bloom_filter import BloomFilter
+
+    excel_users = excel_data['excel_users']
+    id_map = excel_data['id_map']
+    reverse_id_map = excel_data['reverse_id_map']
+    mapped_acf2ids = set(reverse_id_map.values())
+
+    bloom = BloomFilter(count_accounts(xml_file), fp_rate)
+    maybe_repeated = set()
+    accounts = 0
+
+    def xml_only_ids():
+        nonlocal accounts
+        user_ids = iter_account_ids(xml_file, profile)
+        while True:
+            batch = list(itertools.islice(user_ids, batch_size))
+            if not batch:
+                return
+            accounts += len(batch)
+            for user_id, seen in zip(batch, bloom.add(batch)):
+                if seen:
+                    maybe_repeated.add(user_id)
+                if user_id not in excel_users and user_id not in reverse_id_map:
+                    yield user_id
+
     try:
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            # Summary Sheet
-            summary_data = {
-                'Metric': [
-                    'Comparison Date',
-                    'Total XML Users',
-                    'Total Excel Users',
-                    'Mapped User Pairs (ACF2ID ↔ NOVELLID)',
-                    'Users only in XML',
-                    'Users only in Excel'
-                ],
-                'Value': [
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    results['total_xml_users'],
-                    results['total_excel_users'],
-                    results['total_mapped_pairs'],
-                    len(results['only_in_xml']),
-                    len(results['only_in_excel'])
-                ]
-            }
-            pd.DataFrame(summary_data).to_excel(writer, sheet_name='Summary', index=False)
-
-            # Users only in XML
-            if results['only_in_xml']:
-                pd.DataFrame({'User_ID': results['only_in_xml']}).to_excel(
-                    writer, sheet_name='XML Only Users', index=False)
-            else:
-                pd.DataFrame({'Message': ['No users only in XML']}).to_excel(
-                    writer, sheet_name='XML Only Users', index=False)
+        only_in_xml = RowSpool()
+        previous = None
+        for user_id in external_sort(xml_only_ids()):
+            if user_id != previous:
+                only_in_xml.append(user_id)
+                previous = user_id
+
+        # Excel users only in Excel unless the feed has them, and NOVELLIDs of mapped Excel users
+        unmapped = [user_id for user_id in excel_users if user_id not in id_map and user_id not in mapped_acf2ids]
+        mapped_pairs = [(acf2id, novellid) for acf2id, novellid in id_map.items() if acf2id in excel_users]
+        probes = unmapped + [novellid for _, novellid in mapped_pairs]
+        hits = {user_id for user_id, hit in zip(probes, bloom.contains(probes)) if hit}
+
+        occurrences = Counter()
+        profile_candidates = profile.duplicate_candidates() if profile is not None and profile.bounded else set()
+        candidates = hits | maybe_repeated | profile_candidates
+        if candidates:
+            for user_id in iter_account_ids(xml_file):
+                if user_id in candidates:
+                    occurrences[user_id] += 1
+    except ET.ParseError as e:
+        sys.exit(f"Error parsing XML file: {e}")
+    if profile_candidates:
+        profile.confirm_duplicates(occurrences)
 
-            # Users only in Excel
-            if results['only_in_excel']:
-                pd.DataFrame({'User_ID': results['only_in_excel']}).to_excel(
-                    writer, sheet_name='Excel Only Users', index=False)
-            else:
-                pd.DataFrame({'Message': ['No users only in Excel']}).to_excel(
-                    writer, sheet_name='Excel Only Users', index=False)
+    mapped_users = [f"{acf2id} (Excel) ↔ {novellid} (XML)" for acf2id, novellid in mapped_pairs
+                    if occurrences[novellid]]
 
-            # Mapped users
-            if results['mapped_users']:
-                pd.DataFrame({'Mapped_User_Pairs': results['mapped_users']}).to_excel(
-                    writer, sheet_name='Mapped Users', index=False)
-            else:
-                pd.DataFrame({'Message': ['No mapped user pairs found']}).to_excel(
-                    writer, sheet_name='Mapped Users', index=False)
+    return {
+        'only_in_xml': only_in_xml,
+        'only_in_excel': sorted(user_id for user_id in unmapped if not occurrences[user_id]),
+        'mapped_users': mapped_users,
+        'total_xml_users': accounts - sum(count - 1 for count in occurrences.values()),
+        'total_excel_users': len(excel_users),
+        'total_mapped_pairs': len(mapped_users),
+        'prefilter': {
+            'filter_bytes': bloom.size_bytes,
+            'num_hashes': bloom.num_hashes,
+            'probes': len(probes),
+            'hits': len(hits),
+            'false_positives': sum(1 for user_id in hits if not occurrences[user_id])
+        }
+    }
+
+
+def export_results(results, output_file, engine='auto'):
+    """Export comparison results to Excel file, with user IDs as the XML and the workbook wrote them."""
+    try:
+        sheets = {}
+        xml_ids = results['xml_original_ids']
+        excel_ids = results['excel_original_ids']
+
+        # Summary Sheet
+        sheets['Summary'] = {
+            'Metric': [
+                'Comparison Date',
+                'Total XML Users',
+                'Total Excel Users',
+                'Mapped User Pairs (ACF2ID ↔ NOVELLID)',
+                'Users only in XML',
+                'Users only in Excel'
+            ],
+            'Value': [
+                datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                results['total_xml_users'],
+                results['total_excel_users'],
+                results['total_mapped_pairs'],
+                len(results['only_in_xml']),
+                len(results['only_in_excel'])
+            ]
+        }
+
+        # Users only in XML
+        if results['only_in_xml']:
+            sheets['XML Only Users'] = {'User_ID': OriginalIds(results['only_in_xml'], xml_ids)}
+        else:
+            sheets['XML Only Users'] = {'Message': ['No users only in XML']}
+
+        # Users only in Excel
+        if results['only_in_excel']:
+            sheets['Excel Only Users'] = {'User_ID': OriginalIds(results['only_in_excel'], excel_ids)}
+        else:
+            sheets['Excel Only Users'] = {'Message': ['No users only in Excel']}
+
+        # Likely-same IDs among the users only one side has
+        near_matches = OriginalIds(results['near_matches'],
+                                   columns={'XML_User_ID': xml_ids, 'Excel_User_ID': excel_ids})
+        sheets['Near Matches'] = near_matches or {'Message': ['No near-duplicate user IDs found']}
+
+        # Data-quality profile of the feed
+        sheets['Feed Profile'] = results['feed_profile']
+
+        # Mapped users
+        if results['mapped_users']:
+            sheets['Mapped Users'] = {'Mapped_User_Pairs': [original_pair(pair, excel_ids, xml_ids)
+                                                            for pair in results['mapped_users']]}
+        else:
+            sheets['Mapped Users'] = {'Message': ['No mapped user pairs found']}
+
+        write_workbook(output_file, sheets, engine)
 
     except Exception as e:
         sys.exit(f"Error exporting to Excel: {e}")
 
 
 def main():
-    print("AWF User ID Comparison Tool\n" + "=" * 30)
-
-    # Configuration
+    # Configuration (defaults, overridable on the command line)
     XML_FILE = 'AWF_01_accounts.xml'
     EXCEL_FILE = 'AWF_List.xlsx'
     OUTPUT_FILE = 'AWF_User_Comparison_Results.xlsx'
 
+    parser = argparse.ArgumentParser(description='Compare AWF user IDs between the XML feed and the Excel workbook')
+    parser.add_argument('--xml', default=XML_FILE, help=f"XML feed (default: {XML_FILE})")
+    parser.add_argument('--excel', default=EXCEL_FILE, help=f"Excel workbook (default: {EXCEL_FILE})")
+    parser.add_argument('--output', default=OUTPUT_FILE, help=f"Results workbook (default: {OUTPUT_FILE})")
+    parser.add_argument('--engine', choices=ENGINES, default='auto',
+                        help="Excel reader/writer; 'auto' uses the standard library for small files (default: auto)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processes parsing the XML and the Excel sheets concurrently; 1 parses sequentially "
+                             "(default: 1 for small inputs, else one per sheet plus the XML, up to the CPU count)")
+    parser.add_argument('--partitions', type=int, default=1,
+                        help='Hash-partition both sides by canonical user ID and compare the partitions in a '
+                             'process pool (default: 1, a single comparison)')
+    parser.add_argument('--prefilter', action='store_true',
+                        help='Keep only a Bloom filter of the XML user IDs and confirm its hits with a second '
+                             'pass over the feed (for feeds too large to hold as a set)')
+    parser.add_argument('--fp-rate', type=float, default=0.01,
+                        help='False-positive rate of the --prefilter Bloom filter (default: 0.01)')
+    parser.add_argument('--quick-look', action='store_true',
+                        help='Only estimate user counts and overlaps per source and role category from '
+                             'HyperLogLog sketches in one pass (no results workbook)')
+    args = parser.parse_args()
+
+    print("AWF User ID Comparison Tool\n" + "=" * 30)
+
     try:
-        # Process files
-        print("\n[1/3] Parsing XML file...")
-        xml_users = parse_xml(XML_FILE)
+        if args.quick_look:
+            from quick_look import print_quick_look, quick_look
+            print_quick_look(quick_look(args.xml, args.excel, EXCEL_SHEETS, roles_only=False, engine=args.engine))
+            return
 
-        print("[2/3] Parsing Excel file...")
-        excel_data = parse_excel(EXCEL_FILE)
+        # Process files
+        # --prefilter does not hold the feed's IDs, so neither may the profile
+        profile = FeedProfile(expected_accounts=count_accounts(args.xml) if args.prefilter else None)
+        if args.prefilter:
+            print("\n[1/3] Parsing Excel file...")
+            excel_data = parse_excel(args.excel, args.engine)
+
+            print("[2/3] Filtering XML file...")
+            print("[3/3] Comparing user IDs...")
+            results = compare_prefiltered(args.xml, excel_data, args.fp_rate, profile=profile)
+        else:
+            print("\n[1/3] Parsing XML file...")
+            print("[2/3] Parsing Excel file...")
+            xml_users, excel_data = parse_inputs(parse_xml, args.xml, parse_excel, args.excel, EXCEL_SHEETS,
+                                                 args.engine, args.workers, profile)
+
+            print("[3/3] Comparing user IDs...")
+            if args.partitions > 1:
+                results = compare_partitioned(xml_users, excel_data, args.partitions)
+            else:
+                results = compare_users(xml_users, excel_data)
 
-        print("[3/3] Comparing user IDs...")
-        results = compare_users(xml_users, excel_data)
+        finish_results(results, profile, excel_data['original_ids'])
 
         # Display quick summary
         print("\nComparison Results:")
@@ -213,10 +401,16 @@ def main():
         print(f"- Mapped user pairs (ACF2ID ↔ NOVELLID): {results['total_mapped_pairs']}")
         print(f"- Users only in XML: {len(results['only_in_xml'])}")
         print(f"- Users only in Excel: {len(results['only_in_excel'])}")
+        print(f"- Near-duplicate user ID pairs: {len(results['near_matches'])}")
+        print(f"- Feed profile: {profile.summary()}")
+        if 'prefilter' in results:
+            stats = results['prefilter']
+            print(f"- Bloom filter: {stats['filter_bytes'] / 1024:.0f} KB, {stats['num_hashes']} hashes, "
+                  f"{stats['hits']} of {stats['probes']} Excel probes hit, {stats['false_positives']} false positives")
 
         # Export results
-        print(f"\nExporting results to {OUTPUT_FILE}...")
-        export_results(results, OUTPUT_FILE)
+        print(f"\nExporting results to {args.output}...")
+        export_results(results, args.output, args.engine)
         print("Done! Results exported successfully.")
     except Exception as e:
         print(f"\nError: {str(e)}")
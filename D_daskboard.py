@@ -1,24 +1,181 @@
 import requests
 import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict, Any
 
+# Throttling and transient server errors are retried, honouring Retry-After when present
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# Retried for non-idempotent requests: the server rejected the request without processing it
+THROTTLED_STATUS_CODES = frozenset({429})
+
+# Conservative per-request limits for POST /api/v2/settings/objects; the API rejects larger payloads
+MAX_BATCH_ITEMS = 1000
+MAX_BATCH_BYTES = 5 * 1024 * 1024
+
+
+def _settings_query_params(
+        schema_ids: Optional[List[str]],
+        scopes: Optional[List[str]],
+        external_ids: Optional[List[str]],
+        fields: Optional[List[str]],
+        next_page_key: Optional[str]
+) -> Dict[str, str]:
+    """Build the query string for GET /api/v2/settings/objects"""
+    params = {}
+
+    if next_page_key:
+        params['nextPageKey'] = next_page_key
+    else:
+        # First page requires either schemaIds or scopes
+        if schema_ids:
+            params['schemaIds'] = ','.join(schema_ids)
+        if scopes:
+            params['scopes'] = ','.join(scopes)
+        if external_ids:
+            params['externalIds'] = ','.join(external_ids)
+
+    if fields:
+        params['fields'] = ','.join(fields)
+
+    return params
+
+
+def _retry_after_seconds(retry_after: Optional[str], attempt: int) -> float:
+    """Delay before retrying a throttled request: Retry-After if present, else exponential backoff"""
+    try:
+        return max(0.0, float(retry_after))
+    except (TypeError, ValueError):
+        return min(30.0, 0.5 * (2 ** (attempt - 1)))
+
+
+def _batch_settings_payloads(
+        objects: List[Dict[str, Any]],
+        max_items: int,
+        max_bytes: int
+) -> List[Dict[str, Any]]:
+    """
+    Split settings objects into POST bodies that respect the item and byte limits
+
+    Each object is serialized once; batches are built by joining the serialized items.
+
+    Returns:
+        List of {'indices': [...], 'body': bytes} in input order
+    """
+    batches = []
+    indices, chunks, size = [], [], 2  # 2 bytes for the enclosing brackets
+
+    for index, obj in enumerate(objects):
+        encoded = json.dumps(obj, separators=(',', ':')).encode('utf-8')
+        item_size = len(encoded) + (1 if chunks else 0)
+
+        if chunks and (len(chunks) >= max_items or size + item_size > max_bytes):
+            batches.append({'indices': indices, 'body': b'[' + b','.join(chunks) + b']'})
+            indices, chunks, size = [], [], 2
+            item_size = len(encoded)
+
+        indices.append(index)
+        chunks.append(encoded)
+        size += item_size
+
+    if chunks:
+        batches.append({'indices': indices, 'body': b'[' + b','.join(chunks) + b']'})
+
+    return batches
+
+
+def _bulk_item_result(index: int, obj: Dict[str, Any], code: int, object_id=None, error=None) -> Dict[str, Any]:
+    return {
+        'index': index,
+        'schemaId': obj.get('schemaId'),
+        'externalId': obj.get('externalId'),
+        'objectId': object_id,
+        'code': code,
+        'error': error
+    }
+
 
 class DynatraceSettingsAPI:
-    def __init__(self, base_url: str, api_token: str):
+    def __init__(
+            self,
+            base_url: str,
+            api_token: str,
+            use_session: bool = False,
+            pool_size: int = 10,
+            max_retries: int = 3,
+            verbose: bool = True
+    ):
         """
         Initialize the Dynatrace Settings API client
 
         Args:
-            base_url: Dynatrace environment URL (e.g., 'abc12345.live.dynatrace.com')
+            base_url: Dynatrace environment URL (e.g., 'abc12345.live.dynatrace.com').
+                      A scheme may be given (e.g., 'http://127.0.0.1:8080' for the mock server)
             api_token: Dynatrace API token with required permissions
+            use_session: Reuse pooled keep-alive connections instead of one connection per request
+            pool_size: Maximum number of pooled connections when use_session is True
+            max_retries: How many times a throttled (HTTP 429) or failed (HTTP 5xx) request is retried
+            verbose: Print per-page progress messages
         """
         self.base_url = base_url.rstrip('/')
+        self.api_root = self.base_url if '://' in self.base_url else f"https://{self.base_url}"
         self.api_token = api_token
+        self.max_retries = max_retries
+        self.verbose = verbose
         self.headers = {
             'Authorization': f'Api-Token {api_token}',
             'Content-Type': 'application/json'
         }
 
+        # Pooled mode keeps TCP/TLS connections alive between pages
+        self.session = None
+        if use_session:
+            self.session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+            self.session.headers.update(self.headers)
+
+    def _request(
+            self,
+            method: str,
+            url: str,
+            retry_statuses: frozenset = RETRYABLE_STATUS_CODES,
+            **kwargs
+    ) -> requests.Response:
+        """
+        Send a request, retrying throttled (429) and transient server errors
+
+        Args:
+            method: HTTP method
+            url: Absolute request URL
+            retry_statuses: Status codes that are retried (default: RETRYABLE_STATUS_CODES)
+            **kwargs: Extra arguments passed to requests
+
+        Returns:
+            The successful response
+        """
+        sender = self.session.request if self.session is not None else requests.request
+        attempt = 0
+
+        while True:
+            response = sender(method, url, headers=self.headers, timeout=30, **kwargs)
+            if response.status_code not in retry_statuses or attempt >= self.max_retries:
+                response.raise_for_status()
+                return response
+
+            attempt += 1
+            delay = _retry_after_seconds(response.headers.get('Retry-After'), attempt)
+            if self.verbose:
+                print(f"HTTP {response.status_code}, retrying in {delay:.2f}s (attempt {attempt}/{self.max_retries})")
+            time.sleep(delay)
+
+    def close(self):
+        """Close pooled connections, if any"""
+        if self.session is not None:
+            self.session.close()
+
     def get_settings_objects(
             self,
             schema_ids: Optional[List[str]] = None,
@@ -41,36 +198,13 @@ class DynatraceSettingsAPI:
             Dictionary containing the API response
         """
         # Construct the URL
-        url = f"https://{self.base_url}/api/v2/settings/objects"
-
-        # Prepare query parameters
-        params = {}
-
-        if next_page_key:
-            params['nextPageKey'] = next_page_key
-        else:
-            # First page requires either schemaIds or scopes
-            if schema_ids:
-                params['schemaIds'] = ','.join(schema_ids)
-            if scopes:
-                params['scopes'] = ','.join(scopes)
-            if external_ids:
-                params['externalIds'] = ','.join(external_ids)
+        url = f"{self.api_root}/api/v2/settings/objects"
 
-        if fields:
-            params['fields'] = ','.join(fields)
+        params = _settings_query_params(schema_ids, scopes, external_ids, fields, next_page_key)
 
         try:
             # Make the API request
-            response = requests.get(
-                url=url,
-                headers=self.headers,
-                params=params,
-                timeout=30
-            )
-
-            # Check for successful response
-            response.raise_for_status()
+            response = self._request('GET', url, params=params)
 
             return response.json()
 
@@ -106,7 +240,8 @@ class DynatraceSettingsAPI:
 
         while True:
             page_count += 1
-            print(f"Fetching page {page_count}...")
+            if self.verbose:
+                print(f"Fetching page {page_count}...")
 
             response = self.get_settings_objects(
                 schema_ids=schema_ids,
@@ -125,9 +260,271 @@ class DynatraceSettingsAPI:
             if not next_page_key:
                 break
 
-        print(f"Retrieved {len(all_objects)} objects across {page_count} pages")
+        if self.verbose:
+            print(f"Retrieved {len(all_objects)} objects across {page_count} pages")
         return all_objects
 
+    def _post_settings_batch(
+            self,
+            objects: List[Dict[str, Any]],
+            batch: Dict[str, Any],
+            validate_only: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        POST one batch and map the multi-status response back to the input items
+
+        A 5xx may come after the server already created the objects, so the batch is only
+        retried on server errors when repeating it cannot create duplicates: validation only,
+        or every item upserts by externalId. Otherwise only throttling (429) is retried.
+        """
+        url = f"{self.api_root}/api/v2/settings/objects"
+        params = {'validateOnly': 'true'} if validate_only else {}
+        idempotent = validate_only or all(objects[i].get('externalId') for i in batch['indices'])
+        retry_statuses = RETRYABLE_STATUS_CODES if idempotent else THROTTLED_STATUS_CODES
+
+        try:
+            response = self._request('POST', url, retry_statuses, params=params, data=batch['body'])
+            statuses = response.json()
+        except requests.exceptions.RequestException as e:
+            # 400 with a per-item list means every item was rejected; anything else fails the whole batch
+            statuses = None
+            if getattr(e, 'response', None) is not None:
+                try:
+                    statuses = e.response.json()
+                except ValueError:
+                    statuses = None
+            if not isinstance(statuses, list) or len(statuses) != len(batch['indices']):
+                code = e.response.status_code if getattr(e, 'response', None) is not None else 0
+                return [_bulk_item_result(i, objects[i], code, error={'message': str(e)})
+                        for i in batch['indices']]
+
+        return [
+            _bulk_item_result(i, objects[i], status.get('code', 0), status.get('objectId'), status.get('error'))
+            for i, status in zip(batch['indices'], statuses)
+        ]
+
+    def create_settings_objects(
+            self,
+            objects: List[Dict[str, Any]],
+            validate_only: bool = False,
+            max_workers: int = 4,
+            max_batch_items: int = MAX_BATCH_ITEMS,
+            max_batch_bytes: int = MAX_BATCH_BYTES
+    ) -> List[Dict[str, Any]]:
+        """
+        Create (or upsert by externalId) many settings objects with batched POST requests
+
+        Args:
+            objects: Settings objects, each with schemaId, scope and value (optionally externalId, schemaVersion)
+            validate_only: Only validate the objects, nothing is persisted
+            max_workers: Number of batches sent concurrently
+            max_batch_items: Maximum objects per request
+            max_batch_bytes: Maximum request body size in bytes
+
+        Returns:
+            One result per input object, in input order: index, schemaId, externalId, objectId, code, error
+        """
+        batches = _batch_settings_payloads(objects, max_batch_items, max_batch_bytes)
+        if self.verbose:
+            mode = 'Validating' if validate_only else 'Writing'
+            print(f"{mode} {len(objects)} objects in {len(batches)} batches...")
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            batch_results = list(executor.map(
+                lambda batch: self._post_settings_batch(objects, batch, validate_only), batches))
+
+        results = [item for batch_result in batch_results for item in batch_result]
+
+        if self.verbose:
+            failed = sum(1 for r in results if r['error'])
+            print(f"Done: {len(results) - failed} succeeded, {failed} failed")
+        return results
+
+    def _put_settings_object(self, index: int, obj: Dict[str, Any], validate_only: bool) -> Dict[str, Any]:
+        """PUT a single settings object by objectId"""
+        url = f"{self.api_root}/api/v2/settings/objects/{obj['objectId']}"
+        params = {'validateOnly': 'true'} if validate_only else {}
+        body = {key: obj[key] for key in ('value', 'schemaVersion', 'updateToken') if key in obj}
+
+        try:
+            response = self._request('PUT', url, params=params, data=json.dumps(body))
+            return _bulk_item_result(index, obj, response.status_code, obj['objectId'])
+        except requests.exceptions.RequestException as e:
+            code = e.response.status_code if getattr(e, 'response', None) is not None else 0
+            error = {'message': str(e)}
+            if getattr(e, 'response', None) is not None:
+                try:
+                    error = e.response.json().get('error', error)
+                except ValueError:
+                    pass
+            return _bulk_item_result(index, obj, code, obj['objectId'], error)
+
+    def update_settings_objects(
+            self,
+            objects: List[Dict[str, Any]],
+            validate_only: bool = False,
+            max_workers: int = 4,
+            max_batch_items: int = MAX_BATCH_ITEMS,
+            max_batch_bytes: int = MAX_BATCH_BYTES
+    ) -> List[Dict[str, Any]]:
+        """
+        Update many settings objects
+
+        Objects carrying an externalId are upserted in batched POST requests. The API has no
+        batch endpoint for updates by objectId, so those are sent as concurrent PUT requests.
+
+        Args:
+            objects: Settings objects with value and either externalId (plus schemaId/scope) or objectId
+            validate_only: Only validate the objects, nothing is persisted
+            max_workers: Number of requests sent concurrently
+            max_batch_items: Maximum objects per POST request
+            max_batch_bytes: Maximum POST body size in bytes
+
+        Returns:
+            One result per input object, in input order (see create_settings_objects)
+        """
+        by_external_id = [i for i, obj in enumerate(objects) if obj.get('externalId')]
+        by_object_id = [i for i, obj in enumerate(objects) if not obj.get('externalId') and obj.get('objectId')]
+        results = [None] * len(objects)
+
+        for i, obj in enumerate(objects):
+            if not obj.get('externalId') and not obj.get('objectId'):
+                results[i] = _bulk_item_result(i, obj, 400, error={'message': 'Either externalId or objectId is required'})
+
+        if by_external_id:
+            upserts = [{k: v for k, v in objects[i].items() if k != 'objectId'} for i in by_external_id]
+            posted = self.create_settings_objects(
+                upserts, validate_only, max_workers, max_batch_items, max_batch_bytes)
+            for original_index, result in zip(by_external_id, posted):
+                results[original_index] = dict(result, index=original_index)
+
+        if by_object_id:
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                for result in executor.map(
+                        lambda i: self._put_settings_object(i, objects[i], validate_only), by_object_id):
+                    results[result['index']] = result
+
+        return results
+
+
+class AsyncDynatraceSettingsAPI:
+    def __init__(self, base_url: str, api_token: str, max_connections: int = 10, max_retries: int = 3):
+        """
+        Initialize the asyncio Dynatrace Settings API client (requires aiohttp)
+
+        Args:
+            base_url: Dynatrace environment URL, with or without scheme
+            api_token: Dynatrace API token with required permissions
+            max_connections: Maximum number of concurrent connections
+            max_retries: How many times a throttled (HTTP 429) or failed (HTTP 5xx) request is retried
+        """
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImportError("Missing required package 'aiohttp'. Please install with:\npip install aiohttp")
+
+        self._aiohttp = aiohttp
+        self.base_url = base_url.rstrip('/')
+        self.api_root = self.base_url if '://' in self.base_url else f"https://{self.base_url}"
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.headers = {
+            'Authorization': f'Api-Token {api_token}',
+            'Content-Type': 'application/json'
+        }
+        self.session = None
+
+    async def __aenter__(self):
+        connector = self._aiohttp.TCPConnector(limit=self.max_connections)
+        self.session = self._aiohttp.ClientSession(
+            headers=self.headers,
+            connector=connector,
+            timeout=self._aiohttp.ClientTimeout(total=30)
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        self.session = None
+
+    async def _request(self, method: str, url: str, **kwargs) -> Any:
+        """Send a request, retrying throttled (429) and transient server errors, and return the decoded JSON"""
+        attempt = 0
+
+        while True:
+            async with self.session.request(method, url, **kwargs) as response:
+                if response.status not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return await response.json()
+                retry_after = response.headers.get('Retry-After')
+
+            attempt += 1
+            await asyncio.sleep(_retry_after_seconds(retry_after, attempt))
+
+    async def get_settings_objects(
+            self,
+            schema_ids: Optional[List[str]] = None,
+            scopes: Optional[List[str]] = None,
+            external_ids: Optional[List[str]] = None,
+            fields: Optional[List[str]] = None,
+            next_page_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get a single page of settings objects (see DynatraceSettingsAPI.get_settings_objects)
+        """
+        params = _settings_query_params(schema_ids, scopes, external_ids, fields, next_page_key)
+        return await self._request('GET', f"{self.api_root}/api/v2/settings/objects", params=params)
+
+    async def get_all_settings_objects(
+            self,
+            schema_ids: Optional[List[str]] = None,
+            scopes: Optional[List[str]] = None,
+            external_ids: Optional[List[str]] = None,
+            fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get all settings objects with pagination handling (pages are sequential by nature)
+        """
+        all_objects = []
+        next_page_key = None
+
+        while True:
+            response = await self.get_settings_objects(
+                schema_ids=schema_ids,
+                scopes=scopes,
+                external_ids=external_ids,
+                fields=fields,
+                next_page_key=next_page_key
+            )
+            all_objects.extend(response.get('items', []))
+
+            next_page_key = response.get('nextPageKey')
+            if not next_page_key:
+                return all_objects
+
+    async def get_settings_objects_by_schema(
+            self,
+            schema_ids: List[str],
+            scopes: Optional[List[str]] = None,
+            fields: Optional[List[str]] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Page through several schemas concurrently, one pagination chain per schema
+
+        Args:
+            schema_ids: Schema IDs to fetch
+            scopes: Optional scope filter applied to every schema
+            fields: List of fields to include in response
+
+        Returns:
+            Dictionary mapping schema ID to its settings objects
+        """
+        results = await asyncio.gather(*(
+            self.get_all_settings_objects(schema_ids=[schema_id], scopes=scopes, fields=fields)
+            for schema_id in schema_ids
+        ))
+        return dict(zip(schema_ids, results))
+
 
 def main():
     # Configuration - Replace these with your actual values
@@ -181,6 +578,23 @@ def main():
     print(f"Total count: {single_page.get('totalCount', 0)}")
     print(f"Next page key: {single_page.get('nextPageKey', 'None')}")
 
+    # Example 5: Mirror alerting profiles into another environment (validate only)
+    print("\n=== Example 5: Bulk validate alerting profiles for another environment ===")
+    target_api = DynatraceSettingsAPI("your-target-environment.live.dynatrace.com", API_TOKEN, use_session=True)
+    profiles = [
+        {
+            'schemaId': obj['schemaId'],
+            'scope': obj['scope'],
+            'externalId': obj.get('externalId') or obj['objectId'],
+            'value': obj['value']
+        }
+        for obj in schema_objects if obj.get('schemaId') == "builtin:alerting.profile"
+    ]
+    results = target_api.update_settings_objects(profiles, validate_only=True)
+    for result in results:
+        if result['error']:
+            print(f"Object {result['index']} ({result['externalId']}): {result['code']} {result['error']}")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,9 +1,25 @@
 import xml.etree.ElementTree as ET
-import pandas as pd
+import argparse
+import heapq
 from collections import defaultdict
 import sys
 from datetime import datetime
 
+from excel_io import ENGINES, RowSpool, cell_text, read_sheet, write_workbook
+from feed_profile import FeedProfile
+from id_keys import OriginalIds, finish_results, normalize_id, original_pair
+from parse_pipeline import parse_inputs
+from partition_compare import canonical_ids, merge_ordered, merge_sorted, run_partitions, split_ids, split_mapping
+from sort_merge import RUN_SIZE, external_sort, merge_groups
+from stream_compare import confirm_duplicate_ids, count_accounts, iter_accounts, run_pipeline
+
+# (sheet, header row, columns) read by parse_excel, prefetched in parallel by parse_inputs
+EXCEL_SHEETS = [
+    ('AWF_ACF2IDNOVELL', 5, 'C:D'),
+    ('AWFEMPLOYEE', 5, None),
+    ('AWF_USERS', 5, None)
+]
+
 # Role mappings
 SCHEDULING_ROLE_MAP = {
     'SCHEDULING_APS-eBSS': 'APS-eBSS',
@@ -40,29 +56,47 @@ ADDITIONAL_ROLE_MAPS = {
     'REPRINT_Administrator': 'Administrator'
 }
 
+# Raw feed role names the maps cover; the feed profile reports any others
+KNOWN_ROLES = [*SCHEDULING_ROLE_MAP, *ONREQUEST_ROLE_MAP, *ADDITIONAL_ROLE_MAPS]
+
+
+def account_roles(account):
+    """Roles of one <account> element with mappings applied."""
+    roles = set()
+    for role in account.findall('.//attributeValueRef'):
+        role_id = role.get('id')
+        if role_id.startswith('Role='):
+            role_name = role_id[5:]  # Remove 'Role=' prefix
+            # Apply mappings if available
+            if role_name in SCHEDULING_ROLE_MAP:
+                roles.add(SCHEDULING_ROLE_MAP[role_name])
+            elif role_name in ONREQUEST_ROLE_MAP:
+                roles.add(ONREQUEST_ROLE_MAP[role_name])
+            elif role_name in ADDITIONAL_ROLE_MAPS:
+                roles.add(ADDITIONAL_ROLE_MAPS[role_name])
+            else:
+                roles.add(role_name)
+    return roles
+
 
-def parse_xml(xml_file):
-    """Parse XML file and extract user roles with mappings applied."""
+def parse_xml(xml_file, profile=None):
+    """Parse XML file and extract user roles with mappings applied; profile (a FeedProfile) observes each account."""
     try:
         tree = ET.parse(xml_file)
         root = tree.getroot()
         xml_users = defaultdict(set)
 
         for account in root.findall('.//account'):
-            user_id = account.get('id')
-            for role in account.findall('.//attributeValueRef'):
-                role_id = role.get('id')
-                if role_id.startswith('Role='):
-                    role_name = role_id[5:]  # Remove 'Role=' prefix
-                    # Apply mappings if available
-                    if role_name in SCHEDULING_ROLE_MAP:
-                        xml_users[user_id].add(SCHEDULING_ROLE_MAP[role_name])
-                    elif role_name in ONREQUEST_ROLE_MAP:
-                        xml_users[user_id].add(ONREQUEST_ROLE_MAP[role_name])
-                    elif role_name in ADDITIONAL_ROLE_MAPS:
-                        xml_users[user_id].add(ADDITIONAL_ROLE_MAPS[role_name])
-                    else:
-                        xml_users[user_id].add(role_name)
+            if profile is not None:
+                profile.observe(account)
+            user_id = normalize_id(account.get('id'))
+            if not user_id:  # Accounts without an id match nobody
+                continue
+            roles = account_roles(account)
+            if user_id in xml_users:
+                xml_users[user_id] |= roles
+            elif roles:
+                xml_users[user_id] = roles
         return xml_users
 
     except ET.ParseError as e:
@@ -71,15 +105,16 @@ def parse_xml(xml_file):
         sys.exit(f"Unexpected error reading XML: {e}")
 
 
-def parse_excel(excel_file):
+def parse_excel(excel_file, engine='auto', sheets=None):
     """Parse Excel file and extract user roles with ACF2ID/NOVELLID mapping."""
     try:
         # Read ACF2ID to NOVELLID mapping sheet
-        id_map_df = pd.read_excel(excel_file, sheet_name='AWF_ACF2IDNOVELL', header=5, usecols="C:D")
-        id_map = {}
-        if not id_map_df.empty:
-            id_map = dict(zip(id_map_df['ACF2ID'].dropna().astype(str).str.strip(),
-                              id_map_df['NOVELLID'].dropna().astype(str).str.strip()))
+        _, id_rows = read_sheet(excel_file, 'AWF_ACF2IDNOVELL', header=5, usecols="C:D",
+                                engine=engine, prefetched=sheets)
+        original_ids = {}  # normalized id -> id as the workbook wrote it, where they differ
+        acf2ids = (normalize_id(row['ACF2ID'], original_ids) for row in id_rows)
+        novellids = (normalize_id(row['NOVELLID'], original_ids) for row in id_rows)
+        id_map = dict(zip([acf2id for acf2id in acf2ids if acf2id], [novellid for novellid in novellids if novellid]))
         reverse_id_map = {v: k for k, v in id_map.items()}
 
         # Sheets to process (including AWFEMPLOYEE which appears to be the main sheet now)
@@ -93,15 +128,15 @@ def parse_excel(excel_file):
         for sheet in sheets_to_check:
             try:
                 # Try reading with header=5 first
-                df = pd.read_excel(excel_file, sheet_name=sheet, header=5)
+                columns, rows = read_sheet(excel_file, sheet, header=5, engine=engine, prefetched=sheets)
 
                 # If no data, try with header=0 as fallback
-                if df.empty:
-                    df = pd.read_excel(excel_file, sheet_name=sheet, header=0)
+                if not rows:
+                    columns, rows = read_sheet(excel_file, sheet, header=0, engine=engine, prefetched=sheets)
 
                 # Find User_ID column (case insensitive)
                 user_col = None
-                for col in df.columns:
+                for col in columns:
                     if 'user_id' in str(col).lower():
                         user_col = col
                         break
@@ -111,9 +146,9 @@ def parse_excel(excel_file):
                     continue
 
                 # Process each user
-                for _, row in df.iterrows():
-                    user_id = str(row[user_col]).strip()
-                    if not user_id or user_id == 'nan':
+                for row in rows:
+                    user_id = normalize_id(row[user_col], original_ids)
+                    if not user_id:
                         continue
 
                     # Handle different role columns based on sheet
@@ -122,13 +157,13 @@ def parse_excel(excel_file):
                         role_columns = ['SCHEDULING', 'NOTIFY', 'REPRINT', 'DOCUPDATE', 'RESTORE']
                         for role_col in role_columns:
                             if role_col in row:
-                                role = str(row[role_col]).strip()
-                                if role and role != 'nan':
+                                role = cell_text(row[role_col])
+                                if role:
                                     excel_users[user_id].add(role)
                     else:  # AWF_USERS sheet
                         if 'ROLENAME' in row:
-                            role = str(row['ROLENAME']).strip()
-                            if role and role != 'nan' and role != 'NULL':
+                            role = cell_text(row['ROLENAME'])
+                            if role and role != 'NULL':
                                 excel_users[user_id].add(role)
                             elif role == 'NULL':
                                 empty_role_users.add(user_id)
@@ -141,7 +176,8 @@ def parse_excel(excel_file):
             'excel_users': excel_users,
             'empty_role_users': empty_role_users,
             'id_map': id_map,
-            'reverse_id_map': reverse_id_map
+            'reverse_id_map': reverse_id_map,
+            'original_ids': original_ids
         }
 
     except ImportError:
@@ -152,6 +188,24 @@ def parse_excel(excel_file):
         sys.exit(f"Error reading Excel file: {str(e)}")
 
 
+def role_mismatch(excel_user, excel_roles, xml_roles):
+    """Role Mismatches row for a user whose Excel and XML roles differ, else None."""
+    # Check for missing roles in Excel
+    missing_in_excel = xml_roles - excel_roles
+    # Check for extra roles in Excel
+    extra_in_excel = excel_roles - xml_roles
+
+    if not missing_in_excel and not extra_in_excel:
+        return None
+    return {
+        'User_ID': excel_user,
+        'XML_Roles': ', '.join(sorted(xml_roles)) if xml_roles else '',
+        'Excel_Roles': ', '.join(sorted(excel_roles)) if excel_roles else '',
+        'Missing_in_Excel': ', '.join(sorted(missing_in_excel)) if missing_in_excel else '',
+        'Extra_in_Excel': ', '.join(sorted(extra_in_excel)) if extra_in_excel else ''
+    }
+
+
 def compare_data(xml_users, excel_data):
     """Compare XML and Excel data, handling ID mappings and role validation."""
     excel_users = excel_data['excel_users']
@@ -205,21 +259,9 @@ def compare_data(xml_users, excel_data):
         if not xml_user:
             continue  # User only in Excel (handled above)
 
-        xml_roles = xml_users.get(xml_user, set())
-
-        # Check for missing roles in Excel
-        missing_in_excel = xml_roles - excel_roles
-        # Check for extra roles in Excel
-        extra_in_excel = excel_roles - xml_roles
-
-        if missing_in_excel or extra_in_excel:
-            mismatches.append({
-                'User_ID': excel_user,
-                'XML_Roles': ', '.join(sorted(xml_roles)) if xml_roles else '',
-                'Excel_Roles': ', '.join(sorted(excel_roles)) if excel_roles else '',
-                'Missing_in_Excel': ', '.join(sorted(missing_in_excel)) if missing_in_excel else '',
-                'Extra_in_Excel': ', '.join(sorted(extra_in_excel)) if extra_in_excel else ''
-            })
+        mismatch = role_mismatch(excel_user, excel_roles, xml_users.get(xml_user, set()))
+        if mismatch:
+            mismatches.append(mismatch)
         else:
             matching_users += 1
 
@@ -233,7 +275,7 @@ def compare_data(xml_users, excel_data):
         'only_in_xml': sorted(only_in_xml),
         'only_in_excel': sorted(only_in_excel),
         'empty_role_users': sorted(empty_role_users),
-        'role_mismatches': pd.DataFrame(mismatches),
+        'role_mismatches': mismatches,
         'mapped_users': mapped_users,
         'matching_users': matching_users,
         'total_xml_users': len(xml_users),
@@ -242,99 +284,355 @@ def compare_data(xml_users, excel_data):
     }
 
 
-def export_results(results, output_file):
-    """Export comparison results to Excel file."""
-    try:
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            # Summary Sheet
-            summary_data = {
-                'Metric': [
-                    'Comparison Date',
-                    'Total XML Users',
-                    'Total Excel Users',
-                    'Mapped User Pairs (ACF2ID ↔ NOVELLID)',
-                    'Users with matching roles',
-                    'Users with role mismatches',
-                    'Users only in XML',
-                    'Users only in Excel',
-                    'Excel users with empty roles'
-                ],
-                'Value': [
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    results['total_xml_users'],
-                    results['total_excel_users'],
-                    results['total_mapped_pairs'],
-                    results['matching_users'],
-                    len(results['role_mismatches']),
-                    len(results['only_in_xml']),
-                    len(results['only_in_excel']),
-                    len(results['empty_role_users'])
-                ]
-            }
-            pd.DataFrame(summary_data).to_excel(writer, sheet_name='Summary', index=False)
-
-            # Role Mismatches
-            if not results['role_mismatches'].empty:
-                results['role_mismatches'].to_excel(
-                    writer, sheet_name='Role Mismatches', index=False)
-            else:
-                pd.DataFrame({'Message': ['No role mismatches found']}).to_excel(
-                    writer, sheet_name='Role Mismatches', index=False)
+def compare_partitioned(xml_users, excel_data, partitions, workers=None):
+    """
+    Compare like compare_data, split into hash partitions compared in a process pool
 
-            # Users only in XML
-            if results['only_in_xml']:
-                pd.DataFrame({'User_ID': results['only_in_xml']}).to_excel(
-                    writer, sheet_name='XML Only Users', index=False)
-            else:
-                pd.DataFrame({'Message': ['No users only in XML']}).to_excel(
-                    writer, sheet_name='XML Only Users', index=False)
+    Both sides are partitioned by canonical user ID (ACF2ID/NOVELLID pairs share one), so each
+    partition holds every ID its users can be matched with, and the merged results are the same.
+    """
+    excel_users = excel_data['excel_users']
+    id_map = excel_data['id_map']
+    canonical = canonical_ids(id_map)
+
+    xml_parts = split_mapping(xml_users, canonical, partitions)
+    excel_parts = split_mapping(excel_users, canonical, partitions)
+    empty_parts = split_ids(excel_data['empty_role_users'], canonical, partitions)
+    id_map_parts = split_mapping(id_map, canonical, partitions)
+    reverse_id_map_parts = split_mapping(excel_data['reverse_id_map'], canonical, partitions)
+    parts = [(xml_parts[i], {'excel_users': excel_parts[i], 'empty_role_users': empty_parts[i],
+                             'id_map': id_map_parts[i], 'reverse_id_map': reverse_id_map_parts[i]})
+             for i in range(partitions)]
+    results = run_partitions(compare_data, parts, workers)
+
+    # Mismatches follow the Excel row order, mapped pairs the ACF2ID/NOVELLID sheet order
+    excel_order = {user_id: i for i, user_id in enumerate(excel_users)}
+    acf2_order = {acf2id: i for i, acf2id in enumerate(id_map)}
+    mapped_users = merge_ordered((r['mapped_users'] for r in results),
+                                 key=lambda pair: acf2_order[pair[:pair.index(' (Excel) ↔ ')]])
 
-            # Users only in Excel
-            if results['only_in_excel']:
-                pd.DataFrame({'User_ID': results['only_in_excel']}).to_excel(
-                    writer, sheet_name='Excel Only Users', index=False)
-            else:
-                pd.DataFrame({'Message': ['No users only in Excel']}).to_excel(
-                    writer, sheet_name='Excel Only Users', index=False)
+    return {
+        'only_in_xml': merge_sorted(r['only_in_xml'] for r in results),
+        'only_in_excel': merge_sorted(r['only_in_excel'] for r in results),
+        'empty_role_users': merge_sorted(r['empty_role_users'] for r in results),
+        'role_mismatches': merge_ordered((r['role_mismatches'] for r in results),
+                                         key=lambda row: excel_order[row['User_ID']]),
+        'mapped_users': mapped_users,
+        'matching_users': sum(r['matching_users'] for r in results),
+        'total_xml_users': len(xml_users),
+        'total_excel_users': len(excel_users),
+        'total_mapped_pairs': len(mapped_users)
+    }
 
-            # Empty role users
-            if results['empty_role_users']:
-                pd.DataFrame({'User_ID': results['empty_role_users']}).to_excel(
-                    writer, sheet_name='Empty Role Users', index=False)
-            else:
-                pd.DataFrame({'Message': ['No users with empty roles']}).to_excel(
-                    writer, sheet_name='Empty Role Users', index=False)
 
-            # Mapped users
-            if results['mapped_users']:
-                pd.DataFrame({'Mapped_User_Pairs': results['mapped_users']}).to_excel(
-                    writer, sheet_name='Mapped Users', index=False)
+def compare_streaming(xml_file, excel_data, profile=None):
+    """
+    Compare like compare_data while the XML is still being parsed
+
+    Each feed user is reconciled against the Excel index as it is parsed and its rows are
+    spooled to disk, so memory holds the Excel side, the feed's user IDs and the accounts in
+    flight. Users with several accounts are compared with their merged roles (see run_pipeline).
+    An Excel user is compared with the first feed user that matches one of its IDs. XML-only
+    users are sorted, mismatches are listed in feed order. profile, a FeedProfile, observes every
+    account.
+    """
+    excel_users = excel_data['excel_users']
+    empty_role_users = excel_data['empty_role_users']
+    id_map = excel_data['id_map']
+    reverse_id_map = excel_data['reverse_id_map']
+
+    # ACF2IDs by the NOVELLID they map to (several ACF2IDs may share one)
+    acf2ids = defaultdict(list)
+    for acf2id, novellid in id_map.items():
+        acf2ids[novellid].append(acf2id)
+
+    compared = {}  # Excel user -> the feed user it was compared with
+    mapped_novellids = set()
+    counts = {'xml_users': 0}
+
+    def reconcile(xml_user, xml_roles):
+        counts['xml_users'] += 1
+        return compare_user(xml_user, xml_roles)
+
+    def compare_user(xml_user, xml_roles):
+        if xml_user in reverse_id_map:
+            mapped_novellids.add(xml_user)
+
+        # Excel users with this account among their possible IDs
+        candidates = [xml_user] + acf2ids.get(xml_user, [])
+        if xml_user in id_map and reverse_id_map.get(id_map[xml_user]) == xml_user:
+            candidates.append(id_map[xml_user])
+
+        rows = []
+        if not any(possible_id in excel_users for possible_id in
+                   (xml_user, id_map.get(xml_user), reverse_id_map.get(xml_user))):
+            rows.append(('only_in_xml', xml_user))
+        for excel_user in candidates:
+            if excel_user not in excel_users or compared.get(excel_user, xml_user) != xml_user:
+                continue
+            compared[excel_user] = xml_user
+            mismatch = role_mismatch(excel_user, excel_users[excel_user], xml_roles)
+            if mismatch:
+                rows.append(('role_mismatches', mismatch))
+        return rows
+
+    spools = run_pipeline(xml_file, account_roles, reconcile, profile=profile, revise=compare_user,
+                          sorted_sheets=('only_in_xml',))
+    mismatches = spools.get('role_mismatches', [])
+
+    # Find mapped user pairs
+    mapped_users = []
+    for acf2id, novellid in id_map.items():
+        if acf2id in excel_users and novellid in mapped_novellids:
+            mapped_users.append(f"{acf2id} (Excel) ↔ {novellid} (XML)")
+
+    return {
+        'only_in_xml': spools.get('only_in_xml', []),
+        'only_in_excel': sorted(set(excel_users) - compared.keys()),
+        'empty_role_users': sorted(empty_role_users),
+        'role_mismatches': mismatches,
+        'mapped_users': mapped_users,
+        'matching_users': len(compared) - len(mismatches),
+        'total_xml_users': counts['xml_users'],
+        'total_excel_users': len(excel_users),
+        'total_mapped_pairs': len(mapped_users)
+    }
+
+
+def compare_sort_merge(xml_file, excel_data, run_size=RUN_SIZE, profile=None):
+    """
+    Compare like compare_data with a sort-merge instead of hashing whole sides into sets
+
+    Both sides are flattened to (canonical ID, user ID, role) records, externally sorted in runs
+    of run_size and walked in one linear merge pass, so the feed is never held in memory.
+    ACF2ID/NOVELLID pairs share a canonical ID, so each merge group holds every user its users
+    can be matched with. All user lists, mismatches included, come out sorted by user ID.
+    profile, a FeedProfile, observes every account.
+    """
+    excel_users = excel_data['excel_users']
+    empty_role_users = excel_data['empty_role_users']
+    id_map = excel_data['id_map']
+    reverse_id_map = excel_data['reverse_id_map']
+    canonical = canonical_ids(id_map)
+
+    def get_all_possible_ids(user_id):
+        ids = {user_id}
+        if user_id in id_map:
+            ids.add(id_map[user_id])
+        if user_id in reverse_id_map:
+            ids.add(reverse_id_map[user_id])
+        return ids
+
+    xml_records = external_sort(((canonical.get(user_id, user_id), user_id, role)
+                                 for user_id, roles in iter_accounts(xml_file, account_roles, profile)
+                                 for role in roles), run_size)
+    excel_records = external_sort(((canonical.get(user_id, user_id), user_id, role)
+                                   for user_id, roles in excel_users.items()
+                                   for role in roles), run_size)
+
+    # Groups come in canonical ID order, which is user ID order except for users whose
+    # canonical ID is their mapped ID; those few are set aside and merged back in at the end
+    outputs = {name: (RowSpool(), []) for name in ('only_in_xml', 'only_in_excel', 'role_mismatches')}
+
+    def emit(name, user_id, item):
+        in_order, set_aside = outputs[name]
+        (in_order if canonical.get(user_id, user_id) == user_id else set_aside).append(item)
+
+    def collect(name, key=None):
+        in_order, set_aside = outputs[name]
+        merged = RowSpool()
+        for item in heapq.merge(in_order, sorted(set_aside, key=key), key=key):
+            merged.append(item)
+        in_order.close()
+        return merged
+
+    mapped_acf2ids = []
+    matching_users = 0
+    total_xml_users = 0
+    for _, xml_group, excel_group in merge_groups(xml_records, excel_records):
+        total_xml_users += len(xml_group)
+        for xml_user in xml_group:
+            if not any(possible_id in excel_group for possible_id in get_all_possible_ids(xml_user)):
+                emit('only_in_xml', xml_user, xml_user)
+
+        for excel_user, excel_roles in excel_group.items():
+            xml_user = None
+            for possible_id in get_all_possible_ids(excel_user):
+                if possible_id in xml_group:
+                    xml_user = possible_id
+                    break
+            if xml_user is None:
+                emit('only_in_excel', excel_user, excel_user)
+                continue
+
+            mismatch = role_mismatch(excel_user, excel_roles, xml_group[xml_user])
+            if mismatch:
+                emit('role_mismatches', excel_user, mismatch)
             else:
-                pd.DataFrame({'Message': ['No mapped user pairs found']}).to_excel(
-                    writer, sheet_name='Mapped Users', index=False)
+                matching_users += 1
+            if excel_user in id_map and id_map[excel_user] in xml_group:
+                mapped_acf2ids.append(excel_user)
+
+    # Mapped pairs follow the ACF2ID/NOVELLID sheet order
+    acf2_order = {acf2id: i for i, acf2id in enumerate(id_map)}
+    mapped_users = [f"{acf2id} (Excel) ↔ {id_map[acf2id]} (XML)"
+                    for acf2id in sorted(mapped_acf2ids, key=acf2_order.get)]
+
+    return {
+        'only_in_xml': collect('only_in_xml'),
+        'only_in_excel': collect('only_in_excel'),
+        'empty_role_users': sorted(empty_role_users),
+        'role_mismatches': collect('role_mismatches', key=lambda row: row['User_ID']),
+        'mapped_users': mapped_users,
+        'matching_users': matching_users,
+        'total_xml_users': total_xml_users,
+        'total_excel_users': len(excel_users),
+        'total_mapped_pairs': len(mapped_users)
+    }
+
+
+def export_results(results, output_file, engine='auto'):
+    """Export comparison results to Excel file, with user IDs as the XML and the workbook wrote them."""
+    try:
+        sheets = {}
+        xml_ids = results['xml_original_ids']
+        excel_ids = results['excel_original_ids']
+
+        # Summary Sheet
+        sheets['Summary'] = {
+            'Metric': [
+                'Comparison Date',
+                'Total XML Users',
+                'Total Excel Users',
+                'Mapped User Pairs (ACF2ID ↔ NOVELLID)',
+                'Users with matching roles',
+                'Users with role mismatches',
+                'Users only in XML',
+                'Users only in Excel',
+                'Excel users with empty roles'
+            ],
+            'Value': [
+                datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                results['total_xml_users'],
+                results['total_excel_users'],
+                results['total_mapped_pairs'],
+                results['matching_users'],
+                len(results['role_mismatches']),
+                len(results['only_in_xml']),
+                len(results['only_in_excel']),
+                len(results['empty_role_users'])
+            ]
+        }
+
+        # Role Mismatches
+        mismatches = OriginalIds(results['role_mismatches'], columns={'User_ID': excel_ids})
+        sheets['Role Mismatches'] = mismatches or {'Message': ['No role mismatches found']}
+
+        # Users only in XML
+        if results['only_in_xml']:
+            sheets['XML Only Users'] = {'User_ID': OriginalIds(results['only_in_xml'], xml_ids)}
+        else:
+            sheets['XML Only Users'] = {'Message': ['No users only in XML']}
+
+        # Users only in Excel
+        if results['only_in_excel']:
+            sheets['Excel Only Users'] = {'User_ID': OriginalIds(results['only_in_excel'], excel_ids)}
+        else:
+            sheets['Excel Only Users'] = {'Message': ['No users only in Excel']}
+
+        # Likely-same IDs among the users only one side has
+        near_matches = OriginalIds(results['near_matches'],
+                                   columns={'XML_User_ID': xml_ids, 'Excel_User_ID': excel_ids})
+        sheets['Near Matches'] = near_matches or {'Message': ['No near-duplicate user IDs found']}
+
+        # Data-quality profile of the feed
+        sheets['Feed Profile'] = results['feed_profile']
+
+        # Empty role users
+        if results['empty_role_users']:
+            sheets['Empty Role Users'] = {'User_ID': OriginalIds(results['empty_role_users'], excel_ids)}
+        else:
+            sheets['Empty Role Users'] = {'Message': ['No users with empty roles']}
+
+        # Mapped users
+        if results['mapped_users']:
+            sheets['Mapped Users'] = {'Mapped_User_Pairs': [original_pair(pair, excel_ids, xml_ids)
+                                                            for pair in results['mapped_users']]}
+        else:
+            sheets['Mapped Users'] = {'Message': ['No mapped user pairs found']}
+
+        write_workbook(output_file, sheets, engine)
 
     except Exception as e:
         sys.exit(f"Error exporting to Excel: {e}")
 
 
 def main():
-    print("AWF User and Role Comparison Tool\n" + "=" * 40)
-
-    # Configuration
+    # Configuration (defaults, overridable on the command line)
     XML_FILE = 'AWF_01_accounts.xml'
     EXCEL_FILE = 'AWF_List.xlsx'
     OUTPUT_FILE = 'AWF_User_Role_Comparison_Results.xlsx'
 
+    parser = argparse.ArgumentParser(description='Compare AWF user roles between the XML feed and the Excel workbook')
+    parser.add_argument('--xml', default=XML_FILE, help=f"XML feed (default: {XML_FILE})")
+    parser.add_argument('--excel', default=EXCEL_FILE, help=f"Excel workbook (default: {EXCEL_FILE})")
+    parser.add_argument('--output', default=OUTPUT_FILE, help=f"Results workbook (default: {OUTPUT_FILE})")
+    parser.add_argument('--engine', choices=ENGINES, default='auto',
+                        help="Excel reader/writer; 'auto' uses the standard library for small files (default: auto)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processes parsing the XML and the Excel sheets concurrently; 1 parses sequentially "
+                             "(default: 1 for small inputs, else one per sheet plus the XML, up to the CPU count)")
+    parser.add_argument('--partitions', type=int, default=1,
+                        help='Hash-partition both sides by canonical user ID and compare the partitions in a '
+                             'process pool (default: 1, a single comparison)')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--stream', action='store_true',
+                      help='Load the Excel side first, then compare each XML account while the feed is parsed')
+    mode.add_argument('--sort-merge', action='store_true',
+                      help='Externally sort both sides and compare them in one merge pass (for very large feeds)')
+    parser.add_argument('--run-size', type=int, default=RUN_SIZE,
+                        help=f"Records sorted in memory per run with --sort-merge (default: {RUN_SIZE})")
+    parser.add_argument('--quick-look', action='store_true',
+                        help='Only estimate user counts and overlaps per source and role category from '
+                             'HyperLogLog sketches in one pass (no results workbook)')
+    args = parser.parse_args()
+
+    print("AWF User and Role Comparison Tool\n" + "=" * 40)
+
     try:
-        # Process files
-        print("\n[1/3] Parsing XML file...")
-        xml_users = parse_xml(XML_FILE)
+        if args.quick_look:
+            from quick_look import print_quick_look, quick_look
+            print_quick_look(quick_look(args.xml, args.excel, EXCEL_SHEETS, roles_only=True, engine=args.engine))
+            return
 
-        print("[2/3] Parsing Excel file...")
-        excel_data = parse_excel(EXCEL_FILE)
+        # Process files
+        # The streaming modes do not hold the feed's IDs, so neither may the profile
+        streaming = args.stream or args.sort_merge
+        profile = FeedProfile(KNOWN_ROLES, expected_accounts=count_accounts(args.xml) if streaming else None)
+        if streaming:
+            print("\n[1/3] Parsing Excel file...")
+            excel_data = parse_excel(args.excel, args.engine)
+
+            print("[2/3] Streaming XML file...")
+            print("[3/3] Comparing data...")
+            if args.sort_merge:
+                results = compare_sort_merge(args.xml, excel_data, args.run_size, profile=profile)
+            else:
+                results = compare_streaming(args.xml, excel_data, profile=profile)
+            confirm_duplicate_ids(args.xml, profile)
+        else:
+            print("\n[1/3] Parsing XML file...")
+            print("[2/3] Parsing Excel file...")
+            xml_users, excel_data = parse_inputs(parse_xml, args.xml, parse_excel, args.excel, EXCEL_SHEETS,
+                                                 args.engine, args.workers, profile)
+
+            print("[3/3] Comparing data...")
+            if args.partitions > 1:
+                results = compare_partitioned(xml_users, excel_data, args.partitions)
+            else:
+                results = compare_data(xml_users, excel_data)
 
-        print("[3/3] Comparing data...")
-        results = compare_data(xml_users, excel_data)
+        finish_results(results, profile, excel_data['original_ids'])
 
         # Display quick summary
         print("\nComparison Results:")
@@ -345,11 +643,13 @@ def main():
         print(f"- Users with role mismatches: {len(results['role_mismatches'])}")
         print(f"- Users only in XML: {len(results['only_in_xml'])}")
         print(f"- Users only in Excel: {len(results['only_in_excel'])}")
+        print(f"- Near-duplicate user ID pairs: {len(results['near_matches'])}")
+        print(f"- Feed profile: {profile.summary()}")
         print(f"- Excel users with empty roles: {len(results['empty_role_users'])}")
 
         # Export results
-        print(f"\nExporting results to {OUTPUT_FILE}...")
-        export_results(results, OUTPUT_FILE)
+        print(f"\nExporting results to {args.output}...")
+        export_results(results, args.output, args.engine)
         print("Done! Results exported successfully.")
     except Exception as e:
         print(f"\nError: {str(e)}")
@@ -1,9 +1,26 @@
 import xml.etree.ElementTree as ET
-import pandas as pd
+import argparse
 from collections import defaultdict
 import sys
 from datetime import datetime
 
+from excel_io import ENGINES, read_sheet, write_workbook
+from feed_profile import FeedProfile
+from id_keys import OriginalIds, finish_results, normalize_id
+from parse_pipeline import parse_inputs
+from partition_compare import canonical_ids, merge_ordered, merge_sorted, run_partitions, split_ids, split_mapping
+from stream_compare import confirm_duplicate_ids, count_accounts, run_pipeline
+
+# (sheet, header row, columns) read by parse_excel, prefetched in parallel by parse_inputs
+EXCEL_SHEETS = [
+    ('AWF_ACF2IDNOVELL', 5, 'C:D'),
+    ('Scheduling', 5, 'C:K'),
+    ('OnRequest', 5, 'C:K'),
+    ('ASPNET_Users', 5, 'C:K'),
+    ('AWF_USERACCESSPROFILE', 5, 'C:K'),
+    ('AWF_USERS', 5, 'C:K')
+]
+
 # Role mappings
 SCHEDULING_ROLE_MAP = {
     'SCHEDULING_APS-eBSS': 'APS-eBSS',
@@ -27,27 +44,45 @@ ONREQUEST_ROLE_MAP = {
     'AWF REQUEST FOR SERVICES_AWF User': 'AWF User'
 }
 
+# Raw feed role names the maps cover; the feed profile reports any others
+KNOWN_ROLES = [*SCHEDULING_ROLE_MAP, *ONREQUEST_ROLE_MAP]
+
+
+def account_roles(account):
+    """Roles of one <account> element with mappings applied."""
+    roles = set()
+    for role in account.findall('.//attributeValueRef'):
+        role_id = role.get('id')
+        if role_id.startswith('Role='):
+            role_name = role_id[5:]  # Remove 'Role=' prefix
+            # Apply mappings if available
+            if role_name in SCHEDULING_ROLE_MAP:
+                roles.add(SCHEDULING_ROLE_MAP[role_name])
+            elif role_name in ONREQUEST_ROLE_MAP:
+                roles.add(ONREQUEST_ROLE_MAP[role_name])
+            else:
+                roles.add(role_name)
+    return roles
+
 
-def parse_xml(xml_file):
-    """Parse XML file and extract user roles with mappings applied."""
+def parse_xml(xml_file, profile=None):
+    """Parse XML file and extract user roles with mappings applied; profile (a FeedProfile) observes each account."""
     try:
         tree = ET.parse(xml_file)
         root = tree.getroot()
         xml_users = defaultdict(set)
 
         for account in root.findall('.//account'):
-            user_id = account.get('id')
-            for role in account.findall('.//attributeValueRef'):
-                role_id = role.get('id')
-                if role_id.startswith('Role='):
-                    role_name = role_id[5:]  # Remove 'Role=' prefix
-                    # Apply mappings if available
-                    if role_name in SCHEDULING_ROLE_MAP:
-                        xml_users[user_id].add(SCHEDULING_ROLE_MAP[role_name])
-                    elif role_name in ONREQUEST_ROLE_MAP:
-                        xml_users[user_id].add(ONREQUEST_ROLE_MAP[role_name])
-                    else:
-                        xml_users[user_id].add(role_name)
+            if profile is not None:
+                profile.observe(account)
+            user_id = normalize_id(account.get('id'))
+            if not user_id:  # Accounts without an id match nobody
+                continue
+            roles = account_roles(account)
+            if user_id in xml_users:
+                xml_users[user_id] |= roles
+            elif roles:
+                xml_users[user_id] = roles
         return xml_users
 
     except ET.ParseError as e:
@@ -56,12 +91,19 @@ def parse_xml(xml_file):
         sys.exit(f"Unexpected error reading XML: {e}")
 
 
-def parse_excel(excel_file):
+def parse_excel(excel_file, engine='auto', sheets=None):
     """Parse Excel file with headers starting at C6 and handle ACF2ID/NOVELLID mapping."""
     try:
         # Read ACF2ID to NOVELLID mapping sheet
-        id_map_df = pd.read_excel(excel_file, sheet_name='AWF_ACF2IDNOVELL', header=5, usecols="C:D")
-        id_map = {row['ACF2ID']: row['NOVELLID'] for _, row in id_map_df.iterrows()}
+        _, id_rows = read_sheet(excel_file, 'AWF_ACF2IDNOVELL', header=5, usecols="C:D",
+                                engine=engine, prefetched=sheets)
+        original_ids = {}  # normalized id -> id as the workbook wrote it, where they differ
+        id_map = {}
+        for row in id_rows:
+            acf2id = normalize_id(row['ACF2ID'], original_ids)
+            novellid = normalize_id(row['NOVELLID'], original_ids)
+            if acf2id and novellid:
+                id_map[acf2id] = novellid
         reverse_id_map = {v: k for k, v in id_map.items()}
 
         # Function to get all possible IDs for a user
@@ -82,31 +124,37 @@ def parse_excel(excel_file):
         all_users = set()
         users_with_roles = {}
         empty_role_users = set()
+        sheet_users = {}  # Users of each sheet, for the membership matrix
 
         for sheet in sheets_to_check:
             try:
-                df = pd.read_excel(excel_file, sheet_name=sheet, header=5, usecols="C:K")
+                columns, rows = read_sheet(excel_file, sheet, header=5, usecols="C:K",
+                                           engine=engine, prefetched=sheets)
 
                 # Skip role checking for AWF_USERACCESSPROFILE
                 skip_role_check = (sheet == 'AWF_USERACCESSPROFILE')
 
-                if 'User_ID' not in df.columns:
+                if 'User_ID' not in columns:
                     print(f"Warning: 'User_ID' column not found in {sheet} sheet")
                     continue
 
-                if not skip_role_check and 'ROLENAME' not in df.columns:
+                if not skip_role_check and 'ROLENAME' not in columns:
                     print(f"Warning: 'ROLENAME' column not found in {sheet} sheet")
                     continue
 
-                for _, row in df.iterrows():
-                    user_id = row['User_ID']
+                sheet_users[sheet] = set()
+                for row in rows:
+                    user_id = normalize_id(row['User_ID'], original_ids)
+                    if not user_id:
+                        continue
                     all_users.add(user_id)
+                    sheet_users[sheet].add(user_id)
 
                     if skip_role_check:
                         continue
 
                     role = row.get('ROLENAME', None)
-                    if pd.isna(role) or role == 'NULL':
+                    if role is None or role == 'NULL':
                         empty_role_users.add(user_id)
                     else:
                         if user_id not in users_with_roles:
@@ -121,8 +169,10 @@ def parse_excel(excel_file):
             'all_users': all_users,
             'users_with_roles': users_with_roles,
             'empty_role_users': empty_role_users,
+            'sheet_users': sheet_users,
             'id_map': id_map,
-            'reverse_id_map': reverse_id_map
+            'reverse_id_map': reverse_id_map,
+            'original_ids': original_ids
         }
 
     except ImportError:
@@ -133,6 +183,23 @@ def parse_excel(excel_file):
         sys.exit(f"Error reading Excel file: {str(e)}")
 
 
+def role_mismatch(excel_user, excel_roles, xml_roles):
+    """Role Mismatches row for an Excel user whose roles are not all in the XML, else None."""
+    role_mismatches = []
+    for excel_role in excel_roles:
+        if excel_role not in xml_roles:
+            role_mismatches.append(excel_role)
+
+    if not role_mismatches:
+        return None
+    return {
+        'User_ID': excel_user,
+        'XML_Roles': ', '.join(xml_roles) if xml_roles else '',
+        'Excel_Roles': ', '.join(excel_roles),
+        'Mismatched_Roles': ', '.join(role_mismatches)
+    }
+
+
 def compare_data(xml_users, excel_data):
     """Compare XML and Excel data, handling ID mappings and role validation."""
     xml_user_ids = set(xml_users.keys())
@@ -190,125 +257,286 @@ def compare_data(xml_users, excel_data):
         elif excel_user in reverse_id_map and reverse_id_map[excel_user] in xml_user_ids:
             xml_user = reverse_id_map[excel_user]
 
-        xml_roles = xml_users.get(xml_user, set())
-
-        # Check for role mismatches
-        role_mismatches = []
-        for excel_role in excel_roles:
-            if excel_role not in xml_roles:
-                role_mismatches.append(excel_role)
-
-        if role_mismatches:
-            mismatches.append({
-                'User_ID': excel_user,
-                'XML_Roles': ', '.join(xml_roles) if xml_roles else '',
-                'Excel_Roles': ', '.join(excel_roles),
-                'Mismatched_Roles': ', '.join(role_mismatches)
-            })
+        mismatch = role_mismatch(excel_user, excel_roles, xml_users.get(xml_user, set()))
+        if mismatch:
+            mismatches.append(mismatch)
 
     return {
         'only_in_xml': sorted(only_in_xml),
         'only_in_excel': sorted(only_in_excel),
-        'role_mismatches': pd.DataFrame(mismatches),
+        'role_mismatches': mismatches,
         'empty_role_users': sorted(empty_role_users),
         'matching_users': len(excel_users_with_roles) - len(mismatches)
     }
 
 
-def export_results(results, output_file):
-    """Export comparison results to Excel file."""
+def compare_partitioned(xml_users, excel_data, partitions, workers=None):
+    """
+    Compare like compare_data, split into hash partitions compared in a process pool
+
+    Both sides are partitioned by canonical user ID (ACF2ID/NOVELLID pairs share one), so each
+    partition holds every ID its users can be matched with, and the merged results are the same.
+    """
+    users_with_roles = excel_data['users_with_roles']
+    canonical = canonical_ids(excel_data['id_map'])
+
+    xml_parts = split_mapping(xml_users, canonical, partitions)
+    all_parts = split_ids(excel_data['all_users'], canonical, partitions)
+    role_parts = split_mapping(users_with_roles, canonical, partitions)
+    empty_parts = split_ids(excel_data['empty_role_users'], canonical, partitions)
+    id_map_parts = split_mapping(excel_data['id_map'], canonical, partitions)
+    reverse_id_map_parts = split_mapping(excel_data['reverse_id_map'], canonical, partitions)
+    parts = [(xml_parts[i], {'all_users': all_parts[i], 'users_with_roles': role_parts[i],
+                             'empty_role_users': empty_parts[i], 'id_map': id_map_parts[i],
+                             'reverse_id_map': reverse_id_map_parts[i]})
+             for i in range(partitions)]
+    results = run_partitions(compare_data, parts, workers)
+
+    # Mismatches follow the Excel row order
+    excel_order = {user_id: i for i, user_id in enumerate(users_with_roles)}
+
+    return {
+        'only_in_xml': merge_sorted(r['only_in_xml'] for r in results),
+        'only_in_excel': merge_sorted(r['only_in_excel'] for r in results),
+        'role_mismatches': merge_ordered((r['role_mismatches'] for r in results),
+                                         key=lambda row: excel_order[row['User_ID']]),
+        'empty_role_users': merge_sorted(r['empty_role_users'] for r in results),
+        'matching_users': sum(r['matching_users'] for r in results)
+    }
+
+
+def compare_streaming(xml_file, excel_data, profile=None):
+    """
+    Compare like compare_data while the XML is still being parsed
+
+    Each feed user is reconciled against the Excel index as it is parsed and its rows are
+    spooled to disk, so memory holds the Excel side, the feed's user IDs and the accounts in
+    flight. Users with several accounts are compared with their merged roles (see run_pipeline).
+    An Excel user is compared with the feed user compare_data would pick (its NOVELLID, then its
+    ACF2ID, then itself); users whose preferred feed user has not been seen yet wait until the
+    end of the feed. XML-only users are sorted, mismatches are listed in feed order. profile, a
+    FeedProfile, observes every account.
+    """
+    excel_all_users = excel_data['all_users']
+    excel_users_with_roles = excel_data['users_with_roles']
+    empty_role_users = excel_data['empty_role_users']
+    id_map = excel_data['id_map']
+    reverse_id_map = excel_data['reverse_id_map']
+
+    # ACF2IDs by the NOVELLID they map to (several ACF2IDs may share one)
+    acf2ids = defaultdict(list)
+    for acf2id, novellid in id_map.items():
+        acf2ids[novellid].append(acf2id)
+
+    found_in_xml = set()
+    compared = {}  # Excel user -> the feed user it was compared with
+    pending = {}  # Excel user -> (rank of the best feed user seen so far, that user, its roles)
+
+    def reconcile(xml_user, xml_roles):
+        rows = []
+        if not (xml_user in excel_all_users
+                or (xml_user in reverse_id_map and reverse_id_map[xml_user] in excel_all_users)
+                or (xml_user in id_map and id_map[xml_user] in excel_all_users)):
+            rows.append(('only_in_xml', xml_user))
+
+        # Excel users this account stands for, ranked like the xml_user choice in compare_data
+        candidates = [(0, acf2id) for acf2id in acf2ids.get(xml_user, [])]
+        if xml_user in id_map and reverse_id_map.get(id_map[xml_user]) == xml_user:
+            candidates.append((1, id_map[xml_user]))
+        candidates.append((2, xml_user))
+
+        for rank, excel_user in candidates:
+            if excel_user not in excel_all_users:
+                continue
+            found_in_xml.add(excel_user)
+            if excel_user not in excel_users_with_roles or compared.get(excel_user, xml_user) != xml_user:
+                continue
+            best_rank = 0 if excel_user in id_map else 1 if excel_user in reverse_id_map else 2
+            pending_rank, pending_user, _ = pending.get(excel_user, (3, None, None))
+            if rank == best_rank:
+                compared[excel_user] = xml_user
+                pending.pop(excel_user, None)
+                mismatch = role_mismatch(excel_user, excel_users_with_roles[excel_user], xml_roles)
+                if mismatch:
+                    rows.append(('role_mismatches', mismatch))
+            elif rank < pending_rank or pending_user == xml_user:
+                pending[excel_user] = (rank, xml_user, xml_roles)
+        return rows
+
+    spools = run_pipeline(xml_file, account_roles, reconcile, profile=profile, sorted_sheets=('only_in_xml',))
+    mismatches = spools.get('role_mismatches', [])
+    for excel_user, (_, _, xml_roles) in pending.items():
+        mismatch = role_mismatch(excel_user, excel_users_with_roles[excel_user], xml_roles)
+        if mismatch:
+            mismatches.append(mismatch)
+
+    return {
+        'only_in_xml': spools.get('only_in_xml', []),
+        'only_in_excel': sorted(excel_all_users - found_in_xml),
+        'role_mismatches': mismatches,
+        'empty_role_users': sorted(empty_role_users),
+        'matching_users': len(excel_users_with_roles) - len(mismatches)
+    }
+
+
+def export_results(results, output_file, engine='auto'):
+    """Export comparison results to Excel file, with user IDs as the XML and the workbook wrote them."""
     try:
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            # Summary Sheet
-            summary_data = {
-                'Metric': [
-                    'Comparison Date',
-                    'Total XML Users',
-                    'Total Excel Users',
-                    'Users only in XML',
-                    'Users only in Excel',
-                    'Users with matching roles',
-                    'Users with role mismatches',
-                    'Excel users with empty roles'
-                ],
-                'Value': [
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    len(results['only_in_xml']) + len(results['role_mismatches']) + results['matching_users'],
-                    len(results['only_in_excel']) + len(results['role_mismatches']) + results['matching_users'],
-                    len(results['only_in_xml']),
-                    len(results['only_in_excel']),
-                    results['matching_users'],
-                    len(results['role_mismatches']),
-                    len(results['empty_role_users'])
-                ]
-            }
-            pd.DataFrame(summary_data).to_excel(writer, sheet_name='Summary', index=False)
-
-            # Mismatches Sheet
-            if not results['role_mismatches'].empty:
-                results['role_mismatches'].to_excel(writer, sheet_name='Role Mismatches', index=False)
-            else:
-                pd.DataFrame({'Message': ['No role mismatches found']}).to_excel(
-                    writer, sheet_name='Role Mismatches', index=False)
+        sheets = {}
+        xml_ids = results['xml_original_ids']
+        excel_ids = results['excel_original_ids']
+
+        # Summary Sheet
+        sheets['Summary'] = {
+            'Metric': [
+                'Comparison Date',
+                'Total XML Users',
+                'Total Excel Users',
+                'Users only in XML',
+                'Users only in Excel',
+                'Users with matching roles',
+                'Users with role mismatches',
+                'Excel users with empty roles'
+            ],
+            'Value': [
+                datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                len(results['only_in_xml']) + len(results['role_mismatches']) + results['matching_users'],
+                len(results['only_in_excel']) + len(results['role_mismatches']) + results['matching_users'],
+                len(results['only_in_xml']),
+                len(results['only_in_excel']),
+                results['matching_users'],
+                len(results['role_mismatches']),
+                len(results['empty_role_users'])
+            ]
+        }
 
-            # Users only in XML
-            if results['only_in_xml']:
-                pd.DataFrame({'User_ID': results['only_in_xml']}).to_excel(
-                    writer, sheet_name='XML Only Users', index=False)
-            else:
-                pd.DataFrame({'Message': ['No users only in XML']}).to_excel(
-                    writer, sheet_name='XML Only Users', index=False)
+        # Mismatches Sheet
+        mismatches = OriginalIds(results['role_mismatches'], columns={'User_ID': excel_ids})
+        sheets['Role Mismatches'] = mismatches or {'Message': ['No role mismatches found']}
 
-            # Users only in Excel (including those with empty roles)
-            if results['only_in_excel']:
-                pd.DataFrame({'User_ID': results['only_in_excel']}).to_excel(
-                    writer, sheet_name='Excel Only Users', index=False)
-            else:
-                pd.DataFrame({'Message': ['No users only in Excel']}).to_excel(
-                    writer, sheet_name='Excel Only Users', index=False)
+        # Users only in XML
+        if results['only_in_xml']:
+            sheets['XML Only Users'] = {'User_ID': OriginalIds(results['only_in_xml'], xml_ids)}
+        else:
+            sheets['XML Only Users'] = {'Message': ['No users only in XML']}
 
-            # Users with empty roles
-            if results['empty_role_users']:
-                pd.DataFrame({'User_ID': results['empty_role_users']}).to_excel(
-                    writer, sheet_name='Empty Role Users', index=False)
-            else:
-                pd.DataFrame({'Message': ['No users with empty roles']}).to_excel(
-                    writer, sheet_name='Empty Role Users', index=False)
+        # Users only in Excel (including those with empty roles)
+        if results['only_in_excel']:
+            sheets['Excel Only Users'] = {'User_ID': OriginalIds(results['only_in_excel'], excel_ids)}
+        else:
+            sheets['Excel Only Users'] = {'Message': ['No users only in Excel']}
+
+        # Likely-same IDs among the users only one side has
+        near_matches = OriginalIds(results['near_matches'],
+                                   columns={'XML_User_ID': xml_ids, 'Excel_User_ID': excel_ids})
+        sheets['Near Matches'] = near_matches or {'Message': ['No near-duplicate user IDs found']}
+
+        # Data-quality profile of the feed
+        sheets['Feed Profile'] = results['feed_profile']
+
+        # Users with empty roles
+        if results['empty_role_users']:
+            sheets['Empty Role Users'] = {'User_ID': OriginalIds(results['empty_role_users'], excel_ids)}
+        else:
+            sheets['Empty Role Users'] = {'Message': ['No users with empty roles']}
+
+        # Presence patterns across the XML and every sheet (--membership)
+        if results.get('presence_patterns'):
+            sheets['Presence Patterns'] = results['presence_patterns']
+
+        write_workbook(output_file, sheets, engine)
 
     except Exception as e:
         sys.exit(f"Error exporting to Excel: {e}")
 
 
 def main():
-    print("AWF Role Comparison Tool\n" + "=" * 25)
-
-    # Configuration
+    # Configuration (defaults, overridable on the command line)
     XML_FILE = 'AWF_01_accounts.xml'
     EXCEL_FILE = 'AWF_List.xlsx'
     OUTPUT_FILE = 'AWF_Role_Comparison_Results.xlsx'
 
+    parser = argparse.ArgumentParser(description='Verify AWF feed roles against the Excel workbook')
+    parser.add_argument('--xml', default=XML_FILE, help=f"XML feed (default: {XML_FILE})")
+    parser.add_argument('--excel', default=EXCEL_FILE, help=f"Excel workbook (default: {EXCEL_FILE})")
+    parser.add_argument('--output', default=OUTPUT_FILE, help=f"Results workbook (default: {OUTPUT_FILE})")
+    parser.add_argument('--engine', choices=ENGINES, default='auto',
+                        help="Excel reader/writer; 'auto' uses the standard library for small files (default: auto)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processes parsing the XML and the Excel sheets concurrently; 1 parses sequentially "
+                             "(default: 1 for small inputs, else one per sheet plus the XML, up to the CPU count)")
+    parser.add_argument('--partitions', type=int, default=1,
+                        help='Hash-partition both sides by canonical user ID and compare the partitions in a '
+                             'process pool (default: 1, a single comparison)')
+    parser.add_argument('--membership', action='store_true',
+                        help='Also report how many users share each pattern of presence across the XML and '
+                             'every sheet (not with --stream)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Load the Excel side first, then compare each XML account while the feed is parsed')
+    parser.add_argument('--quick-look', action='store_true',
+                        help='Only estimate user counts and overlaps per source and role category from '
+                             'HyperLogLog sketches in one pass (no results workbook)')
+    args = parser.parse_args()
+    if args.membership and args.stream:
+        parser.error('--membership needs the whole feed in memory and cannot be combined with --stream')
+
+    print("AWF Role Comparison Tool\n" + "=" * 25)
+
     try:
+        if args.quick_look:
+            from quick_look import print_quick_look, quick_look
+            print_quick_look(quick_look(args.xml, args.excel, EXCEL_SHEETS, roles_only=True, engine=args.engine))
+            return
+
         # Process files
-        print("\n[1/3] Parsing XML file...")
-        xml_users = parse_xml(XML_FILE)
+        # The streaming mode does not hold the feed's IDs, so neither may the profile
+        profile = FeedProfile(KNOWN_ROLES, expected_accounts=count_accounts(args.xml) if args.stream else None)
+        if args.stream:
+            print("\n[1/3] Parsing Excel file...")
+            excel_data = parse_excel(args.excel, args.engine)
+
+            print("[2/3] Streaming XML file...")
+            print("[3/3] Comparing data...")
+            results = compare_streaming(args.xml, excel_data, profile=profile)
+            confirm_duplicate_ids(args.xml, profile)
+        else:
+            print("\n[1/3] Parsing XML file...")
+            print("[2/3] Parsing Excel file...")
+            xml_users, excel_data = parse_inputs(parse_xml, args.xml, parse_excel, args.excel, EXCEL_SHEETS,
+                                                 args.engine, args.workers, profile)
+
+            print("[3/3] Comparing data...")
+            if args.partitions > 1:
+                results = compare_partitioned(xml_users, excel_data, args.partitions)
+            else:
+                results = compare_data(xml_users, excel_data)
+
+            if args.membership:
+                from membership_matrix import presence_patterns
 
-        print("[2/3] Parsing Excel file...")
-        excel_data = parse_excel(EXCEL_FILE)
+                sources = {'XML': xml_users.keys(), **excel_data['sheet_users']}
+                results['presence_patterns'] = presence_patterns(sources, canonical_ids(excel_data['id_map']))
 
-        print("[3/3] Comparing data...")
-        results = compare_data(xml_users, excel_data)
+        finish_results(results, profile, excel_data['original_ids'])
 
         # Display quick summary
         print("\nComparison Results:")
         print(f"- Users only in XML: {len(results['only_in_xml'])}")
         print(f"- Users only in Excel: {len(results['only_in_excel'])}")
+        print(f"- Near-duplicate user ID pairs: {len(results['near_matches'])}")
+        print(f"- Feed profile: {profile.summary()}")
         print(f"- Users with matching roles: {results['matching_users']}")
         print(f"- Users with role mismatches: {len(results['role_mismatches'])}")
         print(f"- Excel users with empty roles: {len(results['empty_role_users'])}")
+        if results.get('presence_patterns'):
+            print("\nMost common presence patterns:")
+            for row in results['presence_patterns'][:5]:
+                print(f"- {row['Users']} users in {row['Present_In']}"
+                      + (f" but not {row['Missing_From']}" if row['Missing_From'] else ""))
 
         # Export results
-        print(f"\nExporting results to {OUTPUT_FILE}...")
-        export_results(results, OUTPUT_FILE)
+        print(f"\nExporting results to {args.output}...")
+        export_results(results, args.output, args.engine)
         print("Done! Results exported successfully.")
     except Exception as e:
         print(f"\nError: {str(e)}")
@@ -0,0 +1,215 @@
+import base64
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from html import escape
+from typing import Any, Dict, List, Optional, Sequence, TextIO
+
+# Inline table rows in the email; everything else is only in the CSV attachment
+DEFAULT_TOP_N = 50
+
+# Upper bound (inclusive) of daysUntilFull per group; None is open-ended
+DAYS_UNTIL_FULL_GROUPS = [
+    (7, 'Full within 7 days'),
+    (30, 'Full in 8-30 days'),
+    (90, 'Full in 31-90 days'),
+    (None, 'Full in more than 90 days')
+]
+
+CSV_HEADER = ['Host ID', 'Host Name', 'Disk ID', 'Disk Name', 'Current Usage (%)', 'Days Until Full',
+              'Predicted Date', 'Certainty', 'Confidence']
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta http-equiv="Content-Type" content="text/html; charset=utf-8">
+<style>
+    table { border-collapse: collapse; width: 100%; }
+    th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+    th { background-color: #f2f2f2; }
+    .group td { background-color: #fafafa; font-weight: bold; }
+    .critical { color: #d9534f; font-weight: bold; }
+</style>
+</head>
+<body>
+<h2>Disk Capacity Forecast Report</h2>
+"""
+
+_TABLE_HEAD = """<table>
+<tr><th>Host ID</th><th>Host Name</th><th>Disk ID</th><th>Disk Name</th><th>Current Usage</th><th>Days Until Full</th><th>Predicted Date</th><th>Confidence</th></tr>
+"""
+
+
+def confidence_indicator(certainty: Optional[float]) -> str:
+    """High/Medium/Low label used by the alert scripts"""
+    if certainty is None:
+        return 'N/A'
+    return 'High' if certainty >= 0.8 else 'Medium' if certainty >= 0.5 else 'Low'
+
+
+def group_label(days_until_full: float) -> str:
+    for limit, label in DAYS_UNTIL_FULL_GROUPS:
+        if limit is None or days_until_full <= limit:
+            return label
+    return DAYS_UNTIL_FULL_GROUPS[-1][1]
+
+
+def sort_violations(violations: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Soonest full first; ties go to the fuller disk"""
+    return sorted(violations, key=lambda v: (v['daysUntilFull'], -(_current_usage(v) or 0.0)))
+
+
+def _current_usage(violation: Dict[str, Any]) -> Optional[float]:
+    # Orchestrator rows carry currentUsage, disk_forecast rows usedPercentage
+    usage = violation.get('currentUsage')
+    return usage if usage is not None else violation.get('usedPercentage')
+
+
+def _row_values(violation: Dict[str, Any]) -> List[str]:
+    usage = _current_usage(violation)
+    certainty = violation.get('certainty')
+    return [
+        violation.get('hostId') or 'N/A',
+        violation.get('hostName') or 'N/A',
+        violation.get('diskId') or 'N/A',
+        violation.get('diskName') or 'N/A',
+        f"{usage:.2f}" if usage is not None else 'N/A',
+        str(violation['daysUntilFull']),
+        (violation.get('predictedDate') or '')[:10],  # ISO date part, no per-row date parsing
+        f"{certainty:.2f}" if certainty is not None else 'N/A',
+        confidence_indicator(certainty)
+    ]
+
+
+def write_csv(sorted_violations: Sequence[Dict[str, Any]], out: TextIO) -> int:
+    """Stream every violation to a CSV writer; returns the number of rows"""
+    writer = csv.writer(out, quoting=csv.QUOTE_MINIMAL, lineterminator='\n')
+    writer.writerow(CSV_HEADER)
+    writer.writerows(_row_values(v) for v in sorted_violations)
+    return len(sorted_violations)
+
+
+def write_html(sorted_violations: Sequence[Dict[str, Any]], out: TextIO, top_n: int = DEFAULT_TOP_N) -> int:
+    """
+    Write the email body: per-group counts and the top_n soonest-full disks grouped by daysUntilFull
+
+    Returns:
+        Number of inline table rows
+    """
+    counts = {label: 0 for _, label in DAYS_UNTIL_FULL_GROUPS}
+    for violation in sorted_violations:
+        counts[group_label(violation['daysUntilFull'])] += 1
+
+    out.write(_HTML_HEAD)
+    out.write(f"<p>{len(sorted_violations)} disks are predicted to reach full capacity:</p>\n<ul>\n")
+    for label, count in counts.items():
+        if count:
+            out.write(f"<li>{escape(label)}: {count}</li>\n")
+    out.write("</ul>\n")
+
+    inline = sorted_violations[:top_n]
+    out.write(_TABLE_HEAD)
+    current_group = None
+    for violation in inline:
+        label = group_label(violation['daysUntilFull'])
+        if label != current_group:
+            current_group = label
+            out.write(f'<tr class="group"><td colspan="8">{escape(label)} ({counts[label]})</td></tr>\n')
+        values = _row_values(violation)
+        usage = _current_usage(violation)
+        usage_class = ' class="critical"' if usage is not None and usage > 90 else ''
+        out.write(
+            f"<tr><td>{escape(values[0])}</td><td>{escape(values[1])}</td><td>{escape(values[2])}</td>"
+            f"<td>{escape(values[3])}</td><td{usage_class}>{values[4]}%</td><td>{values[5]}</td>"
+            f"<td>{values[6]}</td><td>{values[8]}</td></tr>\n")
+    out.write("</table>\n")
+
+    if len(sorted_violations) > len(inline):
+        out.write(f"<p>Showing the {len(inline)} disks that fill up first. "
+                  f"See the attached CSV for all {len(sorted_violations)} disks.</p>\n")
+    else:
+        out.write("<p>See the attached CSV for the complete dataset.</p>\n")
+    out.write("<p><i>This is an automated message from Dynatrace Disk Capacity Monitoring.</i></p>\n</body>\n</html>\n")
+    return len(inline)
+
+
+def render_alert_report(
+        violations: Sequence[Dict[str, Any]],
+        html_path: str,
+        csv_path: str,
+        top_n: int = DEFAULT_TOP_N
+) -> Dict[str, Any]:
+    """
+    Write the HTML body and CSV attachment of the disk alert email to files
+
+    Returns:
+        {'subject', 'totalViolations', 'inlineRows', 'htmlPath', 'csvPath'}
+    """
+    ordered = sort_violations(violations)
+    with open(html_path, 'w', encoding='utf-8', buffering=1 << 20) as html_out:
+        inline = write_html(ordered, html_out, top_n)
+    with open(csv_path, 'w', encoding='utf-8', newline='', buffering=1 << 20) as csv_out:
+        write_csv(ordered, csv_out)
+    return {
+        'subject': f"Disk Capacity Alert: {len(ordered)} disks predicted to reach full capacity",
+        'totalViolations': len(ordered),
+        'inlineRows': inline,
+        'htmlPath': html_path,
+        'csvPath': csv_path
+    }
+
+
+def build_email(violations: Sequence[Dict[str, Any]], top_n: int = DEFAULT_TOP_N) -> Dict[str, Any]:
+    """
+    Build the notification payload in memory, shaped like emailFormat.js
+
+    Returns:
+        {'shouldSendEmail', 'subject', 'body', 'csvBase64', 'csvFilename', 'csvRecordCount'}
+    """
+    if not violations:
+        return {'shouldSendEmail': False, 'message': 'No violations found - skipping email'}
+
+    ordered = sort_violations(violations)
+    html_out, csv_out = io.StringIO(), io.StringIO()
+    write_html(ordered, html_out, top_n)
+    write_csv(ordered, csv_out)
+    return {
+        'shouldSendEmail': True,
+        'subject': f"Disk Alert: {len(ordered)} disks reaching capacity soon",
+        'body': html_out.getvalue(),
+        'csvBase64': base64.b64encode(csv_out.getvalue().encode('utf-8')).decode('ascii'),
+        'csvFilename': f"disk_forecast_{datetime.now().strftime('%Y-%m-%d')}.csv",
+        'csvRecordCount': len(ordered)
+    }
+
+
+def main():
+    # Synthetic benchmark: 100k violations
+    count = 100000
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    violations = []
+    for i in range(count):
+        days = rng.randint(1, 365)
+        violations.append({
+            'hostId': f"HOST-{i // 4:016X}",
+            'hostName': f"host-{i // 4:05d}",
+            'diskId': f"DISK-{i:016X}",
+            'diskName': rng.choice(['C:\\', 'D:\\', '/', '/var', '/data']),
+            'currentUsage': rng.uniform(50, 99.9),
+            'daysUntilFull': days,
+            'predictedDate': (now + timedelta(days=days)).isoformat(),
+            'certainty': round(rng.uniform(0.3, 1.0), 2)
+        })
+
+    start = time.perf_counter()
+    summary = render_alert_report(violations, 'disk_capacity_forecast.html', 'disk_capacity_forecast.csv')
+    print(f"Rendered {summary['totalViolations']} violations ({summary['inlineRows']} inline) "
+          f"in {time.perf_counter() - start:.3f}s")
+    print(f"- {summary['htmlPath']}\n- {summary['csvPath']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from DiamondUserRoleComaprison import SCHEDULING_ROLE_MAP, ONREQUEST_ROLE_MAP, ADDITIONAL_ROLE_MAPS
+from excel_io import write_workbook
+
+ENTRY_POINTS = [
+    'AWF_Users_Comparator.py',
+    'DiamoundFeedVerification.py',
+    'DiamondUserRoleComaprison.py',
+    'compareFeedFiles.py'
+]
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The comparators read the sheets with usecols="C:K", so every sheet spans nine columns
+_FILLER_COLUMNS = ['FIRSTNAME', 'LASTNAME', 'EMAIL', 'DEPT', 'STATUS', 'CREATED', 'UPDATED', 'NOTE', 'MISC']
+
+
+def _sheet(columns):
+    rows = len(next(iter(columns.values())))
+    for filler in _FILLER_COLUMNS[:max(0, 9 - len(columns))]:
+        columns[filler] = ['x'] * rows
+    return columns
+
+
+def write_fixture(directory, users, seed=42):
+    """Write an AWF_01_accounts.xml and AWF_List.xlsx pair with the given number of users"""
+    rng = random.Random(seed)
+    feed_roles = list(SCHEDULING_ROLE_MAP) + list(ONREQUEST_ROLE_MAP) + list(ADDITIONAL_ROLE_MAPS)
+    user_ids = [f"U{i:06d}" for i in range(users)]
+    acf2ids = {user_id: f"A{i:06d}" for i, user_id in enumerate(user_ids) if i % 10 == 0}
+
+    with open(os.path.join(directory, 'AWF_01_accounts.xml'), 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0"?>\n<accounts>\n')
+        for user_id in user_ids:
+            roles = ''.join(f'<attributeValueRef id="Role={role}"/>' for role in rng.sample(feed_roles, rng.randint(0, 3)))
+            f.write(f'<account id="{user_id}"><attributes>{roles}</attributes></account>\n')
+        f.write('</accounts>\n')
+
+    def sample(fraction):
+        return [acf2ids.get(user_id, user_id) for user_id in user_ids if rng.random() < fraction]
+
+    scheduling, onrequest, aspnet, profiles, awf_users, employees = (
+        sample(0.4), sample(0.3), sample(0.2), sample(0.3), sample(0.3), sample(0.5))
+    sheets = {
+        'AWF_ACF2IDNOVELL': _sheet({'ACF2ID': list(acf2ids.values()), 'NOVELLID': list(acf2ids)}),
+        'Scheduling': _sheet({'User_ID': scheduling,
+                              'ROLENAME': [rng.choice(list(SCHEDULING_ROLE_MAP.values()) + [None]) for _ in scheduling]}),
+        'OnRequest': _sheet({'User_ID': onrequest,
+                             'ROLENAME': [rng.choice(list(ONREQUEST_ROLE_MAP.values()) + ['NULL']) for _ in onrequest]}),
+        'ASPNET_Users': _sheet({'User_ID': aspnet, 'ROLENAME': ['Web'] * len(aspnet)}),
+        'AWF_USERACCESSPROFILE': _sheet({'User_ID': profiles}),
+        'AWF_USERS': _sheet({'User_ID': awf_users, 'ROLENAME': [rng.choice(['Admin', 'NULL']) for _ in awf_users]}),
+        'AWFEMPLOYEE': _sheet({
+            'User_ID': employees,
+            'SCHEDULING': [rng.choice(['Administrator', 'Other', None]) for _ in employees],
+            'NOTIFY': [rng.choice(['User', None]) for _ in employees],
+            'REPRINT': [None] * len(employees),
+            'DOCUPDATE': [rng.choice(['Administrator', None]) for _ in employees],
+            'RESTORE': [None] * len(employees)
+        })
+    }
+    write_workbook(os.path.join(directory, 'AWF_List.xlsx'), sheets, engine='stdlib', start_row=5, start_col=2)
+
+
+def time_command(args, cwd, repeats):
+    """Median wall time in seconds of a fresh interpreter running args"""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=cwd, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start time of the comparator entry points')
+    parser.add_argument('--users', type=int, default=500, help='Users in the synthetic feed')
+    parser.add_argument('--repeats', type=int, default=5, help='Runs per measurement (median is reported)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_fixture(directory, args.users)
+        size_kb = os.path.getsize(os.path.join(directory, 'AWF_List.xlsx')) / 1024
+        print(f"Fixture: {args.users} users, AWF_List.xlsx {size_kb:.0f} KB, median of {args.repeats} runs\n")
+
+        interpreter = time_command(['-c', 'pass'], directory, args.repeats)
+        pandas_import = time_command(['-c', 'import pandas'], directory, args.repeats)
+        print(f"{'Interpreter only':<30} {interpreter * 1000:>7.0f} ms")
+        print(f"{'import pandas':<30} {pandas_import * 1000:>7.0f} ms\n")
+
+        print(f"{'Entry point':<30} {'--help':>10} {'stdlib run':>12} {'pandas run':>12} {'saved':>8}")
+        for script in ENTRY_POINTS:
+            path = os.path.join(SCRIPT_DIR, script)
+            help_time = time_command([path, '--help'], directory, args.repeats)
+            stdlib_time = time_command([path, '--engine', 'stdlib', '--output', 'out.xlsx'], directory, args.repeats)
+            pandas_time = time_command([path, '--engine', 'pandas', '--output', 'out.xlsx'], directory, args.repeats)
+            print(f"{script:<30} {help_time * 1000:>7.0f} ms {stdlib_time * 1000:>9.0f} ms "
+                  f"{pandas_time * 1000:>9.0f} ms {(1 - stdlib_time / pandas_time) * 100:>7.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from dql_client import DQLClient, build_query
+from dql_planner import demultiplex_series, fetch_disk_series, plan_disk_queries
+from mock_dynatrace_server import MockDynatraceServer, generate_disk_inventory
+
+API_TOKEN = 'bench-token'
+
+
+def run_per_disk(client, disk_ids, days, workers):
+    """One timeseries query per disk, as the per-disk scripts do; returns (series, queries)"""
+    def run(disk_id):
+        query = build_query('disk_used_percent_daily', days=days, disk_ids=[disk_id])
+        return demultiplex_series(client.iter_records(query, max_result_records=1))
+
+    series = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for disk_series in executor.map(run, disk_ids):
+            series.update(disk_series)
+    return series, len(disk_ids)
+
+
+def run_packed(client, disk_ids, days, workers, max_query_length, max_series):
+    """Packed queries from the planner; returns (series, queries)"""
+    limits = {'max_query_length': max_query_length, 'max_series_per_query': max_series}
+    queries = len(plan_disk_queries(disk_ids, days=days, **limits))
+    return fetch_disk_series(client, disk_ids, days=days, max_workers=workers, **limits), queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-disk vs packed disk time-series retrieval against the mock server')
+    parser.add_argument('--disks', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--workers', type=int, default=8, help='Queries in flight at once')
+    parser.add_argument('--latency', type=float, default=0.005, help='Mock server latency per request, seconds')
+    parser.add_argument('--query-duration', type=float, default=0.05, help='Seconds each query runs on the mock')
+    parser.add_argument('--max-query-length', type=int, default=16000)
+    parser.add_argument('--max-series', type=int, default=1000, help='Series per packed query')
+    parser.add_argument('--modes', default='per-disk,packed')
+    args = parser.parse_args()
+
+    with MockDynatraceServer(
+            api_token=API_TOKEN,
+            latency=args.latency,
+            disks=generate_disk_inventory(disk_count=args.disks),
+            query_duration=args.query_duration,
+            max_query_length=args.max_query_length
+    ) as server:
+        disk_ids = [disk['id'] for disk in server.state.disks]
+        client = DQLClient(server.url, API_TOKEN, poll_timeout_ms=1000, pool_size=args.workers, verbose=False)
+        print(f"Mock server: {server.url}, {len(disk_ids)} disks x {args.days} days, "
+              f"query duration {args.query_duration * 1000:.0f} ms, {args.workers} workers")
+        print(f"{'mode':<9} {'elapsed':>9} {'queries':>8} {'disks/sec':>11} {'series':>7}")
+
+        results = {}
+        for mode in args.modes.split(','):
+            start = time.perf_counter()
+            try:
+                if mode == 'per-disk':
+                    series, queries = run_per_disk(client, disk_ids, args.days, args.workers)
+                elif mode == 'packed':
+                    series, queries = run_packed(client, disk_ids, args.days, args.workers,
+                                                 args.max_query_length, args.max_series)
+                else:
+                    print(f"Unknown mode '{mode}', skipping")
+                    continue
+            except Exception as e:
+                print(f"{mode:<9} failed after {time.perf_counter() - start:.3f}s: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            results[mode] = series
+            print(f"{mode:<9} {elapsed:>8.3f}s {queries:>8} {len(series) / elapsed:>11.1f} {len(series):>7}")
+
+        if len(results) == 2:
+            a, b = results.values()
+            same = a.keys() == b.keys() and all(np.array_equal(a[k], b[k], equal_nan=True) for k in a)
+            print(f"\nSeries identical across modes: {same}")
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import os
+import tempfile
+import time
+
+import AWF_Users_Comparator
+import DiamoundFeedVerification
+import DiamondUserRoleComaprison
+import compareFeedFiles
+from bench_comparator_startup import write_fixture
+from excel_io import read_sheet
+from parse_pipeline import parse_inputs
+
+COMPARATORS = [AWF_Users_Comparator, DiamoundFeedVerification, DiamondUserRoleComaprison, compareFeedFiles]
+
+
+def timed(func, *args):
+    """Wall time in seconds of one call"""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sequential vs concurrent XML/Excel parsing of the comparators')
+    parser.add_argument('--users', type=int, default=50000, help='Users in the synthetic feed')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processes for the concurrent run')
+    parser.add_argument('--engine', default='stdlib', help="Excel engine (default: stdlib)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_fixture(directory, args.users)
+        xml_file = os.path.join(directory, 'AWF_01_accounts.xml')
+        excel_file = os.path.join(directory, 'AWF_List.xlsx')
+        print(f"Fixture: {args.users} users, {os.cpu_count()} CPUs, {args.workers} workers\n")
+
+        print(f"{'Comparator':<28} {'XML':>8} {'max sheet':>10} {'sequential':>11} {'concurrent':>11} {'speedup':>8}")
+        for module in COMPARATORS:
+            xml_time = timed(module.parse_xml, xml_file)
+            sheet_time = max(timed(read_sheet, excel_file, *sheet, args.engine) for sheet in module.EXCEL_SHEETS)
+            sequential = timed(parse_inputs, module.parse_xml, xml_file, module.parse_excel, excel_file,
+                               module.EXCEL_SHEETS, args.engine, 1)
+            concurrent = timed(parse_inputs, module.parse_xml, xml_file, module.parse_excel, excel_file,
+                               module.EXCEL_SHEETS, args.engine, args.workers)
+            print(f"{module.__name__:<28} {xml_time:>7.2f}s {sheet_time:>9.2f}s {sequential:>10.2f}s "
+                  f"{concurrent:>10.2f}s {sequential / concurrent:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
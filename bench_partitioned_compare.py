@@ -0,0 +1,62 @@
+import argparse
+import os
+import tempfile
+import time
+
+import AWF_Users_Comparator
+import DiamoundFeedVerification
+import DiamondUserRoleComaprison
+import compareFeedFiles
+from bench_comparator_startup import write_fixture
+
+
+def timed(func, *args):
+    """(wall time in seconds, result) of one call"""
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Single-loop vs hash-partitioned comparison per core count')
+    parser.add_argument('--users', type=int, default=50000, help='Users in the synthetic feed')
+    parser.add_argument('--cores', type=int, nargs='+', default=None,
+                        help='Worker counts to measure (default: 1, 2, 4, ... up to the CPU count)')
+    parser.add_argument('--partitions', type=int, default=None,
+                        help='Partitions per run (default: the worker count, at least 2)')
+    args = parser.parse_args()
+
+    cores = args.cores
+    if cores is None:
+        cores = [1]
+        while cores[-1] * 2 <= (os.cpu_count() or 1):
+            cores.append(cores[-1] * 2)
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_fixture(directory, args.users)
+        xml_file = os.path.join(directory, 'AWF_01_accounts.xml')
+        excel_file = os.path.join(directory, 'AWF_List.xlsx')
+        print(f"Fixture: {args.users} users, {os.cpu_count()} CPUs\n")
+
+        for module in [AWF_Users_Comparator, DiamoundFeedVerification, DiamondUserRoleComaprison, compareFeedFiles]:
+            xml_users = module.parse_xml(xml_file)
+            excel_data = module.parse_excel(excel_file, 'stdlib')
+            if module is compareFeedFiles:
+                sched_users, onreq_users, _, _, sched_all_users, onreq_all_users, _ = excel_data
+                inputs = (xml_users, sched_users, onreq_users, sched_all_users, onreq_all_users)
+            else:
+                inputs = (xml_users, excel_data)
+            compare = module.compare_users if module is AWF_Users_Comparator else module.compare_data
+
+            baseline, _ = timed(compare, *inputs)
+            print(f"{module.__name__}: single loop {baseline:.3f}s")
+            for workers in cores:
+                partitions = args.partitions or max(2, workers)
+                elapsed, _ = timed(module.compare_partitioned, *inputs, partitions, workers)
+                print(f"  {workers:>3} cores, {partitions:>3} partitions: {elapsed:.3f}s  "
+                      f"speedup {baseline / elapsed:.2f}x")
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import argparse
+import asyncio
+import time
+
+from D_daskboard import DynatraceSettingsAPI, AsyncDynatraceSettingsAPI
+from mock_dynatrace_server import MockDynatraceServer, generate_settings_objects, DEFAULT_SCHEMAS
+
+API_TOKEN = 'bench-token'
+FIELDS = ['objectId', 'schemaId', 'scope', 'externalId', 'value']
+
+
+def run_sync(url, schema_ids, use_session):
+    """Page through every schema one after another; returns (objects, pages)"""
+    api = DynatraceSettingsAPI(url, API_TOKEN, use_session=use_session, verbose=False)
+    objects = 0
+    pages = 0
+    try:
+        for schema_id in schema_ids:
+            next_page_key = None
+            while True:
+                response = api.get_settings_objects(
+                    schema_ids=[schema_id], fields=FIELDS, next_page_key=next_page_key)
+                objects += len(response.get('items', []))
+                pages += 1
+                next_page_key = response.get('nextPageKey')
+                if not next_page_key:
+                    break
+    finally:
+        api.close()
+    return objects, pages
+
+
+def run_async(url, schema_ids, max_connections):
+    """Page through all schemas concurrently; returns (objects, pages)"""
+    counters = {'objects': 0, 'pages': 0}
+
+    async def fetch_schema(api, schema_id):
+        next_page_key = None
+        while True:
+            response = await api.get_settings_objects(
+                schema_ids=[schema_id], fields=FIELDS, next_page_key=next_page_key)
+            counters['objects'] += len(response.get('items', []))
+            counters['pages'] += 1
+            next_page_key = response.get('nextPageKey')
+            if not next_page_key:
+                return
+
+    async def fetch_all():
+        async with AsyncDynatraceSettingsAPI(url, API_TOKEN, max_connections=max_connections) as api:
+            await asyncio.gather(*(fetch_schema(api, schema_id) for schema_id in schema_ids))
+
+    asyncio.run(fetch_all())
+    return counters['objects'], counters['pages']
+
+
+def report(mode, elapsed, objects, pages):
+    print(f"{mode:<8} {elapsed:>8.3f}s {pages / elapsed:>12.1f} {objects / elapsed:>14.1f} {pages:>7} {objects:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark DynatraceSettingsAPI client modes against the mock server')
+    parser.add_argument('--schemas', type=int, default=len(DEFAULT_SCHEMAS), help='Number of schemas to page through')
+    parser.add_argument('--objects-per-schema', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=0.005, help='Mock server latency per request, seconds')
+    parser.add_argument('--rate-limit', type=float, default=None, help='Mock server requests/second before 429')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Mock server HTTP 500 probability')
+    parser.add_argument('--connections', type=int, default=10, help='Connection limit for the async client')
+    parser.add_argument('--modes', default='sync,pooled,async')
+    args = parser.parse_args()
+
+    schema_ids = [f"builtin:bench.schema-{i}" for i in range(args.schemas)]
+    objects = generate_settings_objects(schema_ids=schema_ids, objects_per_schema=args.objects_per_schema)
+
+    with MockDynatraceServer(
+            objects=objects,
+            latency=args.latency,
+            rate_limit=args.rate_limit,
+            error_rate=args.error_rate,
+            api_token=API_TOKEN
+    ) as server:
+        print(f"Mock server: {server.url}, {len(objects)} objects in {len(schema_ids)} schemas, "
+              f"latency {args.latency * 1000:.1f} ms")
+        print(f"{'mode':<8} {'elapsed':>9} {'pages/sec':>12} {'objects/sec':>14} {'pages':>7} {'objects':>9}")
+
+        for mode in args.modes.split(','):
+            start = time.perf_counter()
+            try:
+                if mode == 'sync':
+                    fetched, pages = run_sync(server.url, schema_ids, use_session=False)
+                elif mode == 'pooled':
+                    fetched, pages = run_sync(server.url, schema_ids, use_session=True)
+                elif mode == 'async':
+                    fetched, pages = run_async(server.url, schema_ids, args.connections)
+                else:
+                    print(f"Unknown mode '{mode}', skipping")
+                    continue
+            except Exception as e:
+                print(f"{mode:<8} failed after {time.perf_counter() - start:.3f}s: {e}")
+                continue
+            report(mode, time.perf_counter() - start, fetched, pages)
+
+        stats = server.state.stats
+        print(f"\nServer stats: {stats['requests']} requests, {stats['throttled']} throttled, "
+              f"{stats['errors']} injected errors")
+
+
+if __name__ == "__main__":
+    main()
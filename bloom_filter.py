@@ -0,0 +1,69 @@
+import hashlib
+import math
+
+import numpy as np
+
+
+class BloomFilter:
+    """
+    Bloom filter over strings, filled and probed a batch at a time with NumPy
+
+    Each key is hashed once (BLAKE2b, 128 bits); its num_hashes bit positions are derived from the
+    two 64-bit halves by double hashing.
+    """
+
+    def __init__(self, capacity, fp_rate=0.01):
+        """
+        Args:
+            capacity: Keys expected; the false-positive rate holds up to this many
+            fp_rate: Target false-positive rate (0 < fp_rate < 1)
+        """
+        if not 0 < fp_rate < 1:
+            raise ValueError(f"fp_rate must be between 0 and 1, got {fp_rate}")
+        capacity = max(1, capacity)
+        self.num_bits = max(64, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, keys):
+        digests = b''.join(hashlib.blake2b(str(key).encode('utf-8'), digest_size=16).digest() for key in keys)
+        halves = np.frombuffer(digests, dtype=np.uint64).reshape(-1, 2)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        # h1 + i * h2 (mod 2^64, then mod num_bits), one row of positions per key
+        return (halves[:, :1] + steps * (halves[:, 1:] | np.uint64(1))) % np.uint64(self.num_bits), halves[:, 0]
+
+    def _test(self, positions):
+        return np.all((self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1,
+                      axis=1)
+
+    def add(self, keys):
+        """
+        Add a batch of keys
+
+        Returns:
+            Boolean array, True where the key may already have been added (earlier or in this batch)
+        """
+        if not keys:
+            return np.zeros(0, dtype=bool)
+        positions, first_halves = self._positions(keys)
+        present = self._test(positions)
+        # Repeats within the batch are not in the filter yet
+        _, first = np.unique(first_halves, return_index=True)
+        repeated = np.ones(len(keys), dtype=bool)
+        repeated[first] = False
+        np.bitwise_or.at(self.bits, (positions >> np.uint64(3)).ravel(),
+                         (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)).ravel())
+        self.count += len(keys)
+        return present | repeated
+
+    def contains(self, keys):
+        """Boolean array, True where the key may be in the filter (False is certain)"""
+        if not keys:
+            return np.zeros(0, dtype=bool)
+        positions, _ = self._positions(keys)
+        return self._test(positions)
+
+    @property
+    def size_bytes(self):
+        return self.bits.nbytes
@@ -1,9 +1,22 @@
 import xml.etree.ElementTree as ET
-import pandas as pd
+import argparse
 from collections import defaultdict
 import sys
 from datetime import datetime
 
+from excel_io import ENGINES, read_sheet, write_workbook
+from feed_profile import FeedProfile
+from id_keys import OriginalIds, finish_results, normalize_id
+from parse_pipeline import parse_inputs
+from partition_compare import merge_sorted, run_partitions, split_ids, split_mapping
+from stream_compare import confirm_duplicate_ids, count_accounts, run_pipeline
+
+# (sheet, header row, columns) read by parse_excel, prefetched in parallel by parse_inputs
+EXCEL_SHEETS = [
+    ('Scheduling', 5, 'C:K'),
+    ('OnRequest', 5, 'C:K')
+]
+
 # Role mappings
 SCHEDULING_ROLE_MAP = {
     'SCHEDULING_APS-eBSS': 'APS-eBSS',
@@ -26,27 +39,45 @@ ONREQUEST_ROLE_MAP = {
     'AWF REQUEST FOR SERVICES_AWF User': 'AWF User'
 }
 
+# Raw feed role names the maps cover; the feed profile reports any others
+KNOWN_ROLES = [*SCHEDULING_ROLE_MAP, *ONREQUEST_ROLE_MAP]
+
+
+def account_roles(account):
+    """Roles of one <account> element with mappings applied."""
+    roles = set()
+    for role in account.findall('.//attributeValueRef'):
+        role_id = role.get('id')
+        if role_id.startswith('Role='):
+            role_name = role_id[5:]  # Remove 'Role=' prefix
+            # Apply mappings if available
+            if role_name in SCHEDULING_ROLE_MAP:
+                roles.add(SCHEDULING_ROLE_MAP[role_name])
+            elif role_name in ONREQUEST_ROLE_MAP:
+                roles.add(ONREQUEST_ROLE_MAP[role_name])
+            else:
+                roles.add(role_name)
+    return roles
+
 
-def parse_xml(xml_file):
-    """Parse XML file and extract user roles with mappings applied."""
+def parse_xml(xml_file, profile=None):
+    """Parse XML file and extract user roles with mappings applied; profile (a FeedProfile) observes each account."""
     try:
         tree = ET.parse(xml_file)
         root = tree.getroot()
         xml_users = defaultdict(set)
 
         for account in root.findall('.//account'):
-            user_id = account.get('id')
-            for role in account.findall('.//attributeValueRef'):
-                role_id = role.get('id')
-                if role_id.startswith('Role='):
-                    role_name = role_id[5:]  # Remove 'Role=' prefix
-                    # Apply mappings if available
-                    if role_name in SCHEDULING_ROLE_MAP:
-                        xml_users[user_id].add(SCHEDULING_ROLE_MAP[role_name])
-                    elif role_name in ONREQUEST_ROLE_MAP:
-                        xml_users[user_id].add(ONREQUEST_ROLE_MAP[role_name])
-                    else:
-                        xml_users[user_id].add(role_name)
+            if profile is not None:
+                profile.observe(account)
+            user_id = normalize_id(account.get('id'))
+            if not user_id:  # Accounts without an id match nobody
+                continue
+            roles = account_roles(account)
+            if user_id in xml_users:
+                xml_users[user_id] |= roles
+            elif roles:
+                xml_users[user_id] = roles
         return xml_users
 
     except ET.ParseError as e:
@@ -55,40 +86,52 @@ def parse_xml(xml_file):
         sys.exit(f"Unexpected error reading XML: {e}")
 
 
-def parse_excel(excel_file):
+def rows_by_user(rows, original_ids):
+    """(normalized User_ID, row) for each sheet row that has a user ID; original_ids collects their spellings"""
+    for row in rows:
+        user_id = normalize_id(row['User_ID'], original_ids)
+        if user_id:
+            yield user_id, row
+
+
+def parse_excel(excel_file, engine='auto', sheets=None):
     """Parse Excel file with headers starting at C6."""
     try:
+        original_ids = {}  # normalized id -> id as the workbook wrote it, where they differ
+
         # Read scheduling sheet - skip first 5 rows and use row 6 as header
-        sched_df = pd.read_excel(excel_file, sheet_name='Scheduling', header=5, usecols="C:K")
+        sched_columns, sched_rows = read_sheet(excel_file, 'Scheduling', header=5, usecols="C:K",
+                                               engine=engine, prefetched=sheets)
 
         # Check if required columns exist
-        if 'User_ID' not in sched_df.columns or 'ROLENAME' not in sched_df.columns:
-            missing = [col for col in ['User_ID', 'ROLENAME'] if col not in sched_df.columns]
+        if 'User_ID' not in sched_columns or 'ROLENAME' not in sched_columns:
+            missing = [col for col in ['User_ID', 'ROLENAME'] if col not in sched_columns]
             sys.exit(f"Error: Required columns missing in Scheduling sheet: {', '.join(missing)}")
 
+        sched_rows = list(rows_by_user(sched_rows, original_ids))
         # Get all users (including those with empty roles)
-        sched_all_users = set(sched_df['User_ID'])
+        sched_all_users = {user_id for user_id, _ in sched_rows}
         # Users with valid roles
-        sched_valid = sched_df[sched_df['ROLENAME'].notna()]
-        sched_users = {row['User_ID']: row['ROLENAME'] for _, row in sched_valid.iterrows()}
-        sched_empty = sched_df[sched_df['ROLENAME'].isna()]['User_ID'].tolist()
+        sched_users = {user_id: row['ROLENAME'] for user_id, row in sched_rows if row['ROLENAME'] is not None}
+        sched_empty = [user_id for user_id, row in sched_rows if row['ROLENAME'] is None]
 
         # Read onrequest sheet - skip first 5 rows and use row 6 as header
-        onreq_df = pd.read_excel(excel_file, sheet_name='OnRequest', header=5, usecols="C:K")
+        onreq_columns, onreq_rows = read_sheet(excel_file, 'OnRequest', header=5, usecols="C:K",
+                                               engine=engine, prefetched=sheets)
 
         # Check if required columns exist
-        if 'User_ID' not in onreq_df.columns or 'ROLENAME' not in onreq_df.columns:
-            missing = [col for col in ['User_ID', 'ROLENAME'] if col not in onreq_df.columns]
+        if 'User_ID' not in onreq_columns or 'ROLENAME' not in onreq_columns:
+            missing = [col for col in ['User_ID', 'ROLENAME'] if col not in onreq_columns]
             sys.exit(f"Error: Required columns missing in OnRequest sheet: {', '.join(missing)}")
 
+        onreq_rows = list(rows_by_user(onreq_rows, original_ids))
         # Get all users (including those with empty roles)
-        onreq_all_users = set(onreq_df['User_ID'])
+        onreq_all_users = {user_id for user_id, _ in onreq_rows}
         # Users with valid roles
-        onreq_valid = onreq_df[onreq_df['ROLENAME'].notna()]
-        onreq_users = {row['User_ID']: row['ROLENAME'] for _, row in onreq_valid.iterrows()}
-        onreq_empty = onreq_df[onreq_df['ROLENAME'].isna()]['User_ID'].tolist()
+        onreq_users = {user_id: row['ROLENAME'] for user_id, row in onreq_rows if row['ROLENAME'] is not None}
+        onreq_empty = [user_id for user_id, row in onreq_rows if row['ROLENAME'] is None]
 
-        return sched_users, onreq_users, sched_empty, onreq_empty, sched_all_users, onreq_all_users
+        return sched_users, onreq_users, sched_empty, onreq_empty, sched_all_users, onreq_all_users, original_ids
 
     except ImportError:
         sys.exit("Error: Missing required package 'openpyxl'. Please install with:\npip install openpyxl")
@@ -98,6 +141,44 @@ def parse_excel(excel_file):
         sys.exit(f"Error reading Excel file: {str(e)}")
 
 
+def role_mismatch(user, xml_roles, sched_users, onreq_users):
+    """Role Mismatches row for a user whose Scheduling or OnRequest role disagrees with the XML, else None."""
+    excel_sched_role = sched_users.get(user, None)
+    excel_onreq_role = onreq_users.get(user, None)
+
+    # Check scheduling roles
+    has_sched_in_xml = any(role in SCHEDULING_ROLE_MAP.values() for role in xml_roles)
+    has_sched_in_excel = excel_sched_role is not None
+
+    # Check onrequest roles
+    has_onreq_in_xml = any(role in ONREQUEST_ROLE_MAP.values() for role in xml_roles)
+    has_onreq_in_excel = excel_onreq_role is not None
+
+    # Role validation
+    sched_role_match = (not has_sched_in_xml and not has_sched_in_excel) or \
+                       (has_sched_in_xml and has_sched_in_excel and
+                        excel_sched_role in [r for r in xml_roles if r in SCHEDULING_ROLE_MAP.values()])
+
+    onreq_role_match = (not has_onreq_in_xml and not has_onreq_in_excel) or \
+                       (has_onreq_in_xml and has_onreq_in_excel and
+                        excel_onreq_role in [r for r in xml_roles if r in ONREQUEST_ROLE_MAP.values()])
+
+    if sched_role_match and onreq_role_match:
+        return None
+    xml_sched_roles = ', '.join(r for r in xml_roles if r in SCHEDULING_ROLE_MAP.values())
+    xml_onreq_roles = ', '.join(r for r in xml_roles if r in ONREQUEST_ROLE_MAP.values())
+
+    return {
+        'User_ID': user,
+        'XML_Scheduling_Roles': xml_sched_roles if xml_sched_roles else '',
+        'Excel_Scheduling_Role': excel_sched_role if excel_sched_role else '',
+        'Scheduling_Mismatch': '✗' if not sched_role_match else '',
+        'XML_OnRequest_Roles': xml_onreq_roles if xml_onreq_roles else '',
+        'Excel_OnRequest_Role': excel_onreq_role if excel_onreq_role else '',
+        'OnRequest_Mismatch': '✗' if not onreq_role_match else ''
+    }
+
+
 def compare_data(xml_users, sched_users, onreq_users, sched_all_users, onreq_all_users):
     """Compare XML and Excel data, identifying discrepancies with role validation."""
     xml_user_ids = set(xml_users.keys())
@@ -113,161 +194,241 @@ def compare_data(xml_users, sched_users, onreq_users, sched_all_users, onreq_all
     common_users = xml_user_ids.intersection(excel_user_ids_with_roles)
 
     for user in common_users:
-        # Get roles from both sources
-        xml_roles = xml_users.get(user, set())
-        excel_sched_role = sched_users.get(user, None)
-        excel_onreq_role = onreq_users.get(user, None)
-
-        # Check scheduling roles
-        has_sched_in_xml = any(role in SCHEDULING_ROLE_MAP.values() for role in xml_roles)
-        has_sched_in_excel = excel_sched_role is not None
-
-        # Check onrequest roles
-        has_onreq_in_xml = any(role in ONREQUEST_ROLE_MAP.values() for role in xml_roles)
-        has_onreq_in_excel = excel_onreq_role is not None
-
-        # Role validation
-        sched_role_match = (not has_sched_in_xml and not has_sched_in_excel) or \
-                           (has_sched_in_xml and has_sched_in_excel and
-                            excel_sched_role in [r for r in xml_roles if r in SCHEDULING_ROLE_MAP.values()])
-
-        onreq_role_match = (not has_onreq_in_xml and not has_onreq_in_excel) or \
-                           (has_onreq_in_xml and has_onreq_in_excel and
-                            excel_onreq_role in [r for r in xml_roles if r in ONREQUEST_ROLE_MAP.values()])
-
-        # Record mismatches
-        if not sched_role_match or not onreq_role_match:
-            xml_sched_roles = ', '.join(r for r in xml_roles if r in SCHEDULING_ROLE_MAP.values())
-            xml_onreq_roles = ', '.join(r for r in xml_roles if r in ONREQUEST_ROLE_MAP.values())
-
-            mismatches.append({
-                'User_ID': user,
-                'XML_Scheduling_Roles': xml_sched_roles if xml_sched_roles else '',
-                'Excel_Scheduling_Role': excel_sched_role if excel_sched_role else '',
-                'Scheduling_Mismatch': '✗' if not sched_role_match else '',
-                'XML_OnRequest_Roles': xml_onreq_roles if xml_onreq_roles else '',
-                'Excel_OnRequest_Role': excel_onreq_role if excel_onreq_role else '',
-                'OnRequest_Mismatch': '✗' if not onreq_role_match else ''
-            })
+        mismatch = role_mismatch(user, xml_users.get(user, set()), sched_users, onreq_users)
+        if mismatch:
+            mismatches.append(mismatch)
 
     return {
         'only_in_xml': sorted(only_in_xml),
         'only_in_excel': sorted(only_in_excel),
-        'role_mismatches': pd.DataFrame(mismatches),
+        'role_mismatches': mismatches,
         'matching_users': len(common_users) - len(mismatches),
         'excel_users_with_empty_roles': sorted(
             (sched_all_users - set(sched_users.keys()) | (onreq_all_users - set(onreq_users.keys()))))
     }
 
 
-def export_results(results, sched_empty, onreq_empty, output_file):
-    """Export comparison results to Excel file with additional sheets for empty roles."""
-    try:
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            # Summary Sheet
-            summary_data = {
-                'Metric': [
-                    'Comparison Date',
-                    'Total XML Users',
-                    'Total Excel Users',
-                    'Users only in XML',
-                    'Users only in Excel',
-                    'Users with matching roles',
-                    'Users with role mismatches',
-                    'Scheduling mismatches',
-                    'OnRequest mismatches',
-                    'Users with empty Scheduling ROLENAME',
-                    'Users with empty OnRequest ROLENAME',
-                    'Excel users with empty roles (all)'
-                ],
-                'Value': [
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    len(results['only_in_xml']) + len(results['role_mismatches']) + results['matching_users'],
-                    len(results['only_in_excel']) + len(results['role_mismatches']) + results['matching_users'],
-                    len(results['only_in_xml']),
-                    len(results['only_in_excel']),
-                    results['matching_users'],
-                    len(results['role_mismatches']),
-                    sum(1 for r in results['role_mismatches'].to_dict('records') if r['Scheduling_Mismatch'] == '✗'),
-                    sum(1 for r in results['role_mismatches'].to_dict('records') if r['OnRequest_Mismatch'] == '✗'),
-                    len(sched_empty),
-                    len(onreq_empty),
-                    len(results['excel_users_with_empty_roles'])
-                ]
-            }
-            pd.DataFrame(summary_data).to_excel(writer, sheet_name='Summary', index=False)
+def compare_partitioned(xml_users, sched_users, onreq_users, sched_all_users, onreq_all_users, partitions,
+                        workers=None):
+    """
+    Compare like compare_data, split into hash partitions of the user ID compared in a process pool
 
-            # Mismatches Sheet
-            if not results['role_mismatches'].empty:
-                results['role_mismatches'].to_excel(writer, sheet_name='Role Mismatches', index=False)
-            else:
-                pd.DataFrame({'Message': ['No role mismatches found']}).to_excel(
-                    writer, sheet_name='Role Mismatches', index=False)
+    Mismatches come out partition by partition; like compare_data's, their order carries no meaning.
+    """
+    parts = list(zip(split_mapping(xml_users, {}, partitions),
+                     split_mapping(sched_users, {}, partitions),
+                     split_mapping(onreq_users, {}, partitions),
+                     split_ids(sched_all_users, {}, partitions),
+                     split_ids(onreq_all_users, {}, partitions)))
+    results = run_partitions(compare_data, parts, workers)
 
-            # Users only in XML
-            if results['only_in_xml']:
-                pd.DataFrame({'User_ID': results['only_in_xml']}).to_excel(
-                    writer, sheet_name='XML Only Users', index=False)
-            else:
-                pd.DataFrame({'Message': ['No users only in XML']}).to_excel(
-                    writer, sheet_name='XML Only Users', index=False)
+    return {
+        'only_in_xml': merge_sorted(r['only_in_xml'] for r in results),
+        'only_in_excel': merge_sorted(r['only_in_excel'] for r in results),
+        'role_mismatches': [row for r in results for row in r['role_mismatches']],
+        'matching_users': sum(r['matching_users'] for r in results),
+        'excel_users_with_empty_roles': merge_sorted(r['excel_users_with_empty_roles'] for r in results)
+    }
 
-            # Users only in Excel (including those with empty roles)
-            if results['only_in_excel']:
-                pd.DataFrame({'User_ID': results['only_in_excel']}).to_excel(
-                    writer, sheet_name='Excel Only Users', index=False)
-            else:
-                pd.DataFrame({'Message': ['No users only in Excel']}).to_excel(
-                    writer, sheet_name='Excel Only Users', index=False)
 
-            # Users with empty Scheduling ROLENAME
-            if sched_empty:
-                pd.DataFrame({'User_ID': sched_empty}).to_excel(
-                    writer, sheet_name='Empty Scheduling Roles', index=False)
-            else:
-                pd.DataFrame({'Message': ['No users with empty Scheduling ROLENAME']}).to_excel(
-                    writer, sheet_name='Empty Scheduling Roles', index=False)
+def compare_streaming(xml_file, sched_users, onreq_users, sched_all_users, onreq_all_users, profile=None):
+    """
+    Compare like compare_data while the XML is still being parsed
+
+    Each feed user is reconciled against the Excel users as it is parsed and its rows are
+    spooled to disk, so memory holds the Excel side, the feed's user IDs and the accounts in
+    flight. Users with several accounts are compared with their merged roles (see run_pipeline).
+    XML-only users are sorted, mismatches are listed in feed order. profile, a FeedProfile,
+    observes every account.
+    """
+    excel_user_ids_with_roles = set(sched_users.keys()).union(set(onreq_users.keys()))
+    excel_all_user_ids = sched_all_users.union(onreq_all_users)
+
+    found_in_xml = set()
+
+    def reconcile(user, xml_roles):
+        if user not in excel_all_user_ids:
+            return [('only_in_xml', user)]
+        found_in_xml.add(user)
+        if user not in excel_user_ids_with_roles:
+            return []
+        mismatch = role_mismatch(user, xml_roles, sched_users, onreq_users)
+        return [('role_mismatches', mismatch)] if mismatch else []
+
+    spools = run_pipeline(xml_file, account_roles, reconcile, profile=profile, sorted_sheets=('only_in_xml',))
+    mismatches = spools.get('role_mismatches', [])
+
+    return {
+        'only_in_xml': spools.get('only_in_xml', []),
+        'only_in_excel': sorted(excel_all_user_ids - found_in_xml),
+        'role_mismatches': mismatches,
+        'matching_users': len(found_in_xml & excel_user_ids_with_roles) - len(mismatches),
+        'excel_users_with_empty_roles': sorted(
+            (sched_all_users - set(sched_users.keys()) | (onreq_all_users - set(onreq_users.keys()))))
+    }
 
-            # Users with empty OnRequest ROLENAME
-            if onreq_empty:
-                pd.DataFrame({'User_ID': onreq_empty}).to_excel(
-                    writer, sheet_name='Empty OnRequest Roles', index=False)
-            else:
-                pd.DataFrame({'Message': ['No users with empty OnRequest ROLENAME']}).to_excel(
-                    writer, sheet_name='Empty OnRequest Roles', index=False)
 
-            # All Excel users with empty roles (combined)
-            if results['excel_users_with_empty_roles']:
-                pd.DataFrame({'User_ID': results['excel_users_with_empty_roles']}).to_excel(
-                    writer, sheet_name='All Empty Roles', index=False)
+def export_results(results, sched_empty, onreq_empty, output_file, engine='auto'):
+    """
+    Export comparison results to Excel file with additional sheets for empty roles
+
+    User IDs are written as the XML and the workbook wrote them.
+    """
+    try:
+        sheets = {}
+        xml_ids = results['xml_original_ids']
+        excel_ids = results['excel_original_ids']
+
+        # Summary Sheet
+        sheets['Summary'] = {
+            'Metric': [
+                'Comparison Date',
+                'Total XML Users',
+                'Total Excel Users',
+                'Users only in XML',
+                'Users only in Excel',
+                'Users with matching roles',
+                'Users with role mismatches',
+                'Scheduling mismatches',
+                'OnRequest mismatches',
+                'Users with empty Scheduling ROLENAME',
+                'Users with empty OnRequest ROLENAME',
+                'Excel users with empty roles (all)'
+            ],
+            'Value': [
+                datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                len(results['only_in_xml']) + len(results['role_mismatches']) + results['matching_users'],
+                len(results['only_in_excel']) + len(results['role_mismatches']) + results['matching_users'],
+                len(results['only_in_xml']),
+                len(results['only_in_excel']),
+                results['matching_users'],
+                len(results['role_mismatches']),
+                sum(1 for r in results['role_mismatches'] if r['Scheduling_Mismatch'] == '✗'),
+                sum(1 for r in results['role_mismatches'] if r['OnRequest_Mismatch'] == '✗'),
+                len(sched_empty),
+                len(onreq_empty),
+                len(results['excel_users_with_empty_roles'])
+            ]
+        }
+
+        # Mismatches Sheet
+        mismatches = OriginalIds(results['role_mismatches'], columns={'User_ID': excel_ids})
+        sheets['Role Mismatches'] = mismatches or {'Message': ['No role mismatches found']}
+
+        # Users only in XML
+        if results['only_in_xml']:
+            sheets['XML Only Users'] = {'User_ID': OriginalIds(results['only_in_xml'], xml_ids)}
+        else:
+            sheets['XML Only Users'] = {'Message': ['No users only in XML']}
+
+        # Users only in Excel (including those with empty roles)
+        if results['only_in_excel']:
+            sheets['Excel Only Users'] = {'User_ID': OriginalIds(results['only_in_excel'], excel_ids)}
+        else:
+            sheets['Excel Only Users'] = {'Message': ['No users only in Excel']}
+
+        # Likely-same IDs among the users only one side has
+        near_matches = OriginalIds(results['near_matches'],
+                                   columns={'XML_User_ID': xml_ids, 'Excel_User_ID': excel_ids})
+        sheets['Near Matches'] = near_matches or {'Message': ['No near-duplicate user IDs found']}
+
+        # Data-quality profile of the feed
+        sheets['Feed Profile'] = results['feed_profile']
+
+        # Users with empty Scheduling ROLENAME
+        if sched_empty:
+            sheets['Empty Scheduling Roles'] = {'User_ID': OriginalIds(sched_empty, excel_ids)}
+        else:
+            sheets['Empty Scheduling Roles'] = {'Message': ['No users with empty Scheduling ROLENAME']}
+
+        # Users with empty OnRequest ROLENAME
+        if onreq_empty:
+            sheets['Empty OnRequest Roles'] = {'User_ID': OriginalIds(onreq_empty, excel_ids)}
+        else:
+            sheets['Empty OnRequest Roles'] = {'Message': ['No users with empty OnRequest ROLENAME']}
+
+        # All Excel users with empty roles (combined)
+        if results['excel_users_with_empty_roles']:
+            sheets['All Empty Roles'] = {
+                'User_ID': OriginalIds(results['excel_users_with_empty_roles'], excel_ids)
+            }
+
+        write_workbook(output_file, sheets, engine)
 
     except Exception as e:
         sys.exit(f"Error exporting to Excel: {e}")
 
 
 def main():
-    print("AWF Role Comparison Tool\n" + "=" * 25)
-
-    # Configuration
+    # Configuration (defaults, overridable on the command line)
     XML_FILE = 'AWF_01_accounts.xml'
     EXCEL_FILE = 'AWF_List.xlsx'
     OUTPUT_FILE = 'AWF_Role_Comparison_Results_12.xlsx'
 
+    parser = argparse.ArgumentParser(description='Compare Scheduling and OnRequest roles between the XML feed and the Excel workbook')
+    parser.add_argument('--xml', default=XML_FILE, help=f"XML feed (default: {XML_FILE})")
+    parser.add_argument('--excel', default=EXCEL_FILE, help=f"Excel workbook (default: {EXCEL_FILE})")
+    parser.add_argument('--output', default=OUTPUT_FILE, help=f"Results workbook (default: {OUTPUT_FILE})")
+    parser.add_argument('--engine', choices=ENGINES, default='auto',
+                        help="Excel reader/writer; 'auto' uses the standard library for small files (default: auto)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processes parsing the XML and the Excel sheets concurrently; 1 parses sequentially "
+                             "(default: 1 for small inputs, else one per sheet plus the XML, up to the CPU count)")
+    parser.add_argument('--partitions', type=int, default=1,
+                        help='Hash-partition both sides by canonical user ID and compare the partitions in a '
+                             'process pool (default: 1, a single comparison)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Load the Excel side first, then compare each XML account while the feed is parsed')
+    parser.add_argument('--quick-look', action='store_true',
+                        help='Only estimate user counts and overlaps per source and role category from '
+                             'HyperLogLog sketches in one pass (no results workbook)')
+    args = parser.parse_args()
+
+    print("AWF Role Comparison Tool\n" + "=" * 25)
+
     try:
-        # Process files
-        print("\n[1/3] Parsing XML file...")
-        xml_users = parse_xml(XML_FILE)
+        if args.quick_look:
+            from quick_look import print_quick_look, quick_look
+            print_quick_look(quick_look(args.xml, args.excel, EXCEL_SHEETS, roles_only=True, engine=args.engine))
+            return
 
-        print("[2/3] Parsing Excel file...")
-        sched_users, onreq_users, sched_empty, onreq_empty, sched_all_users, onreq_all_users = parse_excel(EXCEL_FILE)
+        # Process files
+        # The streaming mode does not hold the feed's IDs, so neither may the profile
+        profile = FeedProfile(KNOWN_ROLES, expected_accounts=count_accounts(args.xml) if args.stream else None)
+        if args.stream:
+            print("\n[1/3] Parsing Excel file...")
+            excel_data = parse_excel(args.excel, args.engine)
+            (sched_users, onreq_users, sched_empty, onreq_empty, sched_all_users, onreq_all_users,
+             excel_original_ids) = excel_data
+
+            print("[2/3] Streaming XML file...")
+            print("[3/3] Comparing data...")
+            results = compare_streaming(args.xml, sched_users, onreq_users, sched_all_users, onreq_all_users,
+                                        profile=profile)
+            confirm_duplicate_ids(args.xml, profile)
+        else:
+            print("\n[1/3] Parsing XML file...")
+            print("[2/3] Parsing Excel file...")
+            xml_users, excel_data = parse_inputs(parse_xml, args.xml, parse_excel, args.excel, EXCEL_SHEETS,
+                                                 args.engine, args.workers, profile)
+            (sched_users, onreq_users, sched_empty, onreq_empty, sched_all_users, onreq_all_users,
+             excel_original_ids) = excel_data
+
+            print("[3/3] Comparing data...")
+            if args.partitions > 1:
+                results = compare_partitioned(xml_users, sched_users, onreq_users, sched_all_users,
+                                              onreq_all_users, args.partitions)
+            else:
+                results = compare_data(xml_users, sched_users, onreq_users, sched_all_users, onreq_all_users)
 
-        print("[3/3] Comparing data...")
-        results = compare_data(xml_users, sched_users, onreq_users, sched_all_users, onreq_all_users)
+        finish_results(results, profile, excel_original_ids)
 
         # Display quick summary
         print("\nComparison Results:")
         print(f"- Users only in XML: {len(results['only_in_xml'])}")
         print(f"- Users only in Excel: {len(results['only_in_excel'])} (including those with empty roles)")
+        print(f"- Near-duplicate user ID pairs: {len(results['near_matches'])}")
+        print(f"- Feed profile: {profile.summary()}")
         print(f"- Users with matching roles: {results['matching_users']}")
         print(f"- Users with role mismatches: {len(results['role_mismatches'])}")
         print(f"- Users with empty Scheduling ROLENAME: {len(sched_empty)}")
@@ -275,8 +436,8 @@ def main():
         print(f"- All Excel users with empty roles: {len(results['excel_users_with_empty_roles'])}")
 
         # Export results
-        print(f"\nExporting results to {OUTPUT_FILE}...")
-        export_results(results, sched_empty, onreq_empty, OUTPUT_FILE)
+        print(f"\nExporting results to {args.output}...")
+        export_results(results, sched_empty, onreq_empty, args.output, args.engine)
         print("Done! Results exported successfully.")
     except Exception as e:
         print(f"\nError: {str(e)}")
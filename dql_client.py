@@ -0,0 +1,405 @@
+import codecs
+import json
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import requests
+
+from D_daskboard import RETRYABLE_STATUS_CODES, _retry_after_seconds
+
+EXECUTE_PATH = '/platform/storage/query/v1/query:execute'
+POLL_PATH = '/platform/storage/query/v1/query:poll'
+
+# Grail caps results at 1000 records unless told otherwise
+DEFAULT_MAX_RESULT_RECORDS = 1000000
+
+# Parameterized versions of the queries kept in dql_queries, dql_count.yml and DTScript1.js.
+# Placeholders are filled by build_query(); list parameters are rendered as DQL string arrays.
+QUERY_LIBRARY = {
+    'host_cpu_usage': (
+        'fetch dt.host.cpu.usage\n'
+        '| lookup dt.host.metadata on host\n'
+        '| summarize avg(value) by host, os, environment, bin(timestamp, {bin})'
+    ),
+    'host_cpu_usage_summary': (
+        'fetch dt.host.cpu.usage\n'
+        '| summarize avg(value), max(value) by host'
+    ),
+    'host_memory_usage_summary': (
+        'fetch dt.host.mem.usage\n'
+        '| summarize avg(value), max(value) by host'
+    ),
+    'process_memory_working_set': (
+        'fetch dt.process.mem.working_set\n'
+        '| summarize avg(value) by process, host, bin(timestamp, {bin})'
+    ),
+    'host_disk_free': (
+        'fetch dt.host.disk.free\n'
+        '| summarize min(value), avg(value) by host, disk, bin(timestamp, {bin})'
+    ),
+    'host_disk_utilization': (
+        'fetch dt.host.disk.utilization\n'
+        '| summarize max(value) by host, disk, bin(timestamp, {bin})'
+    ),
+    'disk_entities': (
+        'fetch dt.entity.disk\n'
+        '| filter isNotNull(disk.free)\n'
+        '| fields\n'
+        '  id = entity.id,\n'
+        '  name = entity.name,\n'
+        '  total = disk.total,\n'
+        '  free = disk.free,\n'
+        '  used = disk.used,\n'
+        '  host = belongs_to[dt.entity.host],\n'
+        '  timestamp = timestamp\n'
+        '| fieldsAdd usedPercentage = (used / total) * 100\n'
+        '| sort usedPercentage desc'
+    ),
+    'disk_used_percent_daily': (
+        'timeseries max(dt.host.disk.used.percent), by: {{dt.entity.disk, dt.entity.host}}, '
+        'from: now()-{days}d, to: now(), interval: 1d, filter: in (dt.entity.disk, array({disk_ids}))\n'
+        '| fieldsAdd disk.name = entityName(dt.entity.disk), host.name = entityName(dt.entity.host)'
+    )
+}
+
+QUERY_DEFAULTS = {
+    'bin': '5m',
+    'days': 30
+}
+
+
+class DQLQueryError(RuntimeError):
+    """Raised when Grail rejects a query or reports it as FAILED"""
+
+
+def dql_string(value: str) -> str:
+    """Quote a value as a DQL string literal"""
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def build_query(name: str, **params) -> str:
+    """
+    Render a query from QUERY_LIBRARY
+
+    Args:
+        name: Query name (see QUERY_LIBRARY)
+        **params: Template parameters; lists (e.g. disk_ids) become comma separated DQL strings
+
+    Returns:
+        DQL query text
+    """
+    if name not in QUERY_LIBRARY:
+        raise KeyError(f"Unknown query '{name}'. Available: {', '.join(sorted(QUERY_LIBRARY))}")
+
+    values = dict(QUERY_DEFAULTS)
+    for key, value in params.items():
+        values[key] = ','.join(dql_string(v) for v in value) if isinstance(value, (list, tuple, set)) else value
+    return QUERY_LIBRARY[name].format(**values)
+
+
+class _RecordStream:
+    """
+    Incrementally extract the items of result.records from a streamed query response
+
+    Only the small prefix before the records array and one record at a time are held as text,
+    so memory stays bounded by the chunk size rather than the full response.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.exhausted = False
+
+    def _read_more(self) -> bool:
+        for chunk in self._chunks:
+            if chunk:
+                # Drop consumed text so the buffer does not grow with the response
+                self.buffer = self.buffer[self.pos:] + self._decoder.decode(chunk)
+                self.pos = 0
+                return True
+        self.exhausted = True
+        return False
+
+    def find_records(self) -> bool:
+        """Advance to the first element of the top-level result.records array; False if there is none"""
+        depth, in_string, escaped = 0, False, False
+        string_start, last_string = 0, None
+        i = 0
+
+        while True:
+            # The prefix before the records array is small, so it is kept until the array is found
+            if i >= len(self.buffer) and not self._read_more():
+                return False
+            if i >= len(self.buffer):
+                continue
+
+            ch = self.buffer[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == '\\':
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+                    last_string = self.buffer[string_start + 1:i]
+            elif ch == '"':
+                in_string = True
+                string_start = i
+            elif ch in '{[':
+                if ch == '[' and depth == 2 and last_string == 'records':
+                    self.pos = i + 1
+                    return True
+                depth += 1
+                last_string = None
+            elif ch in '}]':
+                depth -= 1
+            elif ch not in ': \t\r\n':
+                last_string = None
+            i += 1
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Yield records one by one after find_records() returned True"""
+        while True:
+            # Skip separators
+            while True:
+                while self.pos < len(self.buffer) and self.buffer[self.pos] in ', \t\r\n':
+                    self.pos += 1
+                if self.pos < len(self.buffer):
+                    break
+                if not self._read_more():
+                    raise DQLQueryError('Query response ended inside the records array')
+
+            if self.buffer[self.pos] == ']':
+                self.pos += 1
+                return
+
+            while True:
+                try:
+                    record, end = self._json.raw_decode(self.buffer, self.pos)
+                    # A record is a JSON object; a complete object always ends with '}'
+                    if isinstance(record, dict):
+                        break
+                except ValueError:
+                    pass
+                if not self._read_more():
+                    raise DQLQueryError('Query response ended inside a record')
+
+            self.pos = end
+            yield record
+
+
+class DQLClient:
+    def __init__(
+            self,
+            base_url: str,
+            token: str,
+            poll_timeout_ms: int = 5000,
+            max_retries: int = 3,
+            pool_size: int = 10,
+            verbose: bool = True
+    ):
+        """
+        Initialize the Grail DQL query client
+
+        Args:
+            base_url: Dynatrace platform URL (e.g., 'abc12345.apps.dynatrace.com'); a scheme may be given
+            token: Platform token or OAuth bearer token with storage read scopes
+            poll_timeout_ms: Long-poll duration the server may hold each poll request
+            max_retries: How many times a throttled (HTTP 429) or failed (HTTP 5xx) request is retried
+            pool_size: Pooled connections, should be at least the number of queries run in parallel
+            verbose: Print progress messages
+        """
+        self.base_url = base_url.rstrip('/')
+        self.api_root = self.base_url if '://' in self.base_url else f"https://{self.base_url}"
+        self.poll_timeout_ms = poll_timeout_ms
+        self.max_retries = max_retries
+        self.verbose = verbose
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        })
+
+    def close(self):
+        self.session.close()
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a streamed request, retrying throttled (429) and transient server errors"""
+        attempt = 0
+        while True:
+            response = self.session.request(method, url, stream=True, timeout=60, **kwargs)
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                if response.status_code >= 400:
+                    try:
+                        message = response.json().get('error', {}).get('message', response.text)
+                    except ValueError:
+                        message = response.text
+                    response.close()
+                    raise DQLQueryError(f"HTTP {response.status_code}: {message}")
+                return response
+
+            attempt += 1
+            response.close()
+            time.sleep(_retry_after_seconds(response.headers.get('Retry-After'), attempt))
+
+    def _open_result(self, response: requests.Response):
+        """
+        Inspect a streamed execute/poll response
+
+        Returns:
+            ('records', stream) when the result is ready, otherwise ('pending', request token)
+        """
+        stream = _RecordStream(response.iter_content(chunk_size=65536))
+        if stream.find_records():
+            return 'records', stream
+
+        # No records array: a small RUNNING/FAILED document
+        response.close()
+        try:
+            payload = json.loads(stream.buffer)
+        except ValueError:
+            raise DQLQueryError(f"Unexpected query response: {stream.buffer[:200]}")
+
+        state = payload.get('state')
+        if state in ('FAILED', 'CANCELLED'):
+            raise DQLQueryError(f"Query {state}: {payload.get('error') or payload}")
+        if state == 'SUCCEEDED':
+            # Succeeded without a records array (e.g. empty result shape)
+            return 'records', None
+        return 'pending', payload.get('requestToken')
+
+    def iter_records(
+            self,
+            query: str,
+            max_result_records: int = DEFAULT_MAX_RESULT_RECORDS,
+            timeframe_start: Optional[str] = None,
+            timeframe_end: Optional[str] = None,
+            max_wait: float = 600.0
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Submit a query, poll until it finishes and stream result records one at a time
+
+        Args:
+            query: DQL query text
+            max_result_records: Upper bound on returned records
+            timeframe_start: Optional default timeframe start (ISO-8601)
+            timeframe_end: Optional default timeframe end (ISO-8601)
+            max_wait: Seconds to wait for the query before raising TimeoutError
+
+        Yields:
+            Result records as dictionaries
+        """
+        body = {
+            'query': query,
+            'maxResultRecords': max_result_records,
+            'requestTimeoutMilliseconds': self.poll_timeout_ms
+        }
+        if timeframe_start:
+            body['defaultTimeframeStart'] = timeframe_start
+        if timeframe_end:
+            body['defaultTimeframeEnd'] = timeframe_end
+
+        started = time.monotonic()
+        response = self._request('POST', f"{self.api_root}{EXECUTE_PATH}", data=json.dumps(body))
+        kind, value = self._open_result(response)
+
+        polls = 0
+        while kind == 'pending':
+            if time.monotonic() - started > max_wait:
+                raise TimeoutError(f"Query did not finish within {max_wait}s")
+            polls += 1
+            if self.verbose:
+                print(f"Query running, poll {polls}...")
+            response = self._request('GET', f"{self.api_root}{POLL_PATH}", params={
+                'request-token': value,
+                'request-timeout-milliseconds': self.poll_timeout_ms
+            })
+            kind, value = self._open_result(response)
+
+        if value is None:
+            return
+        try:
+            yield from value.iter_records()
+        finally:
+            response.close()
+
+    def iter_record_chunks(self, query: str, chunk_size: int = 10000, **kwargs) -> Iterator[List[Dict[str, Any]]]:
+        """Stream result records in lists of at most chunk_size records"""
+        chunk = []
+        for record in self.iter_records(query, **kwargs):
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def iter_dataframes(self, query: str, chunk_size: int = 10000, **kwargs):
+        """Stream result records as pandas DataFrames of at most chunk_size rows"""
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError("Missing required package 'pandas'. Please install with:\npip install pandas")
+
+        for chunk in self.iter_record_chunks(query, chunk_size, **kwargs):
+            yield pd.DataFrame.from_records(chunk)
+
+    def iter_arrow_batches(self, query: str, chunk_size: int = 10000, **kwargs):
+        """Stream result records as pyarrow RecordBatches of at most chunk_size rows"""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("Missing required package 'pyarrow'. Please install with:\npip install pyarrow")
+
+        for chunk in self.iter_record_chunks(query, chunk_size, **kwargs):
+            yield pa.RecordBatch.from_pylist(chunk)
+
+    def query_dataframe(self, query: str, chunk_size: int = 10000, **kwargs):
+        """Run a query and return the whole result as one pandas DataFrame"""
+        import pandas as pd
+
+        frames = list(self.iter_dataframes(query, chunk_size, **kwargs))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def query_arrow(self, query: str, chunk_size: int = 10000, **kwargs):
+        """Run a query and return the whole result as one pyarrow Table"""
+        import pyarrow as pa
+
+        batches = list(self.iter_arrow_batches(query, chunk_size, **kwargs))
+        return pa.Table.from_batches(batches) if batches else pa.table({})
+
+    def run_library_query(self, name: str, chunk_size: int = 10000, **params) -> Iterator[List[Dict[str, Any]]]:
+        """Stream record chunks of a QUERY_LIBRARY query (see build_query)"""
+        return self.iter_record_chunks(build_query(name, **params), chunk_size)
+
+
+def main():
+    # Configuration - Replace these with your actual values, or point BASE_URL at mock_dynatrace_server.py
+    BASE_URL = "your-environment.apps.dynatrace.com"
+    TOKEN = "your-platform-token-here"
+
+    client = DQLClient(BASE_URL, TOKEN)
+
+    print("=== Disk entities ===")
+    disks = [record for chunk in client.run_library_query('disk_entities') for record in chunk]
+    print(f"Found {len(disks)} disks")
+
+    print("\n=== Disk free space, 5 minute bins ===")
+    for frame in client.iter_dataframes(build_query('host_disk_free', bin='5m'), chunk_size=50000):
+        print(frame.head())
+
+    print("\n=== Daily used percent for the 10 fullest disks ===")
+    query = build_query('disk_used_percent_daily', days=30, disk_ids=[d['id'] for d in disks[:10]])
+    for record in client.iter_records(query):
+        print(record.get('dt.entity.disk'), record.get('max(dt.host.disk.used.percent)', [])[-1:])
+
+
+if __name__ == "__main__":
+    main()
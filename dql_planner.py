@@ -0,0 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from dql_client import DQLClient, build_query, dql_string
+from disk_forecast import USAGE_FIELD
+
+# Conservative limits for a single Grail query; tune to the tenant if it allows more
+DEFAULT_MAX_QUERY_LENGTH = 16000
+DEFAULT_MAX_SERIES_PER_QUERY = 1000
+DEFAULT_MAX_POINTS_PER_QUERY = 500000
+
+
+def _query_for(disk_ids: Sequence[str], days: int, query_name: str) -> str:
+    return build_query(query_name, days=days, disk_ids=list(disk_ids))
+
+
+def plan_disk_queries(
+        disk_ids: Iterable[str],
+        days: int = 30,
+        query_name: str = 'disk_used_percent_daily',
+        max_query_length: int = DEFAULT_MAX_QUERY_LENGTH,
+        max_series_per_query: int = DEFAULT_MAX_SERIES_PER_QUERY,
+        max_points_per_query: int = DEFAULT_MAX_POINTS_PER_QUERY
+) -> List[Dict[str, Any]]:
+    """
+    Pack disk IDs into as few 'in (dt.entity.disk, array(...))' queries as the limits allow
+
+    Every ID costs its quoted length plus a comma in the query text and one series of `days`
+    daily points in the result, so packs are filled in order until either budget runs out.
+
+    Args:
+        disk_ids: Disk entity IDs; duplicates are dropped
+        days: Days of history per series (one point per day)
+        query_name: QUERY_LIBRARY entry taking 'days' and 'disk_ids'
+        max_query_length: Longest query text allowed, in characters
+        max_series_per_query: Most series (records) one query may return
+        max_points_per_query: Most data points one query may return
+
+    Returns:
+        List of {'diskIds': [...], 'query': str}
+    """
+    disk_ids = list(dict.fromkeys(disk_ids))
+    series_limit = min(max_series_per_query, max_points_per_query // max(1, days))
+    if series_limit < 1:
+        raise ValueError(f"A single {days}-day series exceeds max_points_per_query={max_points_per_query}")
+
+    base_length = len(_query_for([], days, query_name))
+    packs = []
+    current, length = [], base_length
+    for disk_id in disk_ids:
+        cost = len(dql_string(disk_id)) + (1 if current else 0)
+        if current and (length + cost > max_query_length or len(current) >= series_limit):
+            packs.append(current)
+            current, length = [], base_length
+            cost -= 1
+        if base_length + cost > max_query_length:
+            raise ValueError(f"Disk ID {disk_id!r} does not fit into a query of {max_query_length} characters")
+        current.append(disk_id)
+        length += cost
+    if current:
+        packs.append(current)
+
+    return [{'diskIds': pack, 'query': _query_for(pack, days, query_name)} for pack in packs]
+
+
+def demultiplex_series(
+        records: Iterable[Dict[str, Any]],
+        value_field: str = USAGE_FIELD,
+        id_field: str = 'dt.entity.disk'
+) -> Dict[str, np.ndarray]:
+    """Split packed timeseries records into one float array per disk (nulls become NaN)"""
+    return {
+        record[id_field]: np.array(record.get(value_field) or [], dtype=float)
+        for record in records if record.get(id_field)
+    }
+
+
+def fetch_disk_series(
+        client: DQLClient,
+        disk_ids: Iterable[str],
+        days: int = 30,
+        max_workers: int = 4,
+        **limits
+) -> Dict[str, np.ndarray]:
+    """
+    Retrieve daily used-percent series for many disks with packed queries run in parallel
+
+    Args:
+        client: DQL client (its pool_size should be at least max_workers)
+        disk_ids: Disk entity IDs
+        days: Days of history
+        max_workers: Packed queries in flight at once
+        **limits: max_query_length, max_series_per_query, max_points_per_query (see plan_disk_queries)
+
+    Returns:
+        Disk ID -> series array; disks without data are absent
+    """
+    plan = plan_disk_queries(disk_ids, days=days, **limits)
+
+    def run(pack):
+        return demultiplex_series(client.iter_records(pack['query'], max_result_records=len(pack['diskIds'])))
+
+    series = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(plan) or 1))) as executor:
+        for pack_series in executor.map(run, plan):
+            series.update(pack_series)
+    return series
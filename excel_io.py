@@ -0,0 +1,412 @@
+import itertools
+import json
+import math
+import os
+import re
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import date, datetime, time
+from xml.sax.saxutils import escape
+
+# Workbooks up to this size are read with the standard library instead of pandas/openpyxl
+FAST_PATH_MAX_BYTES = 5 * 1024 * 1024
+# Result workbooks with up to this many rows (all sheets) are written with the standard library
+FAST_PATH_MAX_ROWS = 200000
+
+ENGINES = ('auto', 'stdlib', 'pandas')
+
+# Cell texts pandas.read_excel turns into NaN by default; both engines report them as None
+NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+])
+
+_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_CELL_REF = re.compile(r'([A-Z]+)(\d+)')
+# Control characters are not allowed in worksheet XML
+_ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def column_index(letters):
+    """'A' -> 0, 'C' -> 2, 'AA' -> 26"""
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def column_letter(index):
+    """0 -> 'A', 26 -> 'AA'"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def cell_text(value):
+    """Stripped text of a cell read by read_sheet, '' for a blank cell"""
+    return '' if value is None else str(value).strip()
+
+
+def resolve_engine(engine, excel_file=None, rows=None):
+    """
+    Pick the engine for one read or write
+
+    Args:
+        engine: 'auto', 'stdlib' or 'pandas'
+        excel_file: Workbook being read ('auto' uses stdlib up to FAST_PATH_MAX_BYTES)
+        rows: Rows being written ('auto' uses stdlib up to FAST_PATH_MAX_ROWS)
+
+    Returns:
+        'stdlib' or 'pandas'
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Use one of: {', '.join(ENGINES)}")
+    if engine != 'auto':
+        return engine
+    if excel_file is not None:
+        return 'stdlib' if os.path.getsize(excel_file) <= FAST_PATH_MAX_BYTES else 'pandas'
+    return 'stdlib' if rows is not None and rows <= FAST_PATH_MAX_ROWS else 'pandas'
+
+
+def read_sheet(excel_file, sheet_name, header=0, usecols=None, engine='auto', prefetched=None):
+    """
+    Read one worksheet like pandas.read_excel, as plain column names and row dicts
+
+    Blank cells and the pandas NA strings (NA_STRINGS, e.g. 'NULL') come back as None with
+    either engine, so callers never touch pandas types.
+
+    Args:
+        excel_file: Path of the .xlsx workbook
+        sheet_name: Worksheet name
+        header: 0-based sheet row holding the column names
+        usecols: Excel column range such as "C:K" (all columns if None)
+        engine: 'auto', 'stdlib' or 'pandas'
+        prefetched: Result of prefetch_sheets(); a sheet read there is not read again
+
+    Returns:
+        (columns, rows) with rows as {column: value}
+    """
+    if prefetched is not None and (sheet_name, header, usecols) in prefetched:
+        result = prefetched[(sheet_name, header, usecols)]
+        if isinstance(result, Exception):
+            raise result
+        return result
+    if resolve_engine(engine, excel_file=excel_file) == 'pandas':
+        return _read_sheet_pandas(excel_file, sheet_name, header, usecols)
+    return _read_sheet_stdlib(excel_file, sheet_name, header, usecols)
+
+
+def prefetch_sheets(excel_file, requests, executor, engine='auto'):
+    """
+    Read several worksheets at once, one executor task per sheet
+
+    Args:
+        excel_file: Path of the .xlsx workbook
+        requests: (sheet_name, header, usecols) tuples
+        executor: concurrent.futures executor (a ProcessPoolExecutor parses sheets in parallel)
+        engine: 'auto', 'stdlib' or 'pandas'
+
+    Returns:
+        {request: (columns, rows) or the exception reading it raised}, for read_sheet(prefetched=...)
+    """
+    engine = resolve_engine(engine, excel_file=excel_file)
+    futures = {request: executor.submit(read_sheet, excel_file, *request, engine) for request in requests}
+    results = {}
+    for request, future in futures.items():
+        try:
+            results[request] = future.result()
+        except Exception as e:
+            results[request] = e
+    return results
+
+
+def _read_sheet_pandas(excel_file, sheet_name, header, usecols):
+    import pandas as pd
+
+    df = pd.read_excel(excel_file, sheet_name=sheet_name, header=header, usecols=usecols)
+    df = df.astype(object).where(df.notna(), None)
+    return list(df.columns), df.to_dict('records')
+
+
+def _shared_strings(archive):
+    try:
+        data = archive.read('xl/sharedStrings.xml')
+    except KeyError:
+        return []
+    return [''.join(t.text or '' for t in si.iter(f'{_MAIN_NS}t'))
+            for si in ET.fromstring(data).iter(f'{_MAIN_NS}si')]
+
+
+def _sheet_path(archive, sheet_name):
+    workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    rel_id = None
+    for sheet in workbook.iter(f'{_MAIN_NS}sheet'):
+        if sheet.get('name') == sheet_name:
+            rel_id = sheet.get(f'{_REL_NS}id')
+            break
+    if rel_id is None:
+        raise ValueError(f"Worksheet named '{sheet_name}' not found")
+
+    rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    for rel in rels.iter(f'{_PKG_REL_NS}Relationship'):
+        if rel.get('Id') == rel_id:
+            target = rel.get('Target')
+            return target.lstrip('/') if target.startswith('/') else f"xl/{target}"
+    raise ValueError(f"Worksheet named '{sheet_name}' has no part in the workbook")
+
+
+def _iso_date(text):
+    """
+    ISO 8601 date cell (t="d") as openpyxl reads it: a naive datetime, or a date / time when the
+    text holds only one of them; the text itself if it does not parse
+    """
+    value = text[:-1] if text.endswith('Z') else text
+    parse = datetime.fromisoformat if 'T' in value else time.fromisoformat if ':' in value else date.fromisoformat
+    try:
+        return parse(value)
+    except ValueError:
+        return text
+
+
+def _cell_value(cell, shared):
+    kind = cell.get('t', 'n')
+    if kind == 'inlineStr':
+        text = ''.join(t.text or '' for t in cell.iter(f'{_MAIN_NS}t'))
+        return None if text in NA_STRINGS else text
+    value = cell.findtext(f'{_MAIN_NS}v')
+    if value is None:
+        return None
+    if kind == 's':
+        text = shared[int(value)]
+        return None if text in NA_STRINGS else text
+    if kind == 'b':
+        return value == '1'
+    if kind in ('str', 'e'):
+        return None if value in NA_STRINGS else value
+    if kind == 'd':
+        return _iso_date(value)
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def _sheet_grid(archive, path, shared, first_col, last_col):
+    """
+    Rows of the worksheet from row 1 on as lists of cell values (None for blanks), limited to
+    first_col..last_col, and the last column index holding a value anywhere in the sheet
+    """
+    grid = []
+    max_col = -1
+    with archive.open(path) as f:
+        for _, element in ET.iterparse(f):
+            if element.tag != f'{_MAIN_NS}row':
+                continue
+            row_number = int(element.get('r', len(grid) + 1))
+            while len(grid) < row_number - 1:
+                grid.append([])
+            values = []
+            for position, cell in enumerate(element.iter(f'{_MAIN_NS}c')):
+                match = _CELL_REF.match(cell.get('r', ''))
+                col = column_index(match.group(1)) if match else position
+                if col <= max_col and (col < first_col or (last_col is not None and col > last_col)):
+                    continue
+                value = _cell_value(cell, shared)
+                if value is None:
+                    continue
+                max_col = max(max_col, col)
+                if first_col <= col and (last_col is None or col <= last_col):
+                    offset = col - first_col
+                    values.extend([None] * (offset + 1 - len(values)))
+                    values[offset] = value
+            grid.append(values)
+            element.clear()
+    return grid, max_col
+
+
+def _read_sheet_stdlib(excel_file, sheet_name, header, usecols):
+    first_col, last_col = 0, None
+    if usecols:
+        start, _, end = usecols.partition(':')
+        first_col = column_index(start)
+        last_col = column_index(end or start)
+
+    try:
+        with zipfile.ZipFile(excel_file) as archive:
+            grid, max_col = _sheet_grid(archive, _sheet_path(archive, sheet_name), _shared_strings(archive),
+                                        first_col, last_col)
+    except zipfile.BadZipFile:
+        raise ValueError(f"'{excel_file}' is not an .xlsx workbook")
+    if last_col is not None and last_col > max_col:
+        # pandas refuses a column range wider than the sheet, so the engines fail alike
+        raise ValueError(f"Columns {usecols} are out of bounds in sheet '{sheet_name}'")
+
+    if header >= len(grid):
+        return [], []
+    width = max((len(row) for row in grid[header:]), default=0)
+    if last_col is not None:
+        width = last_col - first_col + 1
+
+    columns = []
+    seen = {}
+    for i in range(width):
+        name = grid[header][i] if i < len(grid[header]) else None
+        name = f"Unnamed: {first_col + i}" if name is None else name
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+
+    # Like pandas, blank rows are kept up to the last row with data
+    body = grid[header + 1:]
+    while body and all(value is None for value in body[-1]):
+        body.pop()
+    rows = [dict(zip(columns, values[:width] + [None] * (width - len(values)))) for values in body]
+
+    # pandas stores an integer column with blanks as float64 (12 -> 12.0); do the same
+    for column in columns:
+        values = [row[column] for row in rows]
+        if None in values and any(isinstance(v, int) and not isinstance(v, bool) for v in values) \
+                and all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values):
+            for row in rows:
+                if row[column] is not None:
+                    row[column] = float(row[column])
+    return columns, rows
+
+
+class RowSpool:
+    """
+    Append-only list of result rows kept in a temporary file
+
+    Lets a streaming comparison hand result sheets of any size to write_workbook without holding
+    them in memory. Supports append(), len(), truth testing and iteration like the list it replaces.
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile('w+', encoding='utf-8')
+        self._count = 0
+
+    def append(self, row):
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(json.dumps(row) + '\n')
+        self._count += 1
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        self._file.flush()
+        self._file.seek(0)
+        for line in self._file:
+            yield json.loads(line)
+
+    def close(self):
+        self._file.close()
+
+
+def _table(data):
+    """Column names, row lists (lazily) and row count of a sheet given as {column: values} or row dicts"""
+    if isinstance(data, dict):
+        columns = list(data)
+        count = len(data[columns[0]]) if columns else 0
+        return columns, (list(row) for row in zip(*(data[c] for c in columns))), count
+    columns = []
+    for record in data:
+        for column in record:
+            if column not in columns:
+                columns.append(column)
+    return columns, ([record.get(column) for column in columns] for record in data), len(data)
+
+
+def write_workbook(output_file, sheets, engine='auto', start_row=0, start_col=0):
+    """
+    Write result sheets to an .xlsx workbook
+
+    Args:
+        output_file: Path of the workbook
+        sheets: {sheet name: {column: values} or list of row dicts}, in sheet order; a RowSpool
+            can stand in for any of the lists
+        engine: 'auto', 'stdlib' or 'pandas'
+        start_row: 0-based row of the header (5 for the AWF_List.xlsx layout)
+        start_col: 0-based column of the first column
+    """
+    tables = {name: _table(data) for name, data in sheets.items()}
+    total_rows = sum(count for _, _, count in tables.values())
+    if resolve_engine(engine, rows=total_rows) == 'pandas':
+        import pandas as pd
+
+        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+            for name, (columns, rows, _) in tables.items():
+                pd.DataFrame(list(rows), columns=columns).to_excel(
+                    writer, sheet_name=name, index=False, startrow=start_row, startcol=start_col)
+        return
+    _write_workbook_stdlib(output_file, tables, start_row, start_col)
+
+
+def _cell_xml(ref, value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"><v>{value!r}</v></c>'
+    text = escape(_ILLEGAL_XML.sub('', str(value)))
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _write_workbook_stdlib(output_file, tables, start_row, start_col):
+    names = list(tables)
+    content_types = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, len(names) + 1))
+    quoted = [escape(name[:31], {'"': '&quot;'}) for name in names]
+    sheets_xml = ''.join(f'<sheet name="{name}" sheetId="{i}" r:id="rId{i}"/>' for i, name in enumerate(quoted, 1))
+    rels_xml = ''.join(
+        f'<Relationship Id="rId{i}" '
+        f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        f'Target="worksheets/sheet{i}.xml"/>'
+        for i in range(1, len(names) + 1))
+
+    with zipfile.ZipFile(output_file, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            f'{content_types}</Types>'))
+        archive.writestr('_rels/.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="xl/workbook.xml"/></Relationships>'))
+        archive.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets>{sheets_xml}</sheets></workbook>'))
+        archive.writestr('xl/_rels/workbook.xml.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{rels_xml}</Relationships>'))
+
+        for i, name in enumerate(names, 1):
+            columns, rows, _ = tables[name]
+            letters = [column_letter(start_col + c) for c in range(len(columns))]
+            with archive.open(f'xl/worksheets/sheet{i}.xml', 'w') as f:
+                f.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                        b'<sheetData>')
+                for r, values in enumerate(itertools.chain([columns], rows), start_row + 1):
+                    cells = ''.join(_cell_xml(f"{letter}{r}", value) for letter, value in zip(letters, values))
+                    f.write(f'<row r="{r}">{cells}</row>'.encode('utf-8'))
+                f.write(b'</sheetData></worksheet>')
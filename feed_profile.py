@@ -0,0 +1,208 @@
+import random
+from collections import Counter
+
+from id_keys import normalize_id
+
+# Example values kept per check, and the most frequent names listed per counter
+SAMPLES = 5
+TOP = 10
+# False-positive rate of the duplicate-id Bloom filter, and ids hashed into it per batch
+DUPLICATE_FP_RATE = 0.001
+DUPLICATE_BATCH = 1000
+
+
+class Reservoir:
+    """Uniform random sample of up to `size` items from a stream of unknown length (Algorithm R)"""
+
+    def __init__(self, size=SAMPLES, seed=0):
+        self.size = size
+        self.items = []
+        self.seen = 0
+        self.rng = random.Random(seed)
+
+    def add(self, item):
+        self.seen += 1
+        if len(self.items) < self.size:
+            self.items.append(item)
+        else:
+            slot = self.rng.randrange(self.seen)
+            if slot < self.size:
+                self.items[slot] = item
+
+    def update(self, other):
+        """Merge another reservoir, each side contributing in proportion to the items it saw"""
+        mine, theirs = list(self.items), list(other.items)
+        left, right = self.seen, other.seen
+        self.items = []
+        while len(self.items) < self.size and (mine or theirs):
+            if theirs and (not mine or self.rng.randrange(left + right) >= left):
+                self.items.append(theirs.pop(self.rng.randrange(len(theirs))))
+                right -= 1
+            else:
+                self.items.append(mine.pop(self.rng.randrange(len(mine))))
+                left -= 1
+        self.seen += other.seen
+
+
+class FeedProfile:
+    """
+    Data-quality profile of an accounts feed, filled one <account> element at a time
+
+    The XML ingest hands every account it already parsed to observe(), so the profile costs no
+    extra parse. Only counters, reservoir samples, the seen IDs (for duplicates) and the original
+    spelling of IDs that normalize_id changed (for the reports) are kept.
+
+    The seen IDs are a set by default, which costs nothing extra where the comparison holds every
+    feed ID anyway. For the streaming modes, give expected_accounts: the IDs then go into a Bloom
+    filter of that capacity, its hits are only duplicate candidates, and confirm_duplicates()
+    replaces them with exact counts from one more pass over the candidates.
+    """
+
+    def __init__(self, known_roles=None, samples=SAMPLES, expected_accounts=None, fp_rate=DUPLICATE_FP_RATE):
+        """
+        Args:
+            known_roles: Raw feed role names the comparator's role maps cover (None: no unknown-role check)
+            samples: Example values kept per check
+            expected_accounts: Upper bound on the feed's accounts (see stream_compare.count_accounts);
+                None keeps a set of every ID instead of a Bloom filter
+            fp_rate: False-positive rate of the Bloom filter, i.e. share of IDs wrongly made candidates
+        """
+        self.known_roles = None if known_roles is None else frozenset(known_roles)
+        self.accounts = 0
+        self.without_id = Reservoir(samples, seed=1)
+        self.without_roles = 0
+        self.seen_ids = set() if expected_accounts is None else None
+        self._bloom = None
+        if expected_accounts is not None:
+            from bloom_filter import BloomFilter
+
+            self._bloom = BloomFilter(expected_accounts, fp_rate)
+        self._pending = []  # ids not yet added to the Bloom filter
+        self._candidates = set()  # ids the Bloom filter may have seen before
+        self.original_ids = {}  # normalized id -> id as the feed wrote it, where they differ
+        self.duplicates = Counter()  # user id -> occurrences after the first
+        self.duplicate_samples = Reservoir(samples, seed=2)
+        self.other_refs = Counter()  # attribute name before '=' -> references
+        self.other_ref_samples = Reservoir(samples, seed=3)
+        self.unknown_roles = Counter()
+        self.role_counts = Counter()  # roles per account -> accounts
+
+    def observe(self, account):
+        """Profile one <account> element"""
+        self.accounts += 1
+        user_id = normalize_id(account.get('id'), self.original_ids)
+        if not user_id:
+            self.without_id.add(f"account #{self.accounts}")
+        elif self._bloom is not None:
+            self._pending.append(user_id)
+            if len(self._pending) >= DUPLICATE_BATCH:
+                self._flush()
+        elif user_id in self.seen_ids:
+            if not self.duplicates[user_id]:
+                self.duplicate_samples.add(user_id)
+            self.duplicates[user_id] += 1
+        else:
+            self.seen_ids.add(user_id)
+
+        roles = 0
+        for ref in account.findall('.//attributeValueRef'):
+            ref_id = ref.get('id') or ''
+            if ref_id.startswith('Role='):
+                roles += 1
+                if self.known_roles is not None and ref_id[5:] not in self.known_roles:
+                    self.unknown_roles[ref_id[5:]] += 1
+            else:
+                self.other_refs[ref_id.split('=', 1)[0] if '=' in ref_id else '(no name)'] += 1
+                self.other_ref_samples.add(ref_id or '(empty id)')
+        self.role_counts[roles] += 1
+        if not roles:
+            self.without_roles += 1
+
+    @property
+    def bounded(self):
+        """True if seen IDs go into a Bloom filter and duplicates need confirm_duplicates()"""
+        return self._bloom is not None
+
+    def _flush(self):
+        for user_id, seen in zip(self._pending, self._bloom.add(self._pending)):
+            if seen:
+                self._candidates.add(user_id)
+        self._pending = []
+
+    def duplicate_candidates(self):
+        """IDs that may occur more than once, to count exactly for confirm_duplicates (Bloom filter mode)"""
+        if self._pending:
+            self._flush()
+        return set(self._candidates)
+
+    def confirm_duplicates(self, occurrences):
+        """
+        Replace the duplicate candidates with exact counts
+
+        Args:
+            occurrences: {user id: accounts with that id in the whole feed} for the duplicate candidates
+        """
+        candidates = self.duplicate_candidates()
+        self._candidates = set()
+        self.duplicates = Counter({user_id: occurrences[user_id] - 1 for user_id in sorted(candidates)
+                                   if occurrences.get(user_id, 0) > 1})
+        self.duplicate_samples = Reservoir(self.duplicate_samples.size, seed=2)
+        for user_id in self.duplicates:
+            self.duplicate_samples.add(user_id)
+
+    def update(self, other):
+        """Add the profile of a later part of the feed (e.g. one filled in a worker process)"""
+        if self._bloom is not None or other._bloom is not None:
+            raise ValueError("Profiles with a Bloom filter of seen ids cannot be merged")
+        for user_id in other.seen_ids & self.seen_ids:
+            if not self.duplicates[user_id]:
+                self.duplicate_samples.add(user_id)
+            self.duplicates[user_id] += 1
+        self.seen_ids |= other.seen_ids
+        for user_id, original in other.original_ids.items():
+            self.original_ids.setdefault(user_id, original)
+        self.duplicates.update(other.duplicates)
+        self.duplicate_samples.update(other.duplicate_samples)
+        self.without_id.update(other.without_id)
+        self.other_ref_samples.update(other.other_ref_samples)
+        self.accounts += other.accounts
+        self.without_roles += other.without_roles
+        self.other_refs.update(other.other_refs)
+        self.unknown_roles.update(other.unknown_roles)
+        self.role_counts.update(other.role_counts)
+
+    def summary(self):
+        """One line for the console"""
+        parts = [f"{self.accounts} accounts", f"{self.without_id.seen} without id",
+                 f"{len(self.duplicates)} duplicate ids", f"{self.without_roles} without roles"]
+        if self.known_roles is not None:
+            parts.append(f"{len(self.unknown_roles)} unknown role names")
+        return ', '.join(parts)
+
+    def rows(self):
+        """Report rows {'Check', 'Count', 'Details'} for the results workbook"""
+        def top(counter):
+            return ', '.join(f"{name}: {count}" for name, count in counter.most_common(TOP))
+
+        duplicates = sorted(self.original_ids.get(user_id, user_id) for user_id in self.duplicate_samples.items)
+        non_canonical = [repr(self.original_ids[user_id]) for user_id in sorted(self.original_ids)[:SAMPLES]]
+        rows = [
+            {'Check': 'Accounts', 'Count': self.accounts, 'Details': ''},
+            {'Check': 'Accounts without id', 'Count': self.without_id.seen,
+             'Details': ', '.join(self.without_id.items)},
+            {'Check': 'Duplicate account ids', 'Count': len(self.duplicates),
+             'Details': f"{sum(self.duplicates.values())} extra accounts; e.g. {', '.join(duplicates)}"
+                        if self.duplicates else ''},
+            {'Check': 'Account ids not in canonical form', 'Count': len(self.original_ids),
+             'Details': f"e.g. {', '.join(non_canonical)}" if self.original_ids else ''},
+            {'Check': 'Accounts without roles', 'Count': self.without_roles, 'Details': ''},
+            {'Check': 'Non-Role attribute references', 'Count': sum(self.other_refs.values()),
+             'Details': f"{top(self.other_refs)}; e.g. {', '.join(self.other_ref_samples.items)}"
+                        if self.other_refs else ''}
+        ]
+        if self.known_roles is not None:
+            rows.append({'Check': 'Unknown role names (in no role map)', 'Count': len(self.unknown_roles),
+                         'Details': top(self.unknown_roles)})
+        rows += [{'Check': f"Accounts with {roles} role{'' if roles == 1 else 's'}", 'Count': count, 'Details': ''}
+                 for roles, count in sorted(self.role_counts.items())]
+        return rows
@@ -0,0 +1,232 @@
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from disk_forecast import USAGE_FIELD, FULL_THRESHOLD
+
+LOWER_FIELD = 'dt.davis.forecast.lower'
+UPPER_FIELD = 'dt.davis.forecast.upper'
+POINT_FIELD = 'dt.davis.forecast.point'
+
+# A missing bound counts as the threshold, like the '|| 100' fallback in the JS scripts
+MISSING_BOUND = 100.0
+
+
+def _ragged_matrix(rows: Sequence[Optional[list]], width: int) -> np.ndarray:
+    """Left-aligned (rows x width) float matrix, NaN where a row is short or null"""
+    matrix = np.full((len(rows), width), np.nan)
+    for i, values in enumerate(rows):
+        if values:
+            values = values[:width]
+            matrix[i, :len(values)] = np.array(values, dtype=float)  # None -> nan
+    return matrix
+
+
+def _last_value(values: Optional[list]) -> float:
+    for value in reversed(values or []):
+        if value is not None:
+            return float(value)
+    return np.nan
+
+
+def load_analyzer_outputs(predictions: Iterable[Dict[str, Any]], horizon: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Load GenericForecastAnalyzer output entries into 2-D arrays, one row per series
+
+    Args:
+        predictions: Entries of result.output, from any number of executions
+        horizon: Forecast days to keep (defaults to the longest forecast)
+
+    Returns:
+        {'diskIds', 'diskNames', 'hostIds', 'hostNames' (lists), 'valid' (bool),
+         'currentUsage' (float), 'lower', 'upper', 'point' (rows x horizon float, NaN padded)}
+    """
+    meta = {'diskIds': [], 'diskNames': [], 'hostIds': [], 'hostNames': []}
+    valid, current, lowers, uppers, points = [], [], [], [], []
+
+    for prediction in predictions:
+        forecast_record = ((prediction.get('timeSeriesDataWithPredictions') or {}).get('records') or [{}])[0] or {}
+        history_record = ((prediction.get('analyzedTimeSeriesQuery') or {}).get('records') or [{}])[0] or {}
+
+        meta['diskIds'].append(forecast_record.get('dt.entity.disk'))
+        meta['diskNames'].append(forecast_record.get('disk.name'))
+        meta['hostIds'].append(forecast_record.get('dt.entity.host'))
+        meta['hostNames'].append(forecast_record.get('host.name'))
+        valid.append(prediction.get('analysisStatus', 'OK') == 'OK'
+                     and prediction.get('forecastQualityAssessment') == 'VALID')
+        current.append(_last_value(history_record.get(USAGE_FIELD) or forecast_record.get(USAGE_FIELD)))
+        lowers.append(forecast_record.get(LOWER_FIELD))
+        uppers.append(forecast_record.get(UPPER_FIELD))
+        points.append(forecast_record.get(POINT_FIELD))
+
+    width = horizon if horizon is not None else max((len(r or []) for r in lowers + uppers), default=0)
+    return dict(
+        meta,
+        valid=np.array(valid, dtype=bool),
+        currentUsage=np.array(current, dtype=float),
+        lower=_ragged_matrix(lowers, width),
+        upper=_ragged_matrix(uppers, width),
+        point=_ragged_matrix(points, width)
+    )
+
+
+def analyze_forecasts(forecasts: Dict[str, Any], threshold: float = FULL_THRESHOLD) -> Dict[str, np.ndarray]:
+    """
+    Canonical days-to-full and confidence for every row in one vectorized pass
+
+    - dayIndex: first forecast day whose lower bound reaches the threshold (-1 if none)
+    - daysUntilFull: dayIndex + 1 (0 where the disk does not fill within the horizon)
+    - intervalWidth: upper - lower at dayIndex, missing bounds counted as the threshold, clipped to 0..100
+    - confidence: 1 - intervalWidth / 100 rounded to 2 decimals (0 where the disk does not fill)
+    - violation: valid forecast, fills within the horizon and not already full
+
+    Unlike the JS '|| 100' fallback, a bound of exactly 0 is treated as a real value.
+    """
+    lower, upper = forecasts['lower'], forecasts['upper']
+    rows = np.arange(lower.shape[0])
+
+    with np.errstate(invalid='ignore'):
+        crossed = lower >= threshold  # NaN compares False
+    fills = crossed.any(axis=1)
+    day_index = np.where(fills, crossed.argmax(axis=1), -1)
+
+    at = np.maximum(day_index, 0)
+    if lower.shape[1]:
+        low = np.where(np.isnan(lower[rows, at]), MISSING_BOUND, lower[rows, at])
+        high = np.where(np.isnan(upper[rows, at]), MISSING_BOUND, upper[rows, at])
+    else:
+        low = high = np.full(len(rows), MISSING_BOUND)
+    width = np.where(fills, np.clip(high - low, 0.0, 100.0), np.nan)
+    confidence = np.where(fills, np.round(1 - width / 100, 2), 0.0)
+
+    current = forecasts['currentUsage']
+    already_full = ~np.isnan(current) & (current >= threshold)
+    return {
+        'dayIndex': day_index,
+        'daysUntilFull': np.where(fills, day_index + 1, 0),
+        'intervalWidth': width,
+        'confidence': confidence,
+        'violation': forecasts['valid'] & fills & ~already_full
+    }
+
+
+def forecast_violations(
+        forecasts: Dict[str, Any],
+        analysis: Dict[str, np.ndarray],
+        now: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """Violation rows in the workflow shape, soonest full first"""
+    now = now or datetime.now(timezone.utc)
+    selected = np.flatnonzero(analysis['violation'])
+    selected = selected[np.argsort(analysis['daysUntilFull'][selected], kind='stable')]
+
+    violations = []
+    for i in selected:
+        days = int(analysis['daysUntilFull'][i])
+        current = forecasts['currentUsage'][i]
+        violations.append({
+            'diskId': forecasts['diskIds'][i],
+            'diskName': forecasts['diskNames'][i],
+            'hostId': forecasts['hostIds'][i],
+            'hostName': forecasts['hostNames'][i],
+            'currentUsage': None if np.isnan(current) else float(current),
+            'daysUntilFull': days,
+            'predictedDate': (now + timedelta(days=days)).isoformat(),
+            'certainty': float(analysis['confidence'][i])
+        })
+    return violations
+
+
+def validate_violations(
+        forecasts: Dict[str, Any],
+        analysis: Dict[str, np.ndarray],
+        reported: Iterable[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Compare violations produced elsewhere (e.g. a JS script's predictionSummary) with the canonical result
+
+    Accepts the field variants found in the scripts: daysUntilFull/daysLeft and certainty/confidence.
+
+    Returns:
+        Mismatches as {'diskId', 'field', 'expected', 'actual'}
+    """
+    expected = {v['diskId']: v for v in forecast_violations(forecasts, analysis)}
+    mismatches = []
+    seen = set()
+
+    for violation in reported:
+        disk_id = violation.get('diskId')
+        seen.add(disk_id)
+        canonical = expected.get(disk_id)
+        if canonical is None:
+            mismatches.append({'diskId': disk_id, 'field': 'violation', 'expected': False, 'actual': True})
+            continue
+
+        days = violation.get('daysUntilFull', violation.get('daysLeft'))
+        if days != canonical['daysUntilFull']:
+            mismatches.append({'diskId': disk_id, 'field': 'daysUntilFull',
+                               'expected': canonical['daysUntilFull'], 'actual': days})
+
+        certainty = violation.get('certainty', violation.get('confidence'))
+        if certainty is not None and abs(float(certainty) - canonical['certainty']) > 0.005:
+            mismatches.append({'diskId': disk_id, 'field': 'certainty',
+                               'expected': canonical['certainty'], 'actual': certainty})
+
+    for disk_id in expected:
+        if disk_id not in seen:
+            mismatches.append({'diskId': disk_id, 'field': 'violation', 'expected': True, 'actual': False})
+    return mismatches
+
+
+def main():
+    # Usage: python forecast_analysis.py [analyzer_output.json [js_prediction_summary.json]]
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding='utf-8') as f:
+            data = json.load(f)
+        predictions = data.get('result', data).get('output', []) if isinstance(data, dict) else data
+        forecasts = load_analyzer_outputs(predictions)
+        analysis = analyze_forecasts(forecasts)
+        violations = forecast_violations(forecasts, analysis)
+        print(f"{len(predictions)} forecasts, {len(violations)} violations")
+
+        if len(sys.argv) > 2:
+            with open(sys.argv[2], encoding='utf-8') as f:
+                summary = json.load(f)
+            mismatches = validate_violations(forecasts, analysis, summary.get('violations', []))
+            print(f"{len(mismatches)} mismatches against {sys.argv[2]}")
+            for mismatch in mismatches[:20]:
+                print(f"- {mismatch}")
+        return
+
+    # Synthetic benchmark: 100k disks x 90 forecast days
+    disks, horizon = 100000, 90
+    rng = np.random.default_rng(42)
+    start_usage = rng.uniform(20, 95, size=(disks, 1))
+    growth = rng.uniform(-0.2, 1.0, size=(disks, 1))
+    point = start_usage + growth * np.arange(1, horizon + 1)
+    spread = 0.5 + 0.4 * np.sqrt(np.arange(1, horizon + 1))
+    forecasts = {
+        'diskIds': [f"DISK-{i:016X}" for i in range(disks)],
+        'diskNames': [None] * disks,
+        'hostIds': [None] * disks,
+        'hostNames': [None] * disks,
+        'valid': np.ones(disks, dtype=bool),
+        'currentUsage': start_usage[:, 0],
+        'lower': point - spread,
+        'upper': point + spread,
+        'point': point
+    }
+
+    started = time.perf_counter()
+    analysis = analyze_forecasts(forecasts)
+    elapsed = time.perf_counter() - started
+    print(f"Analyzed {disks} forecasts x {horizon} days in {elapsed * 1000:.1f} ms, "
+          f"{int(analysis['violation'].sum())} disks fill within the horizon")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+# Completed disks are reused for this long before they are forecast again
+DEFAULT_FRESHNESS_SECONDS = 24 * 3600
+
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS disk_checkpoints (
+    disk_id      TEXT PRIMARY KEY,
+    status       TEXT NOT NULL,
+    violation    TEXT,
+    error        TEXT,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    run_id       TEXT,
+    computed_at  REAL NOT NULL
+)
+"""
+
+
+class CheckpointStore:
+    def __init__(self, path: str = 'disk_forecast_checkpoints.db', commit_every: int = 100):
+        """
+        Durable per-disk record of forecast results, so interrupted or retried runs resume
+
+        Args:
+            path: SQLite database file (':memory:' for a throwaway store)
+            commit_every: Records buffered before they are committed
+        """
+        self.path = path
+        self.commit_every = max(1, commit_every)
+        self._pending_writes = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(_SCHEMA)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
+
+    def flush(self):
+        with self._lock:
+            self.conn.commit()
+            self._pending_writes = 0
+
+    def record(
+            self,
+            disk_id: str,
+            status: str,
+            violation: Optional[Dict[str, Any]] = None,
+            error: Optional[str] = None,
+            run_id: Optional[str] = None,
+            computed_at: Optional[float] = None
+    ):
+        """
+        Store the outcome for one disk, replacing any earlier outcome
+
+        Args:
+            disk_id: Disk entity ID
+            status: STATUS_COMPLETED or STATUS_FAILED
+            violation: Violation row when the disk is predicted to fill up, None otherwise
+            error: Error message for failed disks
+            run_id: Identifier of the run that produced the outcome
+            computed_at: Epoch seconds of the outcome (defaults to now)
+        """
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT INTO disk_checkpoints (disk_id, status, violation, error, attempts, run_id, computed_at)
+                VALUES (?, ?, ?, ?, 1, ?, ?)
+                ON CONFLICT(disk_id) DO UPDATE SET
+                    status = excluded.status,
+                    violation = excluded.violation,
+                    error = excluded.error,
+                    attempts = disk_checkpoints.attempts + 1,
+                    run_id = excluded.run_id,
+                    computed_at = excluded.computed_at
+                """,
+                (disk_id, status, json.dumps(violation) if violation is not None else None, error, run_id,
+                 computed_at if computed_at is not None else time.time())
+            )
+            self._pending_writes += 1
+            if self._pending_writes >= self.commit_every:
+                self.conn.commit()
+                self._pending_writes = 0
+
+    def get(self, disk_id: str) -> Optional[Dict[str, Any]]:
+        """Stored outcome for one disk, or None"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT disk_id, status, violation, error, attempts, run_id, computed_at '
+                'FROM disk_checkpoints WHERE disk_id = ?', (disk_id,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def fresh_disk_ids(self, freshness_seconds: float = DEFAULT_FRESHNESS_SECONDS, now: Optional[float] = None) -> set:
+        """IDs of disks completed within the freshness window"""
+        cutoff = (now if now is not None else time.time()) - freshness_seconds
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT disk_id FROM disk_checkpoints WHERE status = ? AND computed_at >= ?',
+                (STATUS_COMPLETED, cutoff)).fetchall()
+        return {row[0] for row in rows}
+
+    def stale_disks(
+            self,
+            disk_ids: Iterable[str],
+            freshness_seconds: float = DEFAULT_FRESHNESS_SECONDS,
+            now: Optional[float] = None
+    ) -> List[str]:
+        """Disks that still need a forecast: never seen, failed, or completed before the freshness window"""
+        fresh = self.fresh_disk_ids(freshness_seconds, now)
+        return [disk_id for disk_id in disk_ids if disk_id not in fresh]
+
+    def violations(self, disk_ids: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Stored violation rows of completed disks (optionally restricted to disk_ids), soonest full first"""
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT disk_id, violation FROM disk_checkpoints WHERE status = ? AND violation IS NOT NULL',
+                (STATUS_COMPLETED,)).fetchall()
+        wanted = set(disk_ids) if disk_ids is not None else None
+        violations = [json.loads(violation) for disk_id, violation in rows if wanted is None or disk_id in wanted]
+        return sorted(violations, key=lambda v: v['daysUntilFull'])
+
+    def counts(self) -> Dict[str, int]:
+        """Number of stored disks per status"""
+        with self._lock:
+            return dict(self.conn.execute('SELECT status, COUNT(*) FROM disk_checkpoints GROUP BY status').fetchall())
+
+
+def _row_to_dict(row) -> Dict[str, Any]:
+    disk_id, status, violation, error, attempts, run_id, computed_at = row
+    return {
+        'diskId': disk_id,
+        'status': status,
+        'violation': json.loads(violation) if violation else None,
+        'error': error,
+        'attempts': attempts,
+        'runId': run_id,
+        'computedAt': computed_at
+    }
@@ -0,0 +1,313 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import requests
+
+from D_daskboard import RETRYABLE_STATUS_CODES, THROTTLED_STATUS_CODES, _retry_after_seconds
+from forecast_analysis import analyze_forecasts, forecast_violations, load_analyzer_outputs
+from forecast_checkpoint import CheckpointStore, DEFAULT_FRESHNESS_SECONDS, STATUS_COMPLETED, STATUS_FAILED
+from dql_client import build_query
+
+ANALYZER_NAME = 'dt.statistics.GenericForecastAnalyzer'
+ANALYZER_PATH = '/platform/davis/analyzers/v1/analyzers'
+
+
+class AnalyzerError(RuntimeError):
+    """Raised when an analyzer execution fails, is aborted or times out"""
+
+
+class AnalyzerClient:
+    def __init__(self, base_url: str, token: str, pool_size: int = 16, max_retries: int = 5):
+        """
+        Minimal Davis analyzer API client
+
+        Args:
+            base_url: Dynatrace platform URL (e.g., 'abc12345.apps.dynatrace.com'); a scheme may be given
+            token: Platform token or OAuth bearer token with analyzer execution scopes
+            pool_size: Pooled connections, should be at least the number of in-flight executions
+            max_retries: How many times a throttled (HTTP 429) or failed (HTTP 5xx) request is retried;
+                execute, which starts a new execution each time, is only retried when throttled
+        """
+        self.base_url = base_url.rstrip('/')
+        self.api_root = self.base_url if '://' in self.base_url else f"https://{self.base_url}"
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/json'
+        })
+
+    def _request(self, method: str, url: str, retry_statuses: frozenset = RETRYABLE_STATUS_CODES,
+                 **kwargs) -> Dict[str, Any]:
+        attempt = 0
+        while True:
+            response = self.session.request(method, url, timeout=60, **kwargs)
+            if response.status_code not in retry_statuses or attempt >= self.max_retries:
+                if response.status_code >= 400:
+                    raise AnalyzerError(f"HTTP {response.status_code}: {response.text[:300]}")
+                return response.json()
+            attempt += 1
+            time.sleep(_retry_after_seconds(response.headers.get('Retry-After'), attempt))
+
+    def execute(self, analyzer_name: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        # A 5xx may come after the execution was started; retrying it could start a duplicate
+        return self._request('POST', f"{self.api_root}{ANALYZER_PATH}/{analyzer_name}:execute",
+                             retry_statuses=THROTTLED_STATUS_CODES, data=json.dumps(body))
+
+    def poll(self, analyzer_name: str, request_token: str) -> Dict[str, Any]:
+        return self._request('GET', f"{self.api_root}{ANALYZER_PATH}/{analyzer_name}:poll",
+                             params={'request-token': request_token})
+
+    def close(self):
+        self.session.close()
+
+
+def output_to_violation(output: List[Dict[str, Any]], disk: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Violation row for the series of an execution that fills up soonest, or None
+
+    Days-to-full and certainty come from the canonical definitions in forecast_analysis;
+    disk fields missing from the forecast record are taken from the submitted disk.
+    """
+    forecasts = load_analyzer_outputs(output)
+    violations = forecast_violations(forecasts, analyze_forecasts(forecasts))
+    if not violations:
+        return None
+    violation = violations[0]
+    for field, disk_field in (('diskId', 'id'), ('diskName', 'name'), ('hostId', 'host'), ('hostName', 'hostName')):
+        if violation[field] is None:
+            violation[field] = disk.get(disk_field)
+    return violation
+
+
+class AdaptivePoller:
+    """
+    Poll schedule shared by all executions
+
+    The first poll is placed at a fraction of the typical execution time observed so far
+    (an exponentially weighted moving average), later polls back off exponentially with jitter.
+    Fast analyzers are therefore picked up quickly and slow ones are not hammered.
+    """
+
+    def __init__(self, initial: float = 0.2, maximum: float = 5.0, multiplier: float = 1.6, first_fraction: float = 0.8):
+        self.initial = initial
+        self.maximum = maximum
+        self.multiplier = multiplier
+        self.first_fraction = first_fraction
+        self._typical = None
+        self._lock = threading.Lock()
+
+    def first_delay(self) -> float:
+        with self._lock:
+            typical = self._typical
+        if typical is None:
+            return self.initial
+        return min(self.maximum, max(self.initial, typical * self.first_fraction))
+
+    def next_delay(self, previous: float) -> float:
+        return min(self.maximum, previous * self.multiplier) * random.uniform(0.85, 1.15)
+
+    def observe(self, duration: float):
+        with self._lock:
+            self._typical = duration if self._typical is None else 0.8 * self._typical + 0.2 * duration
+
+
+class ForecastOrchestrator:
+    def __init__(
+            self,
+            client: AnalyzerClient,
+            analyzer_name: str = ANALYZER_NAME,
+            max_in_flight: int = 8,
+            forecast_horizon: int = 90,
+            history_days: int = 30,
+            execution_timeout: float = 120.0,
+            poller: Optional[AdaptivePoller] = None
+    ):
+        """
+        Run the forecast analyzer for many disks concurrently
+
+        Args:
+            client: Analyzer API client
+            analyzer_name: Davis analyzer to execute
+            max_in_flight: Maximum number of analyzer executions running at once
+            forecast_horizon: Days to forecast
+            history_days: Days of dt.host.disk.used.percent history fed to the analyzer
+            execution_timeout: Seconds before a single execution is abandoned
+            poller: Poll schedule (defaults to AdaptivePoller())
+        """
+        self.client = client
+        self.analyzer_name = analyzer_name
+        self.max_in_flight = max(1, max_in_flight)
+        self.forecast_horizon = forecast_horizon
+        self.history_days = history_days
+        self.execution_timeout = execution_timeout
+        self.poller = poller or AdaptivePoller()
+
+    def _analyze_disk(self, disk: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Execute and poll the analyzer for one disk; returns a violation or None"""
+        body = {
+            'timeSeriesData': {
+                'expression': build_query('disk_used_percent_daily', days=self.history_days, disk_ids=[disk['id']])
+            },
+            'forecastHorizon': self.forecast_horizon
+        }
+        started = time.monotonic()
+        response = self.client.execute(self.analyzer_name, body)
+        result = response.get('result') or {}
+
+        delay = self.poller.first_delay()
+        last_running = 0.0
+        while result.get('executionStatus') != 'COMPLETED':
+            if result.get('executionStatus') in ('ABORTED', 'FAILED'):
+                raise AnalyzerError(f"Analyzer {result.get('executionStatus')} for disk {disk['id']}")
+            last_running = time.monotonic() - started
+            if last_running + delay > self.execution_timeout:
+                raise AnalyzerError(f"Analyzer did not complete within {self.execution_timeout}s for disk {disk['id']}")
+            time.sleep(delay)
+            result = self.client.poll(self.analyzer_name, response['requestToken']).get('result') or {}
+            delay = self.poller.next_delay(delay)
+
+        # The execution finished somewhere between the last RUNNING answer and now; observing the
+        # midpoint keeps poll overshoot from inflating the estimate run after run
+        self.poller.observe((last_running + time.monotonic() - started) / 2)
+
+        return output_to_violation(result.get('output') or [], disk)
+
+    def iter_results(self, disks: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Analyze disks concurrently and yield one event per disk as soon as it finishes
+
+        Yields:
+            {'disk': disk, 'violation': dict or None, 'error': str or None}
+        """
+        disks = [disk for disk in disks if disk.get('id')]
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            futures = {executor.submit(self._analyze_disk, disk): disk for disk in disks}
+            for future in as_completed(futures):
+                disk = futures[future]
+                try:
+                    yield {'disk': disk, 'violation': future.result(), 'error': None}
+                except Exception as e:
+                    yield {'disk': disk, 'violation': None, 'error': str(e)}
+
+    def run(
+            self,
+            disks: Iterable[Dict[str, Any]],
+            on_violation: Optional[Callable[[Dict[str, Any]], None]] = None,
+            checkpoint: Optional[CheckpointStore] = None,
+            freshness_seconds: float = DEFAULT_FRESHNESS_SECONDS,
+            max_disks: Optional[int] = None,
+            run_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze all disks and collect a prediction summary like DTScript1.js
+
+        With a checkpoint store, disks completed within the freshness window are skipped and every
+        outcome is recorded as soon as it arrives, so a retried run only does the remaining work.
+
+        Args:
+            disks: Disk records with at least 'id' (optionally name, host, hostName)
+            on_violation: Called for each newly found violation as soon as it is found
+            checkpoint: Optional store of per-disk outcomes to resume from and write to
+            freshness_seconds: Age after which a checkpointed result is recomputed
+            max_disks: Analyze at most this many disks in this run; the rest is reported as incomplete
+            run_id: Identifier stored with each checkpointed outcome
+
+        Returns:
+            {'status': 'complete'|'incomplete', 'violations': [...], 'errors': [...],
+             'metrics': {'totalDisks', 'skippedDisks', 'processedDisks', 'analyzedDisks', 'failedDisks', 'elapsedSeconds'}}
+        """
+        started = time.monotonic()
+        disks = [disk for disk in disks if disk.get('id')]
+        todo = disks
+        if checkpoint is not None:
+            stale = set(checkpoint.stale_disks([disk['id'] for disk in disks], freshness_seconds))
+            todo = [disk for disk in disks if disk['id'] in stale]
+        skipped = len(disks) - len(todo)
+        remaining = todo[max_disks:] if max_disks is not None else []
+        todo = todo[:max_disks] if max_disks is not None else todo
+
+        summary = {
+            'status': 'incomplete' if remaining else 'complete',
+            'violations': [],
+            'errors': [],
+            'metrics': {'totalDisks': len(disks), 'skippedDisks': skipped, 'processedDisks': len(todo),
+                        'analyzedDisks': 0, 'failedDisks': 0}
+        }
+
+        try:
+            for event in self.iter_results(todo):
+                disk_id = event['disk']['id']
+                if event['error']:
+                    summary['metrics']['failedDisks'] += 1
+                    summary['errors'].append({'diskId': disk_id, 'error': event['error']})
+                    if checkpoint is not None:
+                        checkpoint.record(disk_id, STATUS_FAILED, error=event['error'], run_id=run_id)
+                    continue
+                summary['metrics']['analyzedDisks'] += 1
+                if checkpoint is not None:
+                    checkpoint.record(disk_id, STATUS_COMPLETED, violation=event['violation'], run_id=run_id)
+                if event['violation']:
+                    summary['violations'].append(event['violation'])
+                    if on_violation:
+                        on_violation(event['violation'])
+        finally:
+            if checkpoint is not None:
+                checkpoint.flush()
+
+        if checkpoint is not None:
+            # Include violations found by earlier runs that are still fresh
+            summary['violations'] = checkpoint.violations([disk['id'] for disk in disks])
+        else:
+            summary['violations'].sort(key=lambda v: v['daysUntilFull'])
+        summary['metrics']['elapsedSeconds'] = round(time.monotonic() - started, 3)
+        return summary
+
+
+def main():
+    from mock_dynatrace_server import MockDynatraceServer, generate_disk_inventory
+
+    # Run against the local stand-in analyzer; replace with a real platform URL and token to go live
+    DISKS = 200
+    with MockDynatraceServer(
+            api_token='demo',
+            disks=generate_disk_inventory(disk_count=DISKS),
+            analyzer_duration=1.0,
+            analyzer_max_concurrent=32
+    ) as server:
+        client = AnalyzerClient(server.url, 'demo')
+        orchestrator = ForecastOrchestrator(client, max_in_flight=32)
+        disks = [{'id': disk['id'], 'name': disk['name'], 'host': disk['host_id'], 'hostName': disk['host_name']}
+                 for disk in server.state.disks]
+
+        # Two passes over a throwaway checkpoint: the second run resumes where the first stopped
+        with CheckpointStore(':memory:') as checkpoint:
+            for run in (1, 2):
+                print(f"\nRun {run}: forecasting up to {DISKS // 2} of {len(disks)} disks, "
+                      f"{orchestrator.max_in_flight} executions in flight...")
+                summary = orchestrator.run(
+                    disks,
+                    on_violation=lambda v: print(f"  {v['diskId']} full in {v['daysUntilFull']} days ({v['certainty']})"),
+                    checkpoint=checkpoint,
+                    max_disks=DISKS // 2,
+                    run_id=f"demo-{run}")
+                metrics = summary['metrics']
+                print(f"Run {run} {summary['status']}: analyzed {metrics['analyzedDisks']}, skipped {metrics['skippedDisks']}, "
+                      f"failed {metrics['failedDisks']}, {len(summary['violations'])} violations so far "
+                      f"in {metrics['elapsedSeconds']}s")
+
+        stats = server.state.stats
+        print(f"Server: {stats['analyzer_executions']} executions, {stats['analyzer_polls']} polls, "
+              f"peak {stats['analyzer_peak_running']} running, {stats['throttled']} throttled")
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import hashlib
+import itertools
+import math
+
+import numpy as np
+
+# 2^14 registers: 16 KB per sketch, about 0.8% standard error
+PRECISION = 14
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count sketch over strings, filled a batch at a time with NumPy
+
+    Keys are hashed to 64 bits (BLAKE2b). The first `precision` bits pick a register, which keeps
+    the longest run of leading zeros seen in the remaining bits. Sketches of the same precision
+    merge losslessly, so the union of two sources is estimated without re-reading either.
+    """
+
+    def __init__(self, precision=PRECISION):
+        """
+        Args:
+            precision: Register index bits, 11 to 18 (2^precision one-byte registers)
+        """
+        # Up to 18 index bits the remaining (at most 53) bits convert to float64 exactly
+        if not 11 <= precision <= 18:
+            raise ValueError(f"precision must be between 11 and 18, got {precision}")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, keys):
+        """Add a batch of keys (a list)"""
+        if not keys:
+            return
+        digests = b''.join(hashlib.blake2b(str(key).encode('utf-8'), digest_size=8).digest() for key in keys)
+        hashes = np.frombuffer(digests, dtype=np.uint64)
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.int64)
+        rest = hashes & np.uint64((1 << width) - 1)
+        # Leading zeros within the remaining bits, plus one; frexp's exponent is the bit length
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        np.maximum.at(self.registers, index, (width + 1 - bit_length).astype(np.uint8))
+
+    def update(self, keys, batch_size=4096):
+        """Add the keys of any iterable, batch_size at a time"""
+        keys = iter(keys)
+        while True:
+            batch = list(itertools.islice(keys, batch_size))
+            if not batch:
+                return
+            self.add(batch)
+
+    def merge(self, other):
+        """Sketch of the union of both sources"""
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge sketches of precision {self.precision} and {other.precision}")
+        merged = HyperLogLog(self.precision)
+        np.maximum(self.registers, other.registers, out=merged.registers)
+        return merged
+
+    def count(self):
+        """
+        Estimated number of distinct keys added
+
+        Ertl's improved estimator ("New cardinality estimation algorithms for HyperLogLog
+        sketches", 2017): unbiased over the whole range, where the classic raw estimate with
+        linear counting overestimates by a few percent between 2.5 and 5 times the register count.
+        """
+        m = len(self.registers)
+        width = 64 - self.precision
+        histogram = np.bincount(self.registers, minlength=width + 2)
+        z = m * _tau(1 - histogram[width + 1] / m)
+        for k in range(width, 0, -1):
+            z = 0.5 * (z + histogram[k])
+        z += m * _sigma(histogram[0] / m)
+        return m * m / (2 * math.log(2) * z)
+
+    @property
+    def std_error(self):
+        """Relative standard error of count()"""
+        return 1.04 / math.sqrt(len(self.registers))
+
+
+def _sigma(x):
+    if x == 1:
+        return math.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous, z = z, z + x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def _tau(x):
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = math.sqrt(x)
+        y *= 0.5
+        previous, z = z, z - (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
@@ -0,0 +1,181 @@
+import itertools
+import re
+from collections import deque
+
+from sort_merge import RUN_SIZE, external_sort
+
+# IDs compared with this many neighbours in each sorted order
+WINDOW = 8
+# Shortest ID a prefix/suffix or missing-character match is trusted for
+MIN_LENGTH = 4
+
+_NOT_ALNUM = re.compile(r'[^0-9A-Z]')
+
+
+def normalize_id(value, original_ids=None):
+    """
+    Canonical key of a user ID from the XML feed or an Excel cell, None for a missing or blank one
+
+    Removes whitespace (including non-breaking spaces), upper-cases, turns numbers Excel stored
+    as floats back into integers (12345.0 and '12345.0' -> '12345') and drops the leading zeros
+    of all-digit IDs, which Excel loses when it stores them as numbers ('0012345' -> '12345').
+
+    Args:
+        value: Raw ID (feed attribute or cell value)
+        original_ids: Dict that collects key -> the ID as its source wrote it, for IDs whose key
+            differs from that text, so reports can show the original (the first such spelling is kept)
+    """
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    key = ''.join(text.split()).upper()
+    if key.endswith('.0') and key[:-2].isascii() and key[:-2].isdigit():
+        key = key[:-2]
+    if key.isascii() and key.isdigit():
+        key = key.lstrip('0') or '0'
+    if not key:
+        return None
+    if original_ids is not None and key != text:
+        original_ids.setdefault(key, text)
+    return key
+
+
+class OriginalIds:
+    """
+    Report view of normalized user IDs: each one as its source wrote it (see normalize_id)
+
+    Wraps a list or RowSpool without copying it, so spooled sheets stay on disk. Supports len(),
+    truth testing and iteration like what it wraps.
+    """
+
+    def __init__(self, items, original_ids=None, columns=None):
+        """
+        Args:
+            items: Normalized IDs, or row dicts holding them
+            original_ids: key -> original ID, when the items are IDs
+            columns: {column: key -> original ID} of the ID columns, when the items are rows
+        """
+        self.items = items
+        self.original_ids = original_ids or {}
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        if self.columns is None:
+            for user_id in self.items:
+                yield self.original_ids.get(user_id, user_id)
+            return
+        for row in self.items:
+            row = dict(row)
+            for column, original_ids in self.columns.items():
+                row[column] = original_ids.get(row[column], row[column])
+            yield row
+
+
+def original_pair(pair, excel_ids, xml_ids):
+    """A mapped pair 'ACF2ID (Excel) ↔ NOVELLID (XML)' with both IDs as their sources wrote them"""
+    acf2id, novellid = pair[:-len(' (XML)')].split(' (Excel) ↔ ')
+    return f"{excel_ids.get(acf2id, acf2id)} (Excel) ↔ {xml_ids.get(novellid, novellid)} (XML)"
+
+
+def _loose(key):
+    return _NOT_ALNUM.sub('', key)
+
+
+def near_match_reason(a, b):
+    """
+    Why two distinct normalized IDs likely belong to the same user, or None
+
+    Substituted characters and swapped digits are not a reason: in sequential schemes
+    (U000123 / U000124 / U000132) they are usually different users.
+    """
+    if _loose(a) == _loose(b):
+        return 'Differs only in punctuation'
+    short, long = sorted((a, b), key=len)
+    if len(short) >= MIN_LENGTH and (long.startswith(short) or long.endswith(short)):
+        return 'Extra prefix/suffix'
+    if len(a) == len(b):
+        diffs = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(diffs) == 2 and diffs[1] == diffs[0] + 1 and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]] \
+                and not a[diffs[0]:diffs[1] + 1].isdigit():
+            return 'Transposed characters'
+    elif len(long) == len(short) + 1 and len(short) >= MIN_LENGTH:
+        i = next((i for i in range(len(short)) if short[i] != long[i]), len(short))
+        if short[i:] == long[i + 1:]:
+            return 'Missing character'
+    return None
+
+
+def near_duplicates(only_in_xml, only_in_excel, window=WINDOW, run_size=RUN_SIZE):
+    """
+    Find likely-same IDs among the users only one side has
+
+    Sorted-neighbourhood blocking: the IDs of both sides are sorted by their alphanumeric
+    characters, once forwards (shared prefixes end up together) and once reversed (shared
+    suffixes), and each ID is only checked against its `window` next neighbours from the other
+    side. That is O((n + m) * window) checks instead of n * m.
+
+    Both sides are read once per sort order and sorted externally, so they may be streams or
+    spools larger than memory; memory holds run_size IDs, the window and the pairs found.
+
+    Args:
+        only_in_xml: Normalized user IDs found only in the XML (an iterable that can be read twice)
+        only_in_excel: Normalized user IDs found only in Excel (likewise)
+        window: Neighbours checked per ID in each sort order
+        run_size: IDs sorted in memory before a run is spilled (see sort_merge.external_sort)
+
+    Returns:
+        Rows {'XML_User_ID', 'Excel_User_ID', 'Reason'} sorted by XML ID
+    """
+    pairs = {}
+    for block_key in (_loose, lambda user_id: _loose(user_id)[::-1]):
+        entries = itertools.chain(((block_key(user_id), user_id, 0) for user_id in only_in_xml),
+                                  ((block_key(user_id), user_id, 1) for user_id in only_in_excel))
+        recent = deque(maxlen=window)
+        previous = None
+        for entry in external_sort(entries, run_size):
+            if entry == previous:
+                continue
+            previous = entry
+            _, user_id, side = entry
+            for _, other_id, other_side in recent:
+                if other_side == side:
+                    continue
+                pair = (user_id, other_id) if side == 0 else (other_id, user_id)
+                if pair not in pairs:
+                    reason = near_match_reason(user_id, other_id)
+                    if reason:
+                        pairs[pair] = reason
+            recent.append(entry)
+
+    return [{'XML_User_ID': xml_id, 'Excel_User_ID': excel_id, 'Reason': reason}
+            for (xml_id, excel_id), reason in sorted(pairs.items())]
+
+
+def finish_results(results, profile, excel_original_ids):
+    """
+    Post-compare step every comparator shares, whatever mode produced its results
+
+    Adds (in place) the near matches among the users only one side has, the feed profile's report
+    rows, and both sides' normalized id -> id as written maps, so the reports can show IDs as their
+    sources wrote them.
+
+    Args:
+        results: Comparison results with 'only_in_xml' and 'only_in_excel'
+        profile: FeedProfile that observed the XML feed (duplicates already confirmed, if bounded)
+        excel_original_ids: normalized id -> id as the workbook wrote it, from parse_excel
+
+    Returns:
+        The results
+    """
+    # Sorted externally, so a spooled XML-only list is never loaded into memory
+    results['near_matches'] = near_duplicates(results['only_in_xml'], results['only_in_excel'])
+    results['feed_profile'] = profile.rows()
+    # Matched on normalized IDs, reported as written
+    results['xml_original_ids'] = profile.original_ids
+    results['excel_original_ids'] = excel_original_ids
+    return results
@@ -0,0 +1,65 @@
+import numpy as np
+
+
+def membership_matrix(sources, canonical=None):
+    """
+    Build a user x source membership matrix, one bit per source
+
+    Args:
+        sources: {source name: iterable of user IDs}, in bit order (at most 32 sources)
+        canonical: {user id: canonical id}; IDs of one person (ACF2ID/NOVELLID) share a row
+
+    Returns:
+        (canonical user IDs, uint32 array of presence bits, one entry per user)
+    """
+    if len(sources) > 32:
+        raise ValueError(f"At most 32 sources fit in the bitmask, got {len(sources)}")
+    canonical = canonical or {}
+    index = {}
+    positions = []
+    for user_ids in sources.values():
+        rows = [index.setdefault(canonical.get(user_id, user_id), len(index))
+                for user_id in user_ids if user_id is not None and user_id != '']
+        positions.append(np.array(rows, dtype=np.int64))
+
+    bits = np.zeros(len(index), dtype=np.uint32)
+    for bit, rows in enumerate(positions):
+        bits[rows] |= np.uint32(1 << bit)
+    return list(index), bits
+
+
+def presence_patterns(sources, canonical=None, samples=5):
+    """
+    Count users per presence pattern across all sources
+
+    Args:
+        sources: {source name: iterable of user IDs}, in report column order
+        canonical: {user id: canonical id}; IDs of one person (ACF2ID/NOVELLID) share a row
+        samples: Example user IDs listed per pattern
+
+    Returns:
+        Report rows, most common pattern first: a ✓ column per source, then Present_In,
+        Missing_From, Users and Sample_Users
+    """
+    names = list(sources)
+    user_ids, bits = membership_matrix(sources, canonical)
+    if not user_ids:
+        return []
+
+    patterns, counts = np.unique(bits, return_counts=True)
+    # Users grouped by pattern, in the ascending pattern order np.unique reports
+    members = np.argsort(bits, kind='stable')
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    rows = []
+    for p in np.argsort(-counts, kind='stable'):
+        pattern = int(patterns[p])
+        present = [name for bit, name in enumerate(names) if pattern >> bit & 1]
+        row = {name: '✓' if name in present else '' for name in names}
+        row['Present_In'] = ' + '.join(present)
+        row['Missing_From'] = ', '.join(name for name in names if name not in present)
+        row['Users'] = int(counts[p])
+        sample = members[starts[p]:starts[p] + min(samples, counts[p])]
+        row['Sample_Users'] = ', '.join(sorted(str(user_ids[i]) for i in sample))
+        rows.append(row)
+    return rows
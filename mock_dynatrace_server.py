@@ -0,0 +1,898 @@
+import argparse
+import base64
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# Fields returned by the real endpoint when no 'fields' parameter is given
+DEFAULT_FIELDS = ['objectId', 'value']
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# Largest POST batch the mock accepts, mirroring the client's MAX_BATCH_ITEMS
+MAX_POST_ITEMS = 1000
+
+DEFAULT_SCHEMAS = [
+    'builtin:alerting.profile',
+    'builtin:anomaly-detection.metric-events',
+    'builtin:problem.notifications',
+    'builtin:management-zones'
+]
+
+
+def generate_settings_objects(
+        schema_ids: Optional[List[str]] = None,
+        objects_per_schema: int = 1000,
+        scopes_per_schema: int = 5,
+        seed: int = 42
+) -> List[Dict[str, Any]]:
+    """
+    Generate a deterministic synthetic set of settings objects
+
+    Args:
+        schema_ids: Schemas to generate objects for (defaults to DEFAULT_SCHEMAS)
+        objects_per_schema: Number of objects per schema
+        scopes_per_schema: Objects of a schema are spread over this many scopes
+        seed: Random seed so two runs produce the same data
+
+    Returns:
+        List of settings objects shaped like the Settings 2.0 API
+    """
+    rng = random.Random(seed)
+    objects = []
+
+    for schema_id in schema_ids or DEFAULT_SCHEMAS:
+        short_name = schema_id.split(':')[-1]
+        for i in range(objects_per_schema):
+            scope = 'environment' if i % scopes_per_schema == 0 else f"HOST-{i % scopes_per_schema:016X}"
+            objects.append({
+                'objectId': f"{short_name}-{i:08d}",
+                'schemaId': schema_id,
+                'schemaVersion': '1.0.0',
+                'scope': scope,
+                'externalId': f"ext-{short_name}-{i}",
+                'summary': f"{short_name} #{i}",
+                'value': {
+                    'name': f"{short_name} {i}",
+                    'enabled': rng.random() > 0.2,
+                    'threshold': rng.randint(1, 100),
+                    'tags': [f"team:{rng.choice(['ops', 'dba', 'net', 'app'])}"]
+                }
+            })
+
+    return objects
+
+
+GRAIL_EXECUTE_PATH = '/platform/storage/query/v1/query:execute'
+GRAIL_POLL_PATH = '/platform/storage/query/v1/query:poll'
+ANALYZER_PATH_PREFIX = '/platform/davis/analyzers/v1/analyzers/'
+
+_DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def generate_disk_inventory(disk_count: int = 200, disks_per_host: int = 4, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Generate synthetic disks with a per-disk usage trend
+
+    Each disk carries a starting usage, a daily growth (percentage points) and a noise level so
+    generated time series look like real dt.host.disk.used.percent data.
+    """
+    rng = random.Random(seed)
+    mount_points = ['/', '/var', '/opt', '/data', 'C:\\', 'D:\\']
+    disks = []
+
+    for i in range(disk_count):
+        host_index = i // disks_per_host
+        total = rng.choice([50, 100, 250, 500, 1000]) * 1024 ** 3
+        disks.append({
+            'id': f"DISK-{i:016X}",
+            'name': mount_points[i % disks_per_host % len(mount_points)],
+            'host_id': f"HOST-{host_index:016X}",
+            'host_name': f"host-{host_index:04d}",
+            'total': total,
+            'base': rng.uniform(10, 85),
+            'growth': rng.choice([0.0, 0.0, rng.uniform(-0.05, 0.05), rng.uniform(0.1, 1.5)]),
+            'noise': rng.uniform(0.0, 1.5)
+        })
+
+    return disks
+
+
+def disk_usage_series(disk: Dict[str, Any], points: int, step_days: float) -> List[float]:
+    """Deterministic used-percent series for a disk ending now, oldest point first"""
+    rng = random.Random(disk['id'])
+    series = []
+    for p in range(points):
+        days_from_now = (points - 1 - p) * step_days
+        value = disk['base'] + disk['growth'] * (30 - days_from_now) + rng.gauss(0, disk['noise'])
+        series.append(round(min(100.0, max(0.0, value)), 3))
+    return series
+
+
+def _parse_duration(text: Optional[str], default_seconds: int) -> int:
+    match = re.match(r'\s*(\d+)\s*([smhd])', text or '')
+    return int(match.group(1)) * _DURATION_UNITS[match.group(2)] if match else default_seconds
+
+
+def _selected_disks(query: str, disks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Apply 'dt.entity.disk == "X"' and 'in (dt.entity.disk, array(...))' filters"""
+    wanted = set(re.findall(r'dt\.entity\.disk\s*==\s*"([^"]+)"', query))
+    for array_body in re.findall(r'in\s*\(\s*dt\.entity\.disk\s*,\s*array\(([^)]*)\)', query):
+        wanted.update(re.findall(r'"([^"]+)"', array_body))
+    if not wanted:
+        return disks
+    return [disk for disk in disks if disk['id'] in wanted]
+
+
+def synthesize_dql_records(
+        query: str,
+        disks: List[Dict[str, Any]],
+        now: Optional[float] = None,
+        start: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Produce plausible records for the DQL shapes used in this repository
+
+    Supported: 'timeseries <agg>(metric), ... from: now()-Nd, interval: ...' (one record per disk),
+    'fetch dt.entity.disk', 'fetch dt.entity.host' and 'fetch <metric> | summarize ... by ...'.
+    For binned summaries, 'now' and 'start' (epoch seconds) act as the query timeframe; values
+    depend only on subject and bin, so refetching a range returns the same data.
+
+    Raises:
+        ValueError: For query shapes the mock does not understand
+    """
+    now = now if now is not None else time.time()
+    text = ' '.join(query.split())
+    limit_match = re.search(r'\|\s*limit\s+(\d+)', text)
+    limit = int(limit_match.group(1)) if limit_match else None
+
+    if text.startswith('timeseries '):
+        aggregation = text[len('timeseries '):].split(',')[0].strip()
+        from_match = re.search(r'from:\s*now\(\)\s*-\s*(\d+[smhd])', text)
+        interval_match = re.search(r'interval:\s*(\d+[smhd])', text)
+        span = _parse_duration(from_match.group(1) if from_match else None, 2 * 3600)
+        step = _parse_duration(interval_match.group(1) if interval_match else None, 86400 if span >= 2 * 86400 else 300)
+        points = max(1, span // step)
+        start = now - points * step
+        records = [{
+            'timeframe': {'start': _iso(start), 'end': _iso(now)},
+            'interval': str(step * 10 ** 9),
+            'dt.entity.disk': disk['id'],
+            'dt.entity.host': disk['host_id'],
+            'disk.name': disk['name'],
+            'host.name': disk['host_name'],
+            aggregation: disk_usage_series(disk, points, step / 86400)
+        } for disk in _selected_disks(text, disks)]
+
+    elif text.startswith('fetch dt.entity.disk'):
+        records = []
+        for disk in disks:
+            used_percent = disk_usage_series(disk, 1, 1.0)[0]
+            used = int(disk['total'] * used_percent / 100)
+            records.append({
+                'id': disk['id'],
+                'name': disk['name'],
+                'total': disk['total'],
+                'used': used,
+                'free': disk['total'] - used,
+                'host': disk['host_id'],
+                'timestamp': _iso(now),
+                'usedPercentage': used_percent
+            })
+
+    elif text.startswith('fetch dt.entity.host'):
+        hosts = {}
+        for disk in disks:
+            hosts.setdefault(disk['host_id'], {'id': disk['host_id'], 'name': disk['host_name']})
+        records = list(hosts.values())
+
+    elif text.startswith('fetch ') and '| summarize ' in text:
+        summarize = text.split('| summarize ', 1)[1].split('|')[0]
+        aggregations, _, by_clause = summarize.partition(' by ')
+        dimensions = [d.strip() for d in re.split(r',\s*(?![^()]*\))', by_clause) if d.strip()]
+        agg_names = [a.strip() for a in re.split(r',\s*(?![^()]*\))', aggregations) if a.strip()]
+        bin_dims = [d for d in dimensions if d.startswith('bin(')]
+        step = _parse_duration(bin_dims[0][len('bin(timestamp,'):] if bin_dims else None, 300)
+        if bin_dims:
+            first_bin = int(-(-start // step)) if start is not None else int(now // step) - 12
+            bins = [b * step for b in range(first_bin, int(now // step))]
+        else:
+            bins = [now]
+        subjects = disks if 'disk' in dimensions else list(
+            {disk['host_id']: disk for disk in disks}.values())
+
+        records = []
+        for subject in subjects:
+            subject_id = subject['id'] if 'disk' in dimensions else subject['host_id']
+            rng = random.Random(subject_id)
+            labels = {dim: f"{dim}-{rng.randint(1, 3)}" for dim in dimensions}
+            for ts in bins:
+                row = {}
+                for dim in dimensions:
+                    if dim == 'host':
+                        row['host'] = subject['host_id']
+                    elif dim == 'disk':
+                        row['disk'] = subject['id']
+                    elif dim.startswith('bin('):
+                        row[dim] = _iso(ts)
+                    else:
+                        row[dim] = labels[dim]
+                values = random.Random(f"{subject_id}/{ts}")
+                for agg in agg_names:
+                    row[agg] = round(values.uniform(0, 100), 3)
+                records.append(row)
+
+    else:
+        raise ValueError(f"Mock cannot evaluate query: {query[:80]}")
+
+    return records[:limit] if limit is not None else records
+
+
+def _iso(timestamp: float) -> str:
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(timestamp)) + f".{int(timestamp % 1 * 1000):03d}Z"
+
+
+def _parse_iso(text: str) -> float:
+    """Epoch seconds of an ISO-8601 timestamp (raises ValueError for other formats)"""
+    return datetime.fromisoformat(text.replace('Z', '+00:00')).timestamp()
+
+
+def synthesize_forecast_output(expression: str, disks: List[Dict[str, Any]], horizon: int) -> List[Dict[str, Any]]:
+    """
+    Produce GenericForecastAnalyzer-style output, one entry per analyzed series
+
+    The forecast is a linear extrapolation of the last week with an interval that widens with
+    the square root of the horizon, which is enough to exercise days-to-full logic.
+    """
+    outputs = []
+    for record in synthesize_dql_records(expression, disks):
+        value_field = next(key for key, value in record.items() if isinstance(value, list))
+        history = record[value_field]
+        window = history[-7:]
+        growth = (window[-1] - window[0]) / max(1, len(window) - 1) if len(window) > 1 else 0.0
+        point = [round(history[-1] + growth * (k + 1), 3) for k in range(horizon)]
+        spread = [round(0.5 + 0.4 * (k + 1) ** 0.5, 3) for k in range(horizon)]
+        forecast_record = {key: value for key, value in record.items() if key != value_field}
+        forecast_record.update({
+            value_field: history,
+            'dt.davis.forecast.point': point,
+            'dt.davis.forecast.lower': [round(p - w, 3) for p, w in zip(point, spread)],
+            'dt.davis.forecast.upper': [round(p + w, 3) for p, w in zip(point, spread)]
+        })
+        outputs.append({
+            'analysisStatus': 'OK',
+            'forecastQualityAssessment': 'VALID' if len(history) >= 14 else 'INVALID',
+            'analyzedTimeSeriesQuery': {'expression': expression, 'records': [record]},
+            'timeSeriesDataWithPredictions': {'records': [forecast_record]}
+        })
+    return outputs
+
+
+def _encode_page_key(state: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state).encode('utf-8')).decode('ascii')
+
+
+def _decode_page_key(page_key: str) -> Dict[str, Any]:
+    return json.loads(base64.urlsafe_b64decode(page_key.encode('ascii')))
+
+
+def _validate_settings_item(item: Any) -> Optional[str]:
+    if not isinstance(item, dict):
+        return 'Settings object must be a JSON object'
+    for field in ('schemaId', 'scope'):
+        if not isinstance(item.get(field), str) or not item[field]:
+            return f"Missing required field '{field}'"
+    if not isinstance(item.get('value'), dict):
+        return "Missing required field 'value'"
+    return None
+
+
+def _split_param(query: Dict[str, List[str]], name: str) -> List[str]:
+    values = []
+    for raw in query.get(name, []):
+        values.extend(v.strip() for v in raw.split(',') if v.strip())
+    return values
+
+
+class MockDynatraceState:
+    def __init__(
+            self,
+            objects: Optional[List[Dict[str, Any]]] = None,
+            latency: float = 0.0,
+            jitter: float = 0.0,
+            error_rate: float = 0.0,
+            rate_limit: Optional[float] = None,
+            retry_after: float = 0.1,
+            api_token: Optional[str] = None,
+            disks: Optional[List[Dict[str, Any]]] = None,
+            query_duration: float = 0.0,
+            analyzer_duration: float = 0.0,
+            analyzer_max_concurrent: Optional[int] = None,
+            max_query_length: Optional[int] = None,
+            seed: int = 42
+    ):
+        """
+        Shared, thread-safe state of the mock server
+
+        Args:
+            objects: Settings objects to serve (defaults to generate_settings_objects())
+            latency: Fixed delay added to every response, in seconds
+            jitter: Random extra delay (0..jitter seconds) added to every response
+            error_rate: Probability (0..1) that a request fails with HTTP 500
+            rate_limit: Maximum requests per second before answering HTTP 429 (None disables throttling)
+            retry_after: Value of the Retry-After header on 429 responses, in seconds
+            api_token: If set, requests must carry 'Api-Token <api_token>' or 'Bearer <api_token>'
+            disks: Disk inventory behind the Grail endpoints (defaults to generate_disk_inventory())
+            query_duration: Seconds a DQL query stays RUNNING before it succeeds
+            analyzer_duration: Mean seconds an analyzer execution runs (each varies 0.5x..1.5x)
+            analyzer_max_concurrent: Running analyzer executions allowed before answering HTTP 429
+            max_query_length: Longest DQL query text accepted, in characters (None disables the check)
+            seed: Random seed for jitter and error injection
+        """
+        self.objects = objects if objects is not None else generate_settings_objects()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.api_token = api_token
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.stats = {'requests': 0, 'throttled': 0, 'errors': 0}
+
+        # Per-schema index so paging a schema does not scan every object
+        self.by_schema = {}
+        for obj in self.objects:
+            self.by_schema.setdefault(obj['schemaId'], []).append(obj)
+
+        self._next_object_id = 0
+
+        self.disks = disks if disks is not None else generate_disk_inventory(seed=seed)
+        self.query_duration = query_duration
+        self.max_query_length = max_query_length
+        self.queries = {}
+
+        self.analyzer_duration = analyzer_duration
+        self.analyzer_max_concurrent = analyzer_max_concurrent
+        self.executions = {}
+        self.stats.update({'analyzer_executions': 0, 'analyzer_polls': 0, 'analyzer_peak_running': 0})
+
+        # Token bucket for throttling
+        self._tokens = rate_limit or 0.0
+        self._last_refill = time.monotonic()
+
+    def take_token(self) -> bool:
+        """Return False if the request must be throttled"""
+        if not self.rate_limit:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate_limit, self._tokens + (now - self._last_refill) * self.rate_limit)
+            self._last_refill = now
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def next_delay(self) -> float:
+        with self.lock:
+            return self.latency + (self.rng.random() * self.jitter if self.jitter else 0.0)
+
+    def inject_error(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self.lock:
+            return self.rng.random() < self.error_rate
+
+    def count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+    def query_settings(
+            self,
+            schema_ids: List[str],
+            scopes: List[str],
+            external_ids: List[str]
+    ) -> List[Dict[str, Any]]:
+        scope_set, external_set = set(scopes), set(external_ids)
+        if schema_ids:
+            candidates = [obj for schema_id in schema_ids for obj in self.by_schema.get(schema_id, [])]
+        else:
+            candidates = self.objects
+        return [
+            obj for obj in candidates
+            if (not scope_set or obj['scope'] in scope_set)
+            and (not external_set or obj.get('externalId') in external_set)
+        ]
+
+    def upsert_settings(self, items: List[Any], validate_only: bool) -> List[Dict[str, Any]]:
+        """Validate and store POSTed settings objects; existing externalIds are updated in place"""
+        statuses = []
+        with self.lock:
+            by_external_id = {obj.get('externalId'): obj for obj in self.objects if obj.get('externalId')}
+
+            for item in items:
+                problem = _validate_settings_item(item)
+                if problem:
+                    statuses.append({'code': 400, 'error': {'code': 400, 'message': problem}, 'invalidValue': item})
+                    continue
+
+                existing = by_external_id.get(item.get('externalId'))
+                if existing is not None:
+                    object_id = existing['objectId']
+                    if not validate_only:
+                        existing.update(value=item['value'], scope=item['scope'])
+                else:
+                    self._next_object_id += 1
+                    object_id = f"mock-{self._next_object_id:08d}"
+                    if not validate_only:
+                        obj = dict(item, objectId=object_id, schemaVersion=item.get('schemaVersion', '1.0.0'))
+                        self.objects.append(obj)
+                        self.by_schema.setdefault(obj['schemaId'], []).append(obj)
+                        if obj.get('externalId'):
+                            by_external_id[obj['externalId']] = obj
+
+                statuses.append({'code': 200, 'objectId': object_id})
+
+        return statuses
+
+    def update_setting(self, object_id: str, body: Any, validate_only: bool) -> Optional[str]:
+        """Update one object's value; returns an error message or None"""
+        if not isinstance(body, dict) or not isinstance(body.get('value'), dict):
+            return 'value must be an object'
+        with self.lock:
+            for obj in self.objects:
+                if obj['objectId'] == object_id:
+                    if not validate_only:
+                        obj['value'] = body['value']
+                    return None
+        return 'not found'
+
+    def submit_query(
+            self,
+            query: str,
+            max_records: Optional[int],
+            timeframe_start: Optional[str] = None,
+            timeframe_end: Optional[str] = None
+    ) -> str:
+        """Validate a DQL query and register it; returns the request token"""
+        if self.max_query_length is not None and len(query) > self.max_query_length:
+            raise ValueError(f"Query length {len(query)} exceeds the maximum of {self.max_query_length} characters")
+        synthesize_dql_records(query, self.disks[:1])  # raises ValueError for unsupported shapes
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.queries[token] = {
+                'query': query,
+                'max_records': max_records,
+                'start': _parse_iso(timeframe_start) if timeframe_start else None,
+                'end': _parse_iso(timeframe_end) if timeframe_end else None,
+                'ready_at': time.monotonic() + self.query_duration
+            }
+        return token
+
+    def _running_executions(self) -> int:
+        now = time.monotonic()
+        return sum(1 for entry in self.executions.values() if entry['ready_at'] > now)
+
+    def start_analyzer(self, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Register an analyzer execution; returns None when the concurrency limit is reached"""
+        expression = (body.get('timeSeriesData') or {}).get('expression')
+        if not isinstance(expression, str):
+            raise ValueError("Request body must contain 'timeSeriesData.expression'")
+        synthesize_dql_records(expression, self.disks[:1])  # raises ValueError for unsupported shapes
+
+        with self.lock:
+            running = self._running_executions()
+            if self.analyzer_max_concurrent is not None and running >= self.analyzer_max_concurrent:
+                return None
+            token = uuid.uuid4().hex
+            duration = self.analyzer_duration * (0.5 + self.rng.random()) if self.analyzer_duration else 0.0
+            self.executions[token] = {
+                'expression': expression,
+                'horizon': int(body.get('forecastHorizon', 100)),
+                'ready_at': time.monotonic() + duration
+            }
+            self.stats['analyzer_executions'] += 1
+            self.stats['analyzer_peak_running'] = max(self.stats['analyzer_peak_running'], running + 1)
+        return self.analyzer_status(token, count_poll=False)
+
+    def analyzer_status(self, token: str, count_poll: bool = True) -> Optional[Dict[str, Any]]:
+        """Current state of an analyzer execution, or None if the token is unknown"""
+        with self.lock:
+            entry = self.executions.get(token)
+            if count_poll:
+                self.stats['analyzer_polls'] += 1
+            if entry is None:
+                return None
+            if entry['ready_at'] > time.monotonic():
+                return {'requestToken': token, 'result': {'executionStatus': 'RUNNING', 'resultStatus': 'RUNNING'}}
+            self.executions.pop(token)
+
+        output = synthesize_forecast_output(entry['expression'], self.disks, entry['horizon'])
+        return {
+            'requestToken': token,
+            'result': {'executionStatus': 'COMPLETED', 'resultStatus': 'SUCCESSFUL', 'output': output}
+        }
+
+    def wait_for_query(self, token: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Long-poll a query: returns the finished response, a RUNNING response, or None if unknown"""
+        with self.lock:
+            entry = self.queries.get(token)
+        if entry is None:
+            return None
+
+        remaining = entry['ready_at'] - time.monotonic()
+        if remaining > 0:
+            time.sleep(min(remaining, timeout))
+            if entry['ready_at'] > time.monotonic():
+                progress = int(100 * (1 - max(0.0, entry['ready_at'] - time.monotonic()) / max(self.query_duration, 1e-9)))
+                return {'state': 'RUNNING', 'progress': progress, 'requestToken': token, 'ttlSeconds': 600}
+
+        with self.lock:
+            self.queries.pop(token, None)
+
+        records = synthesize_dql_records(entry['query'], self.disks, now=entry['end'], start=entry['start'])
+        notifications = []
+        if entry['max_records'] is not None and len(records) > entry['max_records']:
+            records = records[:entry['max_records']]
+            notifications.append({'severity': 'WARNING', 'messageFormatSpecifier': 'RESULT_TRUNCATED'})
+
+        return {
+            'state': 'SUCCEEDED',
+            'progress': 100,
+            'ttlSeconds': 600,
+            'result': {
+                'records': records,
+                'types': [],
+                'metadata': {'grail': {'query': entry['query'], 'notifications': notifications}}
+            }
+        }
+
+
+class MockDynatraceHandler(BaseHTTPRequestHandler):
+    server_version = 'MockDynatrace/1.0'
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this keep-alive clients stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+    @property
+    def state(self) -> MockDynatraceState:
+        return self.server.state
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        self._send_json(status, {'error': {'code': status, 'message': message}}, headers)
+
+    def _preflight(self) -> bool:
+        """Apply auth, latency, throttling and error injection; return False if a response was already sent"""
+        state = self.state
+        state.count('requests')
+
+        if state.api_token is not None:
+            if self.headers.get('Authorization') not in (f"Api-Token {state.api_token}", f"Bearer {state.api_token}"):
+                self._send_error(401, 'Missing or invalid API token')
+                return False
+
+        if not state.take_token():
+            state.count('throttled')
+            self._send_error(429, 'Too many requests', {'Retry-After': str(state.retry_after)})
+            return False
+
+        delay = state.next_delay()
+        if delay:
+            time.sleep(delay)
+
+        if state.inject_error():
+            state.count('errors')
+            self._send_error(500, 'Injected server error')
+            return False
+
+        return True
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == GRAIL_POLL_PATH:
+            if self._preflight():
+                self._handle_poll_query(parse_qs(parsed.query))
+            return
+        if parsed.path.startswith(ANALYZER_PATH_PREFIX) and parsed.path.endswith(':poll'):
+            if self._preflight():
+                self._handle_poll_analyzer(parse_qs(parsed.query))
+            return
+        if parsed.path != '/api/v2/settings/objects':
+            self._send_error(404, f"Unknown endpoint {parsed.path}")
+            return
+        if not self._preflight():
+            return
+        self._handle_list_settings(parse_qs(parsed.query))
+
+    def _handle_execute_query(self, query_params: Dict[str, List[str]]):
+        try:
+            body = self._read_json_body()
+        except ValueError:
+            self._send_error(400, 'Request body is not valid JSON')
+            return
+        if not isinstance(body, dict) or not isinstance(body.get('query'), str):
+            self._send_error(400, "Request body must contain 'query'")
+            return
+
+        try:
+            token = self.state.submit_query(
+                body['query'], body.get('maxResultRecords'),
+                body.get('defaultTimeframeStart'), body.get('defaultTimeframeEnd'))
+        except ValueError as e:
+            self._send_error(400, str(e))
+            return
+
+        timeout = float(body.get('requestTimeoutMilliseconds', 0)) / 1000
+        response = self.state.wait_for_query(token, timeout)
+        self._send_json(200 if response['state'] == 'SUCCEEDED' else 202, response)
+
+    def _handle_execute_analyzer(self):
+        try:
+            body = self._read_json_body()
+        except ValueError:
+            self._send_error(400, 'Request body is not valid JSON')
+            return
+        if not isinstance(body, dict):
+            self._send_error(400, 'Request body must be a JSON object')
+            return
+
+        try:
+            response = self.state.start_analyzer(body)
+        except ValueError as e:
+            self._send_error(400, str(e))
+            return
+        if response is None:
+            self.state.count('throttled')
+            self._send_error(429, 'Too many running analyzer executions', {'Retry-After': str(self.state.retry_after)})
+            return
+
+        running = response['result']['executionStatus'] == 'RUNNING'
+        self._send_json(202 if running else 200, response)
+
+    def _handle_poll_analyzer(self, query_params: Dict[str, List[str]]):
+        token = query_params.get('request-token', [None])[0]
+        response = self.state.analyzer_status(token) if token else None
+        if response is None:
+            self._send_error(410, 'Analyzer result expired or unknown request token')
+            return
+        self._send_json(200, response)
+
+    def _handle_poll_query(self, query_params: Dict[str, List[str]]):
+        token = query_params.get('request-token', [None])[0]
+        if not token:
+            self._send_error(400, "Missing 'request-token'")
+            return
+        timeout = float(query_params.get('request-timeout-milliseconds', [1000])[0]) / 1000
+        response = self.state.wait_for_query(token, timeout)
+        if response is None:
+            self._send_error(410, 'Query result expired or unknown request token')
+            return
+        self._send_json(200, response)
+
+    def _read_body(self):
+        # Read the whole body before any response, even an early 401/429/500/404: on a keep-alive
+        # connection an unread body would be parsed as the next request line
+        length = int(self.headers.get('Content-Length') or 0)
+        self._body = self.rfile.read(length)
+
+    def _read_json_body(self) -> Any:
+        return json.loads(self._body or b'null')
+
+    def do_POST(self):
+        self._read_body()
+        parsed = urlparse(self.path)
+        if parsed.path == GRAIL_EXECUTE_PATH:
+            if self._preflight():
+                self._handle_execute_query(parse_qs(parsed.query))
+            return
+        if parsed.path.startswith(ANALYZER_PATH_PREFIX) and parsed.path.endswith(':execute'):
+            if self._preflight():
+                self._handle_execute_analyzer()
+            return
+        if parsed.path != '/api/v2/settings/objects':
+            self._send_error(404, f"Unknown endpoint {parsed.path}")
+            return
+        if not self._preflight():
+            return
+
+        try:
+            items = self._read_json_body()
+        except ValueError:
+            self._send_error(400, 'Request body is not valid JSON')
+            return
+        if not isinstance(items, list) or not items:
+            self._send_error(400, 'Request body must be a non-empty JSON array')
+            return
+        if len(items) > MAX_POST_ITEMS:
+            self._send_error(400, f"At most {MAX_POST_ITEMS} objects per request")
+            return
+
+        validate_only = parse_qs(parsed.query).get('validateOnly', ['false'])[0] == 'true'
+        statuses = self.state.upsert_settings(items, validate_only)
+
+        failed = sum(1 for status in statuses if status['code'] >= 400)
+        code = 200 if not failed else (400 if failed == len(statuses) else 207)
+        self._send_json(code, statuses)
+
+    def do_PUT(self):
+        self._read_body()
+        parsed = urlparse(self.path)
+        prefix = '/api/v2/settings/objects/'
+        if not parsed.path.startswith(prefix) or len(parsed.path) == len(prefix):
+            self._send_error(404, f"Unknown endpoint {parsed.path}")
+            return
+        if not self._preflight():
+            return
+
+        try:
+            body = self._read_json_body()
+        except ValueError:
+            self._send_error(400, 'Request body is not valid JSON')
+            return
+
+        validate_only = parse_qs(parsed.query).get('validateOnly', ['false'])[0] == 'true'
+        problem = self.state.update_setting(parsed.path[len(prefix):], body, validate_only)
+        if problem == 'not found':
+            self._send_error(404, 'Settings object not found')
+        elif problem:
+            self._send_error(400, problem)
+        else:
+            self._send_json(200, {'code': 200, 'objectId': parsed.path[len(prefix):]})
+
+    def _handle_list_settings(self, query: Dict[str, List[str]]):
+        page_key = query.get('nextPageKey', [None])[0]
+
+        if page_key:
+            try:
+                page_state = _decode_page_key(page_key)
+            except (ValueError, UnicodeDecodeError):
+                self._send_error(400, 'Invalid nextPageKey')
+                return
+        else:
+            schema_ids = _split_param(query, 'schemaIds')
+            scopes = _split_param(query, 'scopes')
+            if not schema_ids and not scopes:
+                self._send_error(400, 'Either schemaIds or scopes must be specified')
+                return
+            try:
+                page_size = min(MAX_PAGE_SIZE, int(query.get('pageSize', [DEFAULT_PAGE_SIZE])[0]))
+            except ValueError:
+                self._send_error(400, 'Invalid pageSize')
+                return
+            page_state = {
+                'schemaIds': schema_ids,
+                'scopes': scopes,
+                'externalIds': _split_param(query, 'externalIds'),
+                'pageSize': page_size,
+                'offset': 0
+            }
+
+        fields = _split_param(query, 'fields') or DEFAULT_FIELDS
+        matches = self.state.query_settings(page_state['schemaIds'], page_state['scopes'], page_state['externalIds'])
+
+        start = page_state['offset']
+        end = start + page_state['pageSize']
+        items = [{field: obj[field] for field in fields if field in obj} for obj in matches[start:end]]
+
+        payload = {'items': items, 'totalCount': len(matches), 'pageSize': page_state['pageSize']}
+        if end < len(matches):
+            payload['nextPageKey'] = _encode_page_key(dict(page_state, offset=end))
+
+        self._send_json(200, payload)
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 resets connections when many concurrent clients connect at once
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-response (e.g. a cancelled benchmark) are not server errors
+        pass
+
+
+class MockDynatraceServer:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, **state_kwargs):
+        """
+        Local stand-in for a Dynatrace environment, served from a background thread
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            **state_kwargs: Passed to MockDynatraceState (objects, latency, error_rate, rate_limit, ...)
+        """
+        self.httpd = _QuietHTTPServer((host, port), MockDynatraceHandler)
+        self.httpd.state = MockDynatraceState(**state_kwargs)
+        self.thread = None
+
+    @property
+    def state(self) -> MockDynatraceState:
+        return self.httpd.state
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockDynatraceServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local mock of the Dynatrace Settings 2.0, Grail query and Davis analyzer APIs')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--objects-per-schema', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.0, help='Fixed response delay in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Random extra delay in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Probability of an HTTP 500')
+    parser.add_argument('--rate-limit', type=float, default=None, help='Requests/second before HTTP 429')
+    parser.add_argument('--api-token', default=None, help='Require this API token')
+    parser.add_argument('--disks', type=int, default=200, help='Disks behind the Grail query endpoints')
+    parser.add_argument('--query-duration', type=float, default=0.0, help='Seconds a DQL query stays RUNNING')
+    parser.add_argument('--analyzer-duration', type=float, default=0.0, help='Mean seconds an analyzer runs')
+    parser.add_argument('--analyzer-max-concurrent', type=int, default=None, help='Running analyzers before HTTP 429')
+    parser.add_argument('--max-query-length', type=int, default=None, help='Longest DQL query accepted, characters')
+    args = parser.parse_args()
+
+    server = MockDynatraceServer(
+        host=args.host,
+        port=args.port,
+        objects=generate_settings_objects(objects_per_schema=args.objects_per_schema),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        api_token=args.api_token,
+        disks=generate_disk_inventory(disk_count=args.disks),
+        query_duration=args.query_duration,
+        analyzer_duration=args.analyzer_duration,
+        analyzer_max_concurrent=args.analyzer_max_concurrent,
+        max_query_length=args.max_query_length
+    )
+    print(f"Mock Dynatrace server listening on {server.url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping mock server")
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from excel_io import prefetch_sheets
+
+# Below this combined input size, starting worker processes costs more than it saves
+PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+
+
+def default_workers(xml_file, excel_file, sheet_count):
+    """1 (parse in-process, one after the other) for small inputs, else one process per sheet plus the XML"""
+    try:
+        size = os.path.getsize(xml_file) + os.path.getsize(excel_file)
+    except OSError:
+        return 1  # Let the parsers report the missing file as usual
+    if size < PARALLEL_MIN_BYTES:
+        return 1
+    return max(1, min(os.cpu_count() or 1, sheet_count + 1))
+
+
+def _parse_profiled(parse_xml, xml_file, profile):
+    return parse_xml(xml_file, profile), profile
+
+
+def parse_inputs(parse_xml, xml_file, parse_excel, excel_file, excel_sheets, engine='auto', workers=None,
+                 profile=None):
+    """
+    Parse the XML feed and the Excel workbook concurrently
+
+    parse_xml runs in a worker process while the workbook's sheets are read by the other
+    workers, one sheet per task; parse_excel then builds its result from the prefetched sheets.
+    Wall time approaches the slowest of the XML parse and the largest sheet instead of the sum.
+
+    Args:
+        parse_xml: The script's parse_xml(xml_file[, profile])
+        xml_file: XML feed
+        parse_excel: The script's parse_excel(excel_file, engine, sheets)
+        excel_file: Excel workbook
+        excel_sheets: (sheet_name, header, usecols) tuples parse_excel reads
+        engine: Excel engine ('auto', 'stdlib' or 'pandas')
+        workers: Worker processes (None picks default_workers; 1 parses sequentially in-process)
+        profile: FeedProfile for parse_xml to fill; it is filled here even when parse_xml runs in a worker
+
+    Returns:
+        (parse_xml result, parse_excel result)
+    """
+    if workers is None:
+        workers = default_workers(xml_file, excel_file, len(excel_sheets))
+    if workers <= 1:
+        if profile is not None:
+            return parse_xml(xml_file, profile), parse_excel(excel_file, engine)
+        return parse_xml(xml_file), parse_excel(excel_file, engine)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if profile is not None:
+            xml_future = executor.submit(_parse_profiled, parse_xml, xml_file, profile)
+        else:
+            xml_future = executor.submit(parse_xml, xml_file)
+        sheets = prefetch_sheets(excel_file, excel_sheets, executor, engine)
+        excel_data = parse_excel(excel_file, engine, sheets)
+        if profile is None:
+            return xml_future.result(), excel_data
+        xml_data, filled = xml_future.result()
+        profile.update(filled)
+        return xml_data, excel_data
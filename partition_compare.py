@@ -0,0 +1,106 @@
+import heapq
+import multiprocessing
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+# Buckets handed to forked workers, which inherit them instead of receiving pickled copies
+_PARTS = None
+
+
+def canonical_ids(id_map):
+    """
+    Canonical ID of every ID in the ACF2ID -> NOVELLID map
+
+    IDs linked through the map, directly or via shared NOVELLIDs, get the same canonical ID,
+    so every pair a comparator may match lands in the same bucket.
+
+    Args:
+        id_map: {ACF2ID: NOVELLID}
+
+    Returns:
+        {user id: canonical id}; IDs not in the map are their own canonical ID
+    """
+    parent = {}
+
+    def find(user_id):
+        root = user_id
+        while parent.setdefault(root, root) != root:
+            root = parent[root]
+        while parent[user_id] != root:
+            parent[user_id], user_id = root, parent[user_id]
+        return root
+
+    for acf2id, novellid in id_map.items():
+        acf2_root, novell_root = find(acf2id), find(novellid)
+        if acf2_root != novell_root:
+            parent[acf2_root] = novell_root
+    return {user_id: find(user_id) for user_id in parent}
+
+
+def bucket_of(user_id, canonical, partitions):
+    """Bucket of a user ID, stable across processes and runs (unlike hash())"""
+    return zlib.crc32(str(canonical.get(user_id, user_id)).encode('utf-8')) % partitions
+
+
+def split_ids(user_ids, canonical, partitions):
+    """Split a set of user IDs into one set per bucket"""
+    parts = [set() for _ in range(partitions)]
+    for user_id in user_ids:
+        parts[bucket_of(user_id, canonical, partitions)].add(user_id)
+    return parts
+
+
+def split_mapping(mapping, canonical, partitions):
+    """Split a {user id: value} dict into one dict per bucket, keeping the key order"""
+    parts = [{} for _ in range(partitions)]
+    for user_id, value in mapping.items():
+        parts[bucket_of(user_id, canonical, partitions)][user_id] = value
+    return parts
+
+
+def _compare_part(index):
+    compare, parts = _PARTS
+    return compare(*parts[index])
+
+
+def run_partitions(compare, parts, workers=None):
+    """
+    Compare every bucket, in a process pool when workers > 1
+
+    Where processes are forked the workers inherit the buckets, so only the (much smaller)
+    per-bucket results are pickled.
+
+    Args:
+        compare: The comparator's compare function
+        parts: Argument tuple of compare for each bucket
+        workers: Worker processes (None: one per bucket, up to the CPU count)
+
+    Returns:
+        compare's result for each bucket, in bucket order
+    """
+    global _PARTS
+    if workers is None:
+        workers = min(len(parts), os.cpu_count() or 1)
+    if workers <= 1:
+        return [compare(*args) for args in parts]
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(compare, *zip(*parts)))
+
+    _PARTS = (compare, parts)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as executor:
+            return list(executor.map(_compare_part, range(len(parts))))
+    finally:
+        _PARTS = None
+
+
+def merge_sorted(parts):
+    """Merge per-bucket sorted lists into one sorted list"""
+    return list(heapq.merge(*parts))
+
+
+def merge_ordered(parts, key):
+    """Merge per-bucket lists that each follow a global order given by key (e.g. the Excel row order)"""
+    return list(heapq.merge(*parts, key=key))
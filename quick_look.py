@@ -0,0 +1,217 @@
+import math
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+from excel_io import cell_text, read_sheet
+from id_keys import normalize_id
+from hyperloglog import PRECISION, HyperLogLog
+from role_taxonomy import AWFEMPLOYEE_COLUMN_CATEGORIES, SHEET_CATEGORIES, RoleTaxonomy
+from stream_compare import BATCH_SIZE, iter_account_elements
+
+# Reported bounds are this many standard errors (about 95% of runs fall within them)
+BOUND_SIGMAS = 2
+MAPPING_SHEET = 'AWF_ACF2IDNOVELL'
+
+
+class SketchSet:
+    """HyperLogLog sketches by name, created on first use and filled BATCH_SIZE keys at a time"""
+
+    def __init__(self, precision=PRECISION):
+        self.precision = precision
+        self.sketches = {}
+        self.pending = {}
+
+    def add(self, name, key):
+        if name not in self.sketches:
+            self.sketches[name] = HyperLogLog(self.precision)
+            self.pending[name] = []
+        pending = self.pending[name]
+        pending.append(key)
+        if len(pending) >= BATCH_SIZE:
+            self.sketches[name].add(pending)
+            pending.clear()
+
+    def get(self, name):
+        """Sketch of one name with every key added so far (empty if the name never got a key)"""
+        if name not in self.sketches:
+            return HyperLogLog(self.precision)
+        self.sketches[name].add(self.pending[name])
+        self.pending[name].clear()
+        return self.sketches[name]
+
+    def names(self):
+        return list(self.sketches)
+
+
+def sketch_xml(xml_file, roles_only=True, taxonomy=None, precision=PRECISION):
+    """
+    Sketch the feed's users and, per role category, the users holding a role of it
+
+    Args:
+        xml_file: XML feed
+        roles_only: Count only accounts with at least one role, like the role comparators' parse_xml
+        taxonomy: RoleTaxonomy classifying the raw feed roles into categories
+
+    Returns:
+        (users sketch, SketchSet keyed by category)
+    """
+    taxonomy = taxonomy or RoleTaxonomy()
+    users = SketchSet(precision)
+    categories = SketchSet(precision)
+    try:
+        for account in iter_account_elements(xml_file):
+            user_id = normalize_id(account.get('id'))
+            if not user_id:
+                continue
+            account_categories = {taxonomy.classify_feed_role(ref.get('id')[5:])[1]
+                                  for ref in account.iter('attributeValueRef')
+                                  if (ref.get('id') or '').startswith('Role=')}
+            if roles_only and not account_categories:
+                continue
+            users.add('XML', user_id)
+            for category in account_categories:
+                categories.add(category, user_id)
+    except ET.ParseError as e:
+        sys.exit(f"Error parsing XML file: {e}")
+    except FileNotFoundError:
+        sys.exit(f"Error: XML file '{xml_file}' not found")
+    return users.get('XML'), categories
+
+
+def sketch_excel(excel_file, excel_sheets, engine='auto', precision=PRECISION):
+    """
+    Sketch the users of each sheet and, per role category, the users holding a role of it
+
+    ACF2IDs listed in the AWF_ACF2IDNOVELL sheet (read first when the comparator uses it) are
+    sketched as their NOVELLID, the ID the feed knows them by.
+
+    Args:
+        excel_file: Excel workbook
+        excel_sheets: The comparator's EXCEL_SHEETS, (sheet, header, usecols) tuples
+
+    Returns:
+        (SketchSet keyed by sheet, SketchSet keyed by category)
+    """
+    sheets = SketchSet(precision)
+    categories = SketchSet(precision)
+    id_map = {}
+    for sheet, header, usecols in sorted(excel_sheets, key=lambda entry: entry[0] != MAPPING_SHEET):
+        try:
+            columns, rows = read_sheet(excel_file, sheet, header=header, usecols=usecols, engine=engine)
+        except FileNotFoundError:
+            sys.exit(f"Error: Excel file '{excel_file}' not found")
+        except Exception as e:
+            print(f"Warning: Error processing {sheet} sheet - {str(e)}")
+            continue
+
+        if sheet == MAPPING_SHEET:
+            pairs = ((normalize_id(row.get('ACF2ID')), normalize_id(row.get('NOVELLID'))) for row in rows)
+            id_map = {acf2id: novellid for acf2id, novellid in pairs if acf2id and novellid}
+            continue
+
+        user_col = next((col for col in columns if 'user_id' in str(col).lower()), None)
+        if user_col is None:
+            print(f"Warning: Could not find User_ID column in {sheet} sheet")
+            continue
+
+        # Role columns of this sheet and the category each one fills
+        role_columns = {'ROLENAME': SHEET_CATEGORIES[sheet]} if sheet in SHEET_CATEGORIES else {}
+        if sheet == 'AWFEMPLOYEE':
+            role_columns = AWFEMPLOYEE_COLUMN_CATEGORIES
+        for row in rows:
+            user_id = normalize_id(row[user_col])
+            if not user_id:
+                continue
+            user_id = id_map.get(user_id, user_id)
+            sheets.add(sheet, user_id)
+            for column, category in role_columns.items():
+                if cell_text(row.get(column)):
+                    categories.add(category, user_id)
+    return sheets, categories
+
+
+def estimate_overlap(xml, excel):
+    """
+    Estimate the sizes of two sources, their intersection and both differences
+
+    The intersection and differences come from inclusion-exclusion over the merged sketch; their
+    bounds combine the bounds of the counts involved.
+
+    Returns:
+        {'xml', 'excel', 'both', 'only_in_xml', 'only_in_excel'}, each (estimate, bound)
+    """
+    n_xml, n_excel, n_union = xml.count(), excel.count(), xml.merge(excel).count()
+    error = BOUND_SIGMAS * xml.std_error
+    e_xml, e_excel, e_union = error * n_xml, error * n_excel, error * n_union
+    return {
+        'xml': (n_xml, e_xml),
+        'excel': (n_excel, e_excel),
+        'both': (min(max(n_xml + n_excel - n_union, 0), n_xml, n_excel), math.hypot(e_xml, e_excel, e_union)),
+        'only_in_xml': (min(max(n_union - n_excel, 0), n_xml), math.hypot(e_union, e_excel)),
+        'only_in_excel': (min(max(n_union - n_xml, 0), n_excel), math.hypot(e_union, e_xml))
+    }
+
+
+def quick_look(xml_file, excel_file, excel_sheets, roles_only=True, engine='auto', precision=PRECISION):
+    """
+    One pass over both inputs into HyperLogLog sketches; no user sets are built
+
+    Args:
+        xml_file: XML feed
+        excel_file: Excel workbook
+        excel_sheets: The comparator's EXCEL_SHEETS
+        roles_only: Count only XML accounts with at least one role
+        engine: Excel reader
+        precision: HyperLogLog precision (2^precision registers per sketch)
+
+    Returns:
+        {'sources': [(name, (estimate, bound))], 'overlap': estimate_overlap() of XML vs Excel,
+         'categories': {category: estimate_overlap()}, 'seconds': elapsed time}
+    """
+    start = time.perf_counter()
+    print("\n[1/2] Sketching XML file...")
+    xml_users, xml_categories = sketch_xml(xml_file, roles_only, precision=precision)
+    print("[2/2] Sketching Excel file...")
+    sheets, excel_categories = sketch_excel(excel_file, excel_sheets, engine, precision)
+
+    excel_users = HyperLogLog(precision)
+    sources = []
+    for sheet in sheets.names():
+        sketch = sheets.get(sheet)
+        excel_users = excel_users.merge(sketch)
+        sources.append((sheet, (sketch.count(), BOUND_SIGMAS * sketch.std_error * sketch.count())))
+
+    categories = sorted(set(xml_categories.names()) | set(excel_categories.names()))
+    return {
+        'sources': sources,
+        'overlap': estimate_overlap(xml_users, excel_users),
+        'categories': {category: estimate_overlap(xml_categories.get(category), excel_categories.get(category))
+                       for category in categories},
+        'seconds': time.perf_counter() - start
+    }
+
+
+def _approx(estimate):
+    value, bound = estimate
+    return f"~{value:,.0f} ± {bound:,.0f}"
+
+
+def print_quick_look(report):
+    """Print a quick_look() report"""
+    overlap = report['overlap']
+    print(f"\nQuick Look (HyperLogLog estimates, bounds of {BOUND_SIGMAS} standard errors, "
+          f"{report['seconds']:.2f}s):")
+    print(f"- XML users: {_approx(overlap['xml'])}")
+    print(f"- Excel users: {_approx(overlap['excel'])}")
+    for sheet, estimate in report['sources']:
+        print(f"  - {sheet}: {_approx(estimate)}")
+    print(f"- Users in both: {_approx(overlap['both'])}")
+    print(f"- Users only in XML: {_approx(overlap['only_in_xml'])}")
+    print(f"- Users only in Excel: {_approx(overlap['only_in_excel'])}")
+
+    if report['categories']:
+        print("\nPer role category (XML / Excel / both / only in XML / only in Excel):")
+        for category, estimate in report['categories'].items():
+            print(f"- {category}: " + " / ".join(_approx(estimate[key]) for key in
+                                                 ('xml', 'excel', 'both', 'only_in_xml', 'only_in_excel')))
@@ -0,0 +1,430 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import AWF_Users_Comparator
+import DiamondUserRoleComaprison
+import DiamoundFeedVerification
+import compareFeedFiles
+from excel_io import ENGINES
+from feed_profile import FeedProfile
+from id_keys import finish_results
+
+DEFAULT_PORT = 8765
+# Seconds between checks of the cached input files for changes
+DEFAULT_WATCH_INTERVAL = 2.0
+
+# Comparison jobs the service runs, by script name. Every script has parse_xml(path, profile) and
+# parse_excel(path, engine); compare, export and excel_original_ids adapt to each script's own signatures,
+# and known_roles is what the script's feed profile checks role names against.
+COMPARATORS = {
+    'AWF_Users_Comparator': {
+        'module': AWF_Users_Comparator,
+        'known_roles': None,
+        'compare': lambda xml, excel: AWF_Users_Comparator.compare_users(xml, excel),
+        'export': lambda results, excel, output, engine: AWF_Users_Comparator.export_results(results, output, engine),
+        'excel_original_ids': lambda excel: excel['original_ids']
+    },
+    'DiamondUserRoleComaprison': {
+        'module': DiamondUserRoleComaprison,
+        'known_roles': DiamondUserRoleComaprison.KNOWN_ROLES,
+        'compare': lambda xml, excel: DiamondUserRoleComaprison.compare_data(xml, excel),
+        'export': lambda results, excel, output, engine: DiamondUserRoleComaprison.export_results(results, output, engine),
+        'excel_original_ids': lambda excel: excel['original_ids']
+    },
+    'DiamoundFeedVerification': {
+        'module': DiamoundFeedVerification,
+        'known_roles': DiamoundFeedVerification.KNOWN_ROLES,
+        'compare': lambda xml, excel: DiamoundFeedVerification.compare_data(xml, excel),
+        'export': lambda results, excel, output, engine: DiamoundFeedVerification.export_results(results, output, engine),
+        'excel_original_ids': lambda excel: excel['original_ids']
+    },
+    'compareFeedFiles': {
+        'module': compareFeedFiles,
+        'known_roles': compareFeedFiles.KNOWN_ROLES,
+        # parse_excel returns (sched_users, onreq_users, sched_empty, onreq_empty, sched_all_users, onreq_all_users,
+        # original_ids)
+        'compare': lambda xml, excel: compareFeedFiles.compare_data(xml, excel[0], excel[1], excel[4], excel[5]),
+        'export': lambda results, excel, output, engine: compareFeedFiles.export_results(
+            results, excel[2], excel[3], output, engine),
+        'excel_original_ids': lambda excel: excel[6]
+    }
+}
+
+
+def file_fingerprint(path: str) -> Tuple[int, int]:
+    """(size, mtime in ns) of a file; any rewrite of the file changes it"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def summarize(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Counts instead of the user lists: {'only_in_xml': 614, 'matching_users': 28, ...}"""
+    return {key: len(value) if isinstance(value, (list, set, dict)) else value for key, value in results.items()}
+
+
+def _call_script(function: Callable, *args):
+    # The comparator scripts report bad input with sys.exit(message); keep the service alive
+    try:
+        return function(*args)
+    except SystemExit as e:
+        raise ValueError(str(e.code)) from None
+
+
+class WarmState:
+    def __init__(self, engine: str = 'auto'):
+        """
+        Parsed XML feeds and workbooks kept in memory between comparison jobs
+
+        Every parse is cached under (comparator, 'xml'|'excel', path) together with the file's
+        fingerprint; a job re-parses only inputs whose fingerprint changed, and reuses the
+        comparison results when neither input changed.
+
+        Args:
+            engine: Excel engine passed to parse_excel/export_results ('auto', 'stdlib' or 'pandas')
+        """
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._results = {}
+        self._key_locks = defaultdict(threading.Lock)
+        self.stats = {'jobs': 0, 'parses': 0, 'parseHits': 0, 'resultHits': 0, 'reloads': 0}
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _load(self, comparator: str, kind: str, path: str, fingerprint: Tuple[int, int]) -> Dict[str, Any]:
+        spec = COMPARATORS[comparator]
+        module = spec['module']
+        start = time.perf_counter()
+        profile = None
+        if kind == 'xml':
+            # Filled by the same parse; kept with the entry for the reports of every job on this feed
+            profile = FeedProfile(spec['known_roles'])
+            value = _call_script(module.parse_xml, path, profile)
+        else:
+            value = _call_script(module.parse_excel, path, self.engine)
+        entry = {'fingerprint': fingerprint, 'value': value, 'profile': profile, 'loadedAt': time.time(),
+                 'loadSeconds': time.perf_counter() - start}
+        with self._lock:
+            self._entries[(comparator, kind, path)] = entry
+            self.stats['parses'] += 1
+        return entry
+
+    def parsed(self, comparator: str, kind: str, path: str) -> Tuple[Dict[str, Any], bool]:
+        """
+        Cache entry of one input, loading it if it is new or changed on disk
+
+        Returns:
+            ({'fingerprint', 'value', 'profile' (the FeedProfile of an XML feed), ...}, served from cache)
+        """
+        key = (comparator, kind, path)
+        with self._key_locks[key]:
+            fingerprint = file_fingerprint(path)
+            entry = self._entries.get(key)
+            if entry is not None and entry['fingerprint'] == fingerprint:
+                self._count('parseHits')
+                return entry, True
+            return self._load(comparator, kind, path, fingerprint), False
+
+    def compare(
+            self,
+            comparator: str,
+            xml_file: str,
+            excel_file: str,
+            output_file: Optional[str] = None,
+            detail: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Run one comparison job against the warm state
+
+        Returns:
+            {'comparator', 'summary', 'cached': {'xml', 'excel', 'results'}, 'elapsedMs', 'output'}
+            plus 'results' when detail is set
+        """
+        if comparator not in COMPARATORS:
+            raise ValueError(f"Unknown comparator '{comparator}'. Available: {', '.join(COMPARATORS)}")
+        start = time.perf_counter()
+        self._count('jobs')
+        spec = COMPARATORS[comparator]
+        xml_file, excel_file = os.path.abspath(xml_file), os.path.abspath(excel_file)
+
+        xml_entry, xml_cached = self.parsed(comparator, 'xml', xml_file)
+        excel_entry, excel_cached = self.parsed(comparator, 'excel', excel_file)
+        excel_data = excel_entry['value']
+        fingerprints = (xml_entry['fingerprint'], excel_entry['fingerprint'])
+
+        result_key = (comparator, xml_file, excel_file)
+        cached = self._results.get(result_key)
+        if cached is not None and cached[0] == fingerprints:
+            results = cached[1]
+            self._count('resultHits')
+        else:
+            results = spec['compare'](xml_entry['value'], excel_data)
+            finish_results(results, xml_entry['profile'], spec['excel_original_ids'](excel_data))
+            with self._lock:
+                self._results[result_key] = (fingerprints, results)
+
+        if output_file:
+            _call_script(spec['export'], results, excel_data, output_file, self.engine)
+
+        response = {
+            'comparator': comparator,
+            'summary': summarize(results),
+            'cached': {'xml': xml_cached, 'excel': excel_cached, 'results': cached is not None and results is cached[1]},
+            'elapsedMs': round((time.perf_counter() - start) * 1000, 3),
+            'output': output_file
+        }
+        if detail:
+            response['results'] = results
+        return response
+
+    def refresh(self) -> int:
+        """Re-parse cached inputs that changed on disk and forget deleted ones; returns the number reloaded"""
+        with self._lock:
+            entries = list(self._entries.items())
+        reloaded = 0
+        for key, entry in entries:
+            with self._key_locks[key]:
+                try:
+                    fingerprint = file_fingerprint(key[2])
+                except FileNotFoundError:
+                    with self._lock:
+                        self._entries.pop(key, None)
+                    continue
+                if fingerprint == entry['fingerprint']:
+                    continue
+                try:
+                    self._load(*key, fingerprint)
+                    reloaded += 1
+                except ValueError as e:
+                    # Probably caught mid-write; the next job or check loads it again
+                    print(f"Warning: could not reload {key[2]} - {e}")
+        if reloaded:
+            self._count('reloads', reloaded)
+        return reloaded
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = [{'comparator': comparator, 'kind': kind, 'path': path,
+                        'fingerprint': list(entry['fingerprint']),
+                        'loadedAt': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['loadedAt'])),
+                        'loadSeconds': round(entry['loadSeconds'], 3)}
+                       for (comparator, kind, path), entry in sorted(self._entries.items())]
+            return {'engine': self.engine, 'stats': dict(self.stats), 'entries': entries}
+
+
+class ReconcileHandler(BaseHTTPRequestHandler):
+    server_version = 'ReconcileService/1.0'
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self) -> WarmState:
+        return self.server.state
+
+    def _send_json(self, status: int, payload: Any):
+        body = json.dumps(payload, default=sorted).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str):
+        self._send_json(status, {'error': {'code': status, 'message': message}})
+
+    def do_GET(self):
+        if self.path == '/status':
+            self._send_json(200, self.state.status())
+        elif self.path == '/comparators':
+            self._send_json(200, sorted(COMPARATORS))
+        else:
+            self._send_error(404, f"Unknown path {self.path}")
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError as e:
+            self._send_error(400, f"Invalid JSON body: {e}")
+            return
+
+        if self.path == '/reload':
+            self._send_json(200, {'reloaded': self.state.refresh()})
+            return
+        if self.path != '/compare':
+            self._send_error(404, f"Unknown path {self.path}")
+            return
+
+        missing = [field for field in ('comparator', 'xml', 'excel') if not body.get(field)]
+        if missing:
+            self._send_error(400, f"Missing fields: {', '.join(missing)}")
+            return
+        try:
+            response = self.state.compare(body['comparator'], body['xml'], body['excel'],
+                                          body.get('output'), bool(body.get('detail')))
+        except FileNotFoundError as e:
+            self._send_error(404, str(e))
+        except ValueError as e:
+            self._send_error(400, str(e))
+        else:
+            self._send_json(200, response)
+
+
+class _ServiceHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class ReconcileService:
+    def __init__(
+            self,
+            host: str = '127.0.0.1',
+            port: int = DEFAULT_PORT,
+            engine: str = 'auto',
+            watch_interval: Optional[float] = DEFAULT_WATCH_INTERVAL
+    ):
+        """
+        Local HTTP service running comparison jobs against warm parsed inputs
+
+        POST /compare {"comparator", "xml", "excel", "output" (optional), "detail" (optional)}
+        POST /reload   re-parse changed inputs now
+        GET  /status   cached inputs and hit counters
+        GET  /comparators
+
+        Args:
+            host: Interface to bind (keep it local: jobs name files on this machine)
+            port: Port to bind (0 picks a free port)
+            engine: Excel engine of the comparator scripts
+            watch_interval: Seconds between background checks for changed inputs (None disables them)
+        """
+        self.httpd = _ServiceHTTPServer((host, port), ReconcileHandler)
+        self.httpd.state = WarmState(engine)
+        self.watch_interval = watch_interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    @property
+    def state(self) -> WarmState:
+        return self.httpd.state
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _watch(self):
+        while not self._stop.wait(self.watch_interval):
+            self.state.refresh()
+
+    def start(self) -> 'ReconcileService':
+        self._threads = [threading.Thread(target=self.httpd.serve_forever, daemon=True)]
+        if self.watch_interval:
+            self._threads.append(threading.Thread(target=self._watch, daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def request_comparison(
+        url: str,
+        comparator: str,
+        xml_file: str,
+        excel_file: str,
+        output_file: Optional[str] = None,
+        detail: bool = False,
+        timeout: float = 600
+) -> Dict[str, Any]:
+    """Submit a job to a running service; relative paths are resolved against this process's directory"""
+    payload = {'comparator': comparator, 'xml': os.path.abspath(xml_file), 'excel': os.path.abspath(excel_file),
+               'output': os.path.abspath(output_file) if output_file else None, 'detail': detail}
+    request = urllib.request.Request(f"{url}/compare", data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'}, method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        message = json.loads(e.read() or b'{}').get('error', {}).get('message', e.reason)
+        raise RuntimeError(f"HTTP {e.code}: {message}") from None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resident AWF reconciliation service with warm parsed inputs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='Run the service in the foreground')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument('--engine', choices=ENGINES, default='auto')
+    serve_parser.add_argument('--watch-interval', type=float, default=DEFAULT_WATCH_INTERVAL,
+                              help='Seconds between checks for changed inputs (0 disables)')
+
+    compare_parser = subparsers.add_parser('compare', help='Submit a comparison to a running service')
+    compare_parser.add_argument('comparator', choices=sorted(COMPARATORS))
+    compare_parser.add_argument('--xml', default='AWF_01_accounts.xml')
+    compare_parser.add_argument('--excel', default='AWF_List.xlsx')
+    compare_parser.add_argument('--output', default=None, help='Also write the results workbook')
+    compare_parser.add_argument('--url', default=f"http://127.0.0.1:{DEFAULT_PORT}")
+
+    status_parser = subparsers.add_parser('status', help='Show cached inputs of a running service')
+    status_parser.add_argument('--url', default=f"http://127.0.0.1:{DEFAULT_PORT}")
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        service = ReconcileService(args.host, args.port, args.engine, args.watch_interval or None)
+        print(f"Reconciliation service listening on {service.url} (Ctrl+C to stop)")
+        service.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print("\nStopping reconciliation service")
+        finally:
+            service.stop()
+        return
+
+    try:
+        if args.command == 'status':
+            with urllib.request.urlopen(f"{args.url}/status", timeout=30) as response:
+                print(json.dumps(json.loads(response.read()), indent=2))
+            return
+        response = request_comparison(args.url, args.comparator, args.xml, args.excel, args.output)
+    except (OSError, RuntimeError) as e:
+        sys.exit(f"Error: {e}")
+
+    cached = ', '.join(name for name, hit in response['cached'].items() if hit) or 'nothing'
+    print(f"{response['comparator']} in {response['elapsedMs']:.1f} ms (cached: {cached})")
+    for key, value in response['summary'].items():
+        print(f"- {key}: {value}")
+    if response['output']:
+        print(f"Results exported to {response['output']}")
+
+
+if __name__ == "__main__":
+    main()
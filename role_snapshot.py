@@ -0,0 +1,258 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+# Keys inside the snapshot archive
+USERS_KEY = 'users'
+MANIFEST_KEY = 'manifest'
+
+OPERATORS = {'&': 'and', '|': 'or', '-': 'minus'}
+
+
+def build_snapshot(indexes, output_file):
+    """
+    Persist role -> sorted user-id arrays for each source
+
+    User IDs are stored once in a sorted vocabulary; every posting list is a sorted int32
+    array of positions in it, so a query only touches the lists it names.
+
+    Args:
+        indexes: {source name: RoleIndex} (see role_taxonomy)
+        output_file: Path of the .npz snapshot
+
+    Returns:
+        Number of posting lists written
+    """
+    vocabulary = sorted(set().union(*(index.users() for index in indexes.values())))
+    users = np.array(vocabulary, dtype=str)
+    position = {user_id: i for i, user_id in enumerate(vocabulary)}
+
+    arrays = {USERS_KEY: users}
+    manifest = {'sources': {}, 'userCount': len(vocabulary), 'created': time.strftime('%Y-%m-%d %H:%M:%S')}
+    for source, index in indexes.items():
+        source = source.lower()
+        roles = {}
+        all_key = f"{source}/__all__"
+        arrays[all_key] = np.sort(np.fromiter((position[u] for u in index.users()), dtype=np.int32))
+        for n, (role, holders) in enumerate(sorted(index.role_users.items())):
+            key = f"{source}/{n}"
+            arrays[key] = np.sort(np.fromiter((position[u] for u in holders), dtype=np.int32, count=len(holders)))
+            roles[role] = key
+        manifest['sources'][source] = {'all': all_key, 'roles': roles}
+
+    arrays[MANIFEST_KEY] = np.array(json.dumps(manifest))
+    np.savez(output_file, **arrays)
+    return len(arrays) - 2
+
+
+class RoleSnapshot:
+    def __init__(self, path):
+        """
+        Read-only view of a snapshot written by build_snapshot; arrays are loaded on first use
+
+        Args:
+            path: .npz snapshot file
+        """
+        self.path = path
+        self._archive = np.load(path, allow_pickle=False)
+        self.manifest = json.loads(str(self._archive[MANIFEST_KEY]))
+        self._cache = {}
+        self._users = None
+
+    @property
+    def users(self):
+        if self._users is None:
+            self._users = self._archive[USERS_KEY]
+        return self._users
+
+    def _array(self, key):
+        if key not in self._cache:
+            self._cache[key] = self._archive[key]
+        return self._cache[key]
+
+    def sources(self):
+        return sorted(self.manifest['sources'])
+
+    def roles(self, source):
+        return sorted(self.manifest['sources'][source.lower()]['roles'])
+
+    def _posting_keys(self, source, role_spec):
+        source = source.lower()
+        if source not in self.manifest['sources']:
+            raise KeyError(f"Unknown source '{source}'. Available: {', '.join(self.sources())}")
+        entry = self.manifest['sources'][source]
+        if role_spec == '*':
+            return [entry['all']]
+        if role_spec.endswith('*'):
+            prefix = role_spec[:-1]
+            return [key for role, key in entry['roles'].items()
+                    if role.startswith(prefix) or role.split(':', 1)[1].startswith(prefix)]
+        if ':' in role_spec:
+            return [entry['roles'][role_spec]] if role_spec in entry['roles'] else []
+        return [key for role, key in entry['roles'].items() if role.split(':', 1)[1] == role_spec]
+
+    def mask(self, source, role_spec='*'):
+        """
+        Boolean mask over the user vocabulary of the users holding a role in a source
+
+        role_spec forms:
+            'Scheduling:Administrator'  one category role
+            'Administrator'             that role in any category
+            'STS*' / 'Scheduling:*'     prefix over role or qualified role
+            '*'                         every user of the source
+        """
+        result = np.zeros(self.manifest['userCount'], dtype=bool)
+        for key in self._posting_keys(source, role_spec):
+            result[self._array(key)] = True
+        return result
+
+    def postings(self, source, role_spec='*'):
+        """Sorted user positions holding a role in a source (see mask for role_spec forms)"""
+        keys = self._posting_keys(source, role_spec)
+        if len(keys) == 1:
+            return self._array(keys[0])
+        return np.flatnonzero(self.mask(source, role_spec)).astype(np.int32)
+
+    def _prefix_range(self, prefix):
+        # User IDs sharing a prefix form a contiguous range of the sorted vocabulary
+        low = int(np.searchsorted(self.users, prefix, side='left'))
+        high = int(np.searchsorted(self.users, prefix + '\U0010FFFF', side='left'))
+        return low, high
+
+    def filter_user_prefix(self, positions, prefix):
+        """Keep positions whose user ID starts with prefix"""
+        low, high = self._prefix_range(prefix)
+        return positions[(positions >= low) & (positions < high)]
+
+    def term(self, text):
+        """'xml:Administrator' -> mask of the Administrator role holders in the xml source"""
+        source, _, role_spec = text.partition(':')
+        return self.mask(source, role_spec or '*')
+
+    def query(self, tokens, user_prefix=None):
+        """
+        Evaluate 'term op term op term ...' left to right, op being & (and), | (or) or - (minus)
+
+        Terms become bitmaps over the user vocabulary, so each operation is a single pass over
+        one byte per user regardless of how large the posting lists are.
+
+        Example: ['xml:Administrator', '-', 'excel:Administrator']
+
+        Returns:
+            Sorted user positions
+        """
+        if not tokens:
+            raise ValueError('Empty query')
+        result = self.term(tokens[0])
+        for i in range(1, len(tokens), 2):
+            if i + 1 >= len(tokens) or tokens[i] not in OPERATORS:
+                raise ValueError(f"Expected 'term op term ...' with op in {' '.join(OPERATORS)}, got: {' '.join(tokens)}")
+            operand = self.term(tokens[i + 1])
+            op = OPERATORS[tokens[i]]
+            if op == 'and':
+                result &= operand
+            elif op == 'or':
+                result |= operand
+            else:
+                result &= ~operand
+        if user_prefix:
+            low, high = self._prefix_range(user_prefix)
+            result[:low] = False
+            result[high:] = False
+        return np.flatnonzero(result)
+
+    def user_ids(self, positions):
+        return self.users[positions].tolist()
+
+
+def _synthetic_snapshot(output_file, user_count):
+    """Write a snapshot of user_count users with XML and Excel role assignments"""
+    from role_taxonomy import RoleTaxonomy
+
+    rng = np.random.default_rng(42)
+    taxonomy = RoleTaxonomy()
+    roles = sorted(f"{category}:{role}" for category, members in taxonomy.category_roles.items() for role in members)
+    users = np.char.add('U', np.char.zfill(np.arange(user_count).astype(str), 7))
+
+    arrays = {USERS_KEY: users}
+    manifest = {'sources': {}, 'userCount': user_count, 'created': time.strftime('%Y-%m-%d %H:%M:%S')}
+    for source, density in (('xml', 0.12), ('excel', 0.10)):
+        present = np.flatnonzero(rng.random(user_count) < 0.95).astype(np.int32)
+        arrays[f"{source}/__all__"] = present
+        entry = {'all': f"{source}/__all__", 'roles': {}}
+        for n, role in enumerate(roles):
+            key = f"{source}/{n}"
+            arrays[key] = present[rng.random(len(present)) < density]
+            entry['roles'][role] = key
+        manifest['sources'][source] = entry
+    arrays[MANIFEST_KEY] = np.array(json.dumps(manifest))
+    np.savez(output_file, **arrays)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query a role snapshot written next to the comparison results')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    query_parser = subparsers.add_parser('query', help="e.g. query snapshot.npz xml:Administrator - excel:Administrator")
+    query_parser.add_argument('snapshot')
+    query_parser.add_argument('terms', nargs='+', help="source:role terms joined by &, | or -")
+    query_parser.add_argument('--user-prefix', default=None, help='Only users whose ID starts with this')
+    query_parser.add_argument('--limit', type=int, default=50, help='User IDs to print (0 for all)')
+
+    roles_parser = subparsers.add_parser('roles', help='List sources and roles in a snapshot')
+    roles_parser.add_argument('snapshot')
+
+    bench_parser = subparsers.add_parser('bench', help='Time typical queries on a synthetic snapshot')
+    bench_parser.add_argument('--users', type=int, default=1000000)
+    bench_parser.add_argument('--output', default='role_snapshot_bench.npz')
+
+    args = parser.parse_args()
+
+    if args.command == 'roles':
+        snapshot = RoleSnapshot(args.snapshot)
+        for source in snapshot.sources():
+            print(f"{source}:")
+            for role in snapshot.roles(source):
+                print(f"  {role} ({len(snapshot.postings(source, role))} users)")
+        return
+
+    if args.command == 'query':
+        snapshot = RoleSnapshot(args.snapshot)
+        start = time.perf_counter()
+        try:
+            positions = snapshot.query(args.terms, args.user_prefix)
+        except (KeyError, ValueError) as e:
+            sys.exit(f"Error: {e}")
+        elapsed = time.perf_counter() - start
+        shown = positions if args.limit == 0 else positions[:args.limit]
+        for user_id in snapshot.user_ids(shown):
+            print(user_id)
+        print(f"\n{len(positions)} users ({elapsed * 1000:.2f} ms)", file=sys.stderr)
+        return
+
+    print(f"Writing synthetic snapshot with {args.users} users to {args.output}...")
+    _synthetic_snapshot(args.output, args.users)
+    snapshot = RoleSnapshot(args.output)
+    queries = [
+        ['xml:Administrator', '-', 'excel:Administrator'],
+        ['xml:OnRequest:STS Manager'],
+        ['xml:STS*', '&', 'excel:STS*'],
+        ['xml:*', '-', 'excel:*'],
+        ['xml:Scheduling:*', '|', 'excel:Scheduling:*', '-', 'xml:Restore:Administrator']
+    ]
+    for tokens in queries:
+        snapshot._cache.clear()
+        start = time.perf_counter()
+        cold = len(snapshot.query(tokens))
+        cold_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        snapshot.query(tokens, user_prefix='U00001')
+        warm_ms = (time.perf_counter() - start) * 1000
+        print(f"{' '.join(tokens):<70} {cold:>8} users  cold {cold_ms:7.2f} ms  warm+prefix {warm_ms:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+import sys
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from datetime import datetime
+
+from DiamondUserRoleComaprison import SCHEDULING_ROLE_MAP, ONREQUEST_ROLE_MAP, ADDITIONAL_ROLE_MAPS
+from id_keys import normalize_id
+from sheet_schemas import format_memory_report, read_typed_sheet
+
+UNMAPPED_CATEGORY = 'Unmapped'
+
+# Role maps arranged as application -> category -> {feed role name: canonical role}.
+# ADDITIONAL_ROLE_MAPS is split by its prefix; 'REFRINT_' is the feed's spelling of REPRINT.
+_ADDITIONAL_CATEGORIES = {
+    'RESTORE': 'Restore',
+    'DOCUPDATE': 'DocUpdate',
+    'NOTIFY': 'Notify',
+    'REPRINT': 'Reprint',
+    'REFRINT': 'Reprint'
+}
+
+ROLE_HIERARCHY = {'AWF': {'Scheduling': dict(SCHEDULING_ROLE_MAP), 'OnRequest': dict(ONREQUEST_ROLE_MAP)}}
+for _feed_role, _canonical in ADDITIONAL_ROLE_MAPS.items():
+    _category = _ADDITIONAL_CATEGORIES[_feed_role.split('_', 1)[0]]
+    ROLE_HIERARCHY['AWF'].setdefault(_category, {})[_feed_role] = _canonical
+
+# Where each category's roles live in AWF_List.xlsx: sheet name or AWFEMPLOYEE role column
+SHEET_CATEGORIES = {
+    'Scheduling': 'Scheduling',
+    'OnRequest': 'OnRequest'
+}
+AWFEMPLOYEE_COLUMN_CATEGORIES = {
+    'SCHEDULING': 'Scheduling',
+    'NOTIFY': 'Notify',
+    'REPRINT': 'Reprint',
+    'DOCUPDATE': 'DocUpdate',
+    'RESTORE': 'Restore'
+}
+
+
+def qualified_role(category, role):
+    """'Scheduling', 'Administrator' -> 'Scheduling:Administrator'"""
+    return f"{category}:{role}"
+
+
+class RoleTaxonomy:
+    """
+    Precomputed lookups over ROLE_HIERARCHY
+
+    Forward: feed role name -> (application, category, canonical role).
+    Reverse: canonical role -> categories holding it, category -> canonical roles,
+    application -> categories.
+    """
+
+    def __init__(self, hierarchy=None):
+        hierarchy = hierarchy or ROLE_HIERARCHY
+        self.feed_roles = {}
+        self.category_roles = defaultdict(set)
+        self.role_categories = defaultdict(set)
+        self.application_categories = defaultdict(set)
+        self.category_application = {}
+
+        for application, categories in hierarchy.items():
+            for category, role_map in categories.items():
+                self.application_categories[application].add(category)
+                self.category_application[category] = application
+                for feed_role, canonical in role_map.items():
+                    self.feed_roles[feed_role] = (application, category, canonical)
+                    self.category_roles[category].add(canonical)
+                    self.role_categories[canonical].add(category)
+
+    def classify_feed_role(self, feed_role):
+        """
+        Classify a raw XML role name (without the 'Role=' prefix)
+
+        Returns:
+            (application, category, canonical role); unknown roles fall into UNMAPPED_CATEGORY
+        """
+        return self.feed_roles.get(feed_role, (None, UNMAPPED_CATEGORY, feed_role))
+
+    def categories_for_role(self, canonical_role):
+        """Categories in which a canonical role exists (e.g. 'Administrator' -> 5 categories)"""
+        return self.role_categories.get(canonical_role, set())
+
+    def roles_in_category(self, category):
+        return self.category_roles.get(category, set())
+
+
+class RoleIndex:
+    """
+    Inverted index of one source: user -> qualified roles and category/role -> users
+
+    Qualified roles ('Category:Role') keep e.g. Scheduling and Restore 'Administrator' apart.
+    """
+
+    def __init__(self, name, taxonomy=None):
+        self.name = name
+        self.taxonomy = taxonomy or RoleTaxonomy()
+        self.user_roles = defaultdict(set)
+        self.user_categories = defaultdict(set)
+        self.role_users = defaultdict(set)
+        self.category_users = defaultdict(set)
+
+    def add(self, user_id, category, role):
+        key = qualified_role(category, role)
+        self.user_roles[user_id].add(key)
+        self.user_categories[user_id].add(category)
+        self.role_users[key].add(user_id)
+        self.category_users[category].add(user_id)
+
+    def add_feed_role(self, user_id, feed_role):
+        """Add a raw XML role, classified through the taxonomy"""
+        _, category, canonical = self.taxonomy.classify_feed_role(feed_role)
+        self.add(user_id, category, canonical)
+
+    def add_user(self, user_id):
+        """Register a user that holds no roles"""
+        self.user_roles.setdefault(user_id, set())
+
+    def categories_of(self, user_id):
+        return self.user_categories.get(user_id, set())
+
+    def users_in_category(self, category):
+        return self.category_users.get(category, set())
+
+    def users_with_role(self, category, role):
+        return self.role_users.get(qualified_role(category, role), set())
+
+    def users(self):
+        return set(self.user_roles)
+
+    def remap_users(self, mapping):
+        """Return a copy with user IDs translated through mapping (IDs not in mapping are kept)"""
+        remapped = RoleIndex(self.name, self.taxonomy)
+        for user_id, roles in self.user_roles.items():
+            new_id = mapping.get(user_id, user_id)
+            remapped.add_user(new_id)
+            for key in roles:
+                category, role = key.split(':', 1)
+                remapped.add(new_id, category, role)
+        return remapped
+
+
+def category_mismatches(xml_index, excel_index, category):
+    """
+    Compare one category between the XML and Excel indexes using set operations on posting lists
+
+    Returns:
+        {'category', 'only_in_xml', 'only_in_excel', 'both', 'missing_in_excel', 'extra_in_excel'}
+        where missing/extra map each canonical role to the users of 'both' that lack/have it only in Excel
+    """
+    xml_users = xml_index.users_in_category(category)
+    excel_users = excel_index.users_in_category(category)
+    both = xml_users & excel_users
+
+    missing_in_excel, extra_in_excel = {}, {}
+    roles = {key.split(':', 1)[1] for key in list(xml_index.role_users) + list(excel_index.role_users)
+             if key.startswith(category + ':')}
+    for role in roles:
+        xml_holders = xml_index.users_with_role(category, role) & both
+        excel_holders = excel_index.users_with_role(category, role) & both
+        if xml_holders - excel_holders:
+            missing_in_excel[role] = xml_holders - excel_holders
+        if excel_holders - xml_holders:
+            extra_in_excel[role] = excel_holders - xml_holders
+
+    return {
+        'category': category,
+        'only_in_xml': xml_users - excel_users,
+        'only_in_excel': excel_users - xml_users,
+        'both': both,
+        'missing_in_excel': missing_in_excel,
+        'extra_in_excel': extra_in_excel
+    }
+
+
+def parse_xml_roles(xml_file, taxonomy=None):
+    """Parse the XML feed into a RoleIndex of raw roles classified through the taxonomy."""
+    index = RoleIndex('XML', taxonomy)
+    try:
+        for _, element in ET.iterparse(xml_file, events=('end',)):
+            if element.tag != 'account':
+                continue
+            user_id = normalize_id(element.get('id'))
+            if user_id:
+                index.add_user(user_id)
+                for ref in element.iter('attributeValueRef'):
+                    role_id = ref.get('id') or ''
+                    if role_id.startswith('Role='):
+                        index.add_feed_role(user_id, role_id[5:])
+            element.clear()
+        return index
+
+    except ET.ParseError as e:
+        sys.exit(f"Error parsing XML file: {e}")
+    except FileNotFoundError:
+        sys.exit(f"Error: XML file '{xml_file}' not found")
+
+
+def parse_excel_roles(excel_file, taxonomy=None, memory=None):
+    """
+    Parse the category sheets and AWFEMPLOYEE role columns into a RoleIndex, plus the ACF2ID map.
+
+    memory, if given, is a list that collects the read_typed_sheet memory report of each sheet.
+    """
+    index = RoleIndex('Excel', taxonomy)
+    memory = [] if memory is None else memory
+    try:
+        id_map_df, report = read_typed_sheet(excel_file, 'AWF_ACF2IDNOVELL')
+        memory.append(report)
+        id_map_df = id_map_df.dropna()
+        id_map = dict(zip(id_map_df['ACF2ID'], id_map_df['NOVELLID']))
+
+        for sheet, category in SHEET_CATEGORIES.items():
+            try:
+                df, report = read_typed_sheet(excel_file, sheet)
+            except ValueError as e:
+                print(f"Warning: Error processing {sheet} sheet - {str(e)}")
+                continue
+            memory.append(report)
+            if 'ROLENAME' not in df.columns:
+                print(f"Warning: 'User_ID'/'ROLENAME' columns not found in {sheet} sheet")
+                continue
+            df = df.dropna(subset=['User_ID'])
+            for user_id in df['User_ID']:
+                index.add_user(user_id)
+            held = df[df['ROLENAME'].notna()]
+            for user_id, role in zip(held['User_ID'], held['ROLENAME']):
+                index.add(user_id, category, role)
+
+        try:
+            df, report = read_typed_sheet(excel_file, 'AWFEMPLOYEE')
+            memory.append(report)
+            df = df.dropna(subset=['User_ID'])
+            for column, category in AWFEMPLOYEE_COLUMN_CATEGORIES.items():
+                if column not in df.columns:
+                    continue
+                held = df[df[column].notna()]
+                for user_id, role in zip(held['User_ID'], held[column]):
+                    index.add(user_id, category, role)
+        except ValueError as e:
+            print(f"Warning: Error processing AWFEMPLOYEE sheet - {str(e)}")
+
+        return index, id_map
+
+    except ImportError:
+        sys.exit("Error: Missing required package 'openpyxl'. Please install with:\npip install openpyxl")
+    except FileNotFoundError:
+        sys.exit(f"Error: Excel file '{excel_file}' not found")
+    except Exception as e:
+        sys.exit(f"Error reading Excel file: {str(e)}")
+
+
+def resolve_excel_ids(excel_index, xml_index, id_map):
+    """Translate Excel ACF2IDs to the NOVELLIDs used in the XML where that is how the user appears there."""
+    xml_users = xml_index.users()
+    mapping = {acf2id: novellid for acf2id, novellid in id_map.items()
+               if acf2id not in xml_users and novellid in xml_users}
+    return excel_index.remap_users(mapping)
+
+
+def export_category_report(reports, output_file):
+    """Write one summary sheet and one mismatch sheet per category."""
+    import pandas as pd
+
+    try:
+        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+            summary = pd.DataFrame([{
+                'Category': r['category'],
+                'Users in both': len(r['both']),
+                'Only in XML': len(r['only_in_xml']),
+                'Only in Excel': len(r['only_in_excel']),
+                'Users missing a role in Excel': len(set().union(*r['missing_in_excel'].values())),
+                'Users with an extra role in Excel': len(set().union(*r['extra_in_excel'].values()))
+            } for r in reports])
+            summary.insert(0, 'Comparison Date', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            summary.to_excel(writer, sheet_name='Summary', index=False)
+
+            for r in reports:
+                rows = [{'User_ID': u, 'Issue': 'Only in XML', 'Role': ''} for u in sorted(r['only_in_xml'])]
+                rows += [{'User_ID': u, 'Issue': 'Only in Excel', 'Role': ''} for u in sorted(r['only_in_excel'])]
+                for label, key in (('Missing in Excel', 'missing_in_excel'), ('Extra in Excel', 'extra_in_excel')):
+                    for role, users in sorted(r[key].items()):
+                        rows += [{'User_ID': u, 'Issue': label, 'Role': role} for u in sorted(users)]
+                frame = pd.DataFrame(rows) if rows else pd.DataFrame({'Message': ['No mismatches found']})
+                frame.to_excel(writer, sheet_name=r['category'][:31], index=False)
+
+    except Exception as e:
+        sys.exit(f"Error exporting to Excel: {e}")
+
+
+def main():
+    from role_snapshot import build_snapshot
+
+    print("AWF Role Category Comparison Tool\n" + "=" * 34)
+
+    # Configuration
+    XML_FILE = 'AWF_01_accounts.xml'
+    EXCEL_FILE = 'AWF_List.xlsx'
+    OUTPUT_FILE = 'AWF_Role_Category_Comparison_Results.xlsx'
+    SNAPSHOT_FILE = 'AWF_Role_Snapshot.npz'
+
+    try:
+        taxonomy = RoleTaxonomy()
+
+        print("\n[1/3] Parsing XML file...")
+        xml_index = parse_xml_roles(XML_FILE, taxonomy)
+
+        print("[2/3] Parsing Excel file...")
+        memory = []
+        excel_index, id_map = parse_excel_roles(EXCEL_FILE, taxonomy, memory)
+        for report in memory:
+            print(f"  - {format_memory_report(report)}")
+        excel_index = resolve_excel_ids(excel_index, xml_index, id_map)
+
+        print("[3/3] Comparing categories...")
+        categories = sorted(set(xml_index.category_users) | set(excel_index.category_users))
+        reports = [category_mismatches(xml_index, excel_index, category) for category in categories]
+
+        print("\nComparison Results:")
+        for r in reports:
+            print(f"- {r['category']}: {len(r['both'])} in both, {len(r['only_in_xml'])} only in XML, "
+                  f"{len(r['only_in_excel'])} only in Excel, "
+                  f"{sum(len(u) for u in r['missing_in_excel'].values())} missing / "
+                  f"{sum(len(u) for u in r['extra_in_excel'].values())} extra role assignments in Excel")
+
+        print(f"\nExporting results to {OUTPUT_FILE}...")
+        export_category_report(reports, OUTPUT_FILE)
+        build_snapshot({'xml': xml_index, 'excel': excel_index}, SNAPSHOT_FILE)
+        print(f"Done! Results exported successfully. Query follow-ups with: python role_snapshot.py query {SNAPSHOT_FILE} ...")
+    except Exception as e:
+        print(f"\nError: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from D_daskboard import DynatraceSettingsAPI
+
+DIFF_FIELDS = ['objectId', 'schemaId', 'scope', 'externalId', 'value']
+
+# Value fields tried, in order, to identify an object when it has no externalId
+DEFAULT_KEY_FIELDS = ['name', 'displayName', 'summary', 'key']
+
+
+def canonical_hash(value: Any) -> str:
+    """SHA-256 of the canonical JSON form (sorted keys, no whitespace) of a settings value"""
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def object_key(obj: Dict[str, Any], key_fields: Optional[Dict[str, List[str]]] = None) -> Tuple[str, str, str]:
+    """
+    Identify a settings object independently of its environment-specific objectId
+
+    The key is (schemaId, scope, identity) where identity is the externalId if present, otherwise
+    the per-schema key_fields of the value, otherwise the first of DEFAULT_KEY_FIELDS found in the
+    value, falling back to the hash of the whole value. The objectId is never used: it differs
+    between environments, so every such object would show up as removed and added. An unkeyed
+    object whose value changed therefore also shows up that way, not as changed.
+    """
+    schema_id = obj.get('schemaId', '')
+    scope = obj.get('scope', '')
+
+    if obj.get('externalId'):
+        return schema_id, scope, f"externalId={obj['externalId']}"
+
+    value = obj.get('value') or {}
+    schema_fields = (key_fields or {}).get(schema_id)
+    if schema_fields:
+        # Explicit key fields form a composite identity
+        parts = [f"{field}={json.dumps(value.get(field), sort_keys=True)}" for field in schema_fields]
+        return schema_id, scope, '|'.join(parts)
+
+    for field in DEFAULT_KEY_FIELDS:
+        if field in value:
+            return schema_id, scope, f"{field}={json.dumps(value[field], sort_keys=True)}"
+
+    return schema_id, scope, f"valueHash={canonical_hash(obj.get('value'))}"
+
+
+def index_objects(
+        objects: List[Dict[str, Any]],
+        key_fields: Optional[Dict[str, List[str]]] = None
+) -> Tuple[Dict[Tuple[str, str, str], Tuple[str, Dict[str, Any]]], List[Tuple[str, str, str]]]:
+    """
+    Index objects by key and hash their values once
+
+    Returns:
+        (index mapping key -> (value hash, object), list of keys that occurred more than once)
+    """
+    index = {}
+    duplicates = []
+    for obj in objects:
+        key = object_key(obj, key_fields)
+        if key in index:
+            duplicates.append(key)
+            continue
+        index[key] = (canonical_hash(obj.get('value')), obj)
+    return index, duplicates
+
+
+def changed_fields(source_value: Any, target_value: Any) -> List[str]:
+    """Top-level value fields whose canonical form differs"""
+    if not isinstance(source_value, dict) or not isinstance(target_value, dict):
+        return ['value']
+    return sorted(
+        field for field in set(source_value) | set(target_value)
+        if field not in source_value or field not in target_value
+        or canonical_hash(source_value[field]) != canonical_hash(target_value[field])
+    )
+
+
+def diff_settings(
+        source_objects: List[Dict[str, Any]],
+        target_objects: List[Dict[str, Any]],
+        key_fields: Optional[Dict[str, List[str]]] = None
+) -> Dict[str, Any]:
+    """
+    Compare two settings dumps in linear time
+
+    'added' objects exist only in the target, 'removed' objects only in the source and
+    'changed' objects exist in both with a different value hash.
+
+    Returns:
+        Structured diff report
+    """
+    source_index, source_duplicates = index_objects(source_objects, key_fields)
+    target_index, target_duplicates = index_objects(target_objects, key_fields)
+
+    added, removed, changed = [], [], []
+    unchanged = 0
+
+    for key, (source_hash, source_obj) in source_index.items():
+        target_entry = target_index.get(key)
+        if target_entry is None:
+            removed.append(_describe(key, source_obj))
+        elif target_entry[0] == source_hash:
+            unchanged += 1
+        else:
+            target_obj = target_entry[1]
+            changed.append({
+                'schemaId': key[0],
+                'scope': key[1],
+                'key': key[2],
+                'sourceObjectId': source_obj.get('objectId'),
+                'targetObjectId': target_obj.get('objectId'),
+                'changedFields': changed_fields(source_obj.get('value'), target_obj.get('value')),
+                'sourceValue': source_obj.get('value'),
+                'targetValue': target_obj.get('value')
+            })
+
+    for key, (_, target_obj) in target_index.items():
+        if key not in source_index:
+            added.append(_describe(key, target_obj))
+
+    return {
+        'summary': {
+            'sourceObjects': len(source_objects),
+            'targetObjects': len(target_objects),
+            'added': len(added),
+            'removed': len(removed),
+            'changed': len(changed),
+            'unchanged': unchanged,
+            'duplicateKeys': len(source_duplicates) + len(target_duplicates)
+        },
+        'added': sorted(added, key=_sort_key),
+        'removed': sorted(removed, key=_sort_key),
+        'changed': sorted(changed, key=_sort_key),
+        'duplicateKeys': {
+            'source': [list(key) for key in source_duplicates],
+            'target': [list(key) for key in target_duplicates]
+        }
+    }
+
+
+def _describe(key: Tuple[str, str, str], obj: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'schemaId': key[0],
+        'scope': key[1],
+        'key': key[2],
+        'objectId': obj.get('objectId'),
+        'value': obj.get('value')
+    }
+
+
+def _sort_key(entry: Dict[str, Any]) -> Tuple[str, str, str]:
+    return entry['schemaId'], entry['scope'], entry['key']
+
+
+def fetch_environments(
+        source_api: DynatraceSettingsAPI,
+        target_api: DynatraceSettingsAPI,
+        schema_ids: List[str],
+        max_workers: int = 8
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Fetch the same schemas from two environments concurrently, one pagination chain per (environment, schema)
+
+    Returns:
+        (source objects, target objects)
+    """
+    jobs = [(side, api, schema_id)
+            for side, api in (('source', source_api), ('target', target_api))
+            for schema_id in schema_ids]
+
+    def fetch(job):
+        side, api, schema_id = job
+        return side, api.get_all_settings_objects(schema_ids=[schema_id], fields=DIFF_FIELDS)
+
+    objects = {'source': [], 'target': []}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as executor:
+        for side, items in executor.map(fetch, jobs):
+            objects[side].extend(items)
+
+    return objects['source'], objects['target']
+
+
+def diff_environments(
+        source_api: DynatraceSettingsAPI,
+        target_api: DynatraceSettingsAPI,
+        schema_ids: List[str],
+        key_fields: Optional[Dict[str, List[str]]] = None,
+        max_workers: int = 8
+) -> Dict[str, Any]:
+    """
+    Fetch schemas from two environments and diff them
+
+    Args:
+        source_api: Client for the reference environment (e.g., prod)
+        target_api: Client for the compared environment (e.g., non-prod)
+        schema_ids: Schemas to compare
+        key_fields: Optional per-schema value fields identifying objects without externalId
+        max_workers: Concurrent pagination chains
+
+    Returns:
+        Structured diff report (see diff_settings) with source/target metadata
+    """
+    source_objects, target_objects = fetch_environments(source_api, target_api, schema_ids, max_workers)
+    report = diff_settings(source_objects, target_objects, key_fields)
+    report['source'] = source_api.base_url
+    report['target'] = target_api.base_url
+    report['schemaIds'] = schema_ids
+    report['generated'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return report
+
+
+def main():
+    # Configuration - Replace these with your actual values
+    SOURCE_URL = "prod-environment.live.dynatrace.com"
+    SOURCE_TOKEN = "prod-api-token-here"
+    TARGET_URL = "nonprod-environment.live.dynatrace.com"
+    TARGET_TOKEN = "nonprod-api-token-here"
+    SCHEMA_IDS = ["builtin:alerting.profile", "builtin:anomaly-detection.metric-events"]
+    OUTPUT_FILE = 'settings_diff_report.json'
+
+    source_api = DynatraceSettingsAPI(SOURCE_URL, SOURCE_TOKEN, use_session=True, verbose=False)
+    target_api = DynatraceSettingsAPI(TARGET_URL, TARGET_TOKEN, use_session=True, verbose=False)
+
+    print(f"Comparing {len(SCHEMA_IDS)} schemas: {SOURCE_URL} -> {TARGET_URL}")
+    report = diff_environments(source_api, target_api, SCHEMA_IDS)
+
+    summary = report['summary']
+    print(f"- Source objects: {summary['sourceObjects']}")
+    print(f"- Target objects: {summary['targetObjects']}")
+    print(f"- Added in target: {summary['added']}")
+    print(f"- Removed from target: {summary['removed']}")
+    print(f"- Changed: {summary['changed']}")
+    print(f"- Unchanged: {summary['unchanged']}")
+    print(f"- Duplicate keys: {summary['duplicateKeys']}")
+
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nDiff report written to {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
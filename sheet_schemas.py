@@ -0,0 +1,84 @@
+from excel_io import NA_STRINGS
+from id_keys import normalize_id
+
+# How each AWF_List.xlsx sheet is read: header row, column range, ID columns (normalized strings,
+# required) and role columns (categoricals, optional). Column names match case-insensitively.
+SHEET_SCHEMAS = {
+    'AWF_ACF2IDNOVELL': {'header': 5, 'usecols': 'C:D', 'ids': ('ACF2ID', 'NOVELLID'), 'roles': ()},
+    'Scheduling': {'header': 5, 'usecols': 'C:K', 'ids': ('User_ID',), 'roles': ('ROLENAME',)},
+    'OnRequest': {'header': 5, 'usecols': 'C:K', 'ids': ('User_ID',), 'roles': ('ROLENAME',)},
+    'ASPNET_Users': {'header': 5, 'usecols': 'C:K', 'ids': ('User_ID',), 'roles': ('ROLENAME',)},
+    'AWF_USERS': {'header': 5, 'usecols': None, 'ids': ('User_ID',), 'roles': ('ROLENAME',)},
+    'AWF_USERACCESSPROFILE': {'header': 5, 'usecols': None, 'ids': ('User_ID',), 'roles': ()},
+    'AWFEMPLOYEE': {'header': 5, 'usecols': None, 'ids': ('User_ID',),
+                    'roles': ('SCHEDULING', 'NOTIFY', 'REPRINT', 'DOCUPDATE', 'RESTORE')}
+}
+
+
+def _match_column(columns, name):
+    """Column of the sheet holding `name`: same name ignoring case, else one containing it"""
+    wanted = name.lower()
+    for column in columns:
+        if str(column).lower() == wanted:
+            return column
+    return next((column for column in columns if wanted in str(column).lower()), None)
+
+
+def read_typed_sheet(excel_file, sheet_name, schema=None):
+    """
+    Read one sheet into a DataFrame typed by its schema, with NULLs normalized once
+
+    ID columns become pandas strings normalized by normalize_id, role columns become
+    categoricals; blanks and the NA strings ('NULL', 'nan', ...) are missing values in both.
+    Columns outside the schema are dropped.
+
+    Args:
+        excel_file: Path of the .xlsx workbook
+        sheet_name: Worksheet name
+        schema: Entry of SHEET_SCHEMAS (default: the sheet's own)
+
+    Returns:
+        (DataFrame with the schema's column names, memory report row for the sheet)
+
+    Raises:
+        ValueError: The sheet is missing or lacks one of the schema's ID columns
+    """
+    import pandas as pd
+
+    schema = schema or SHEET_SCHEMAS[sheet_name]
+    # object keeps Excel's ints as ints instead of floats (12345.0) when a column has blanks
+    raw = pd.read_excel(excel_file, sheet_name=sheet_name, header=schema['header'], usecols=schema['usecols'],
+                        dtype=object)
+
+    columns = {}
+    for name in schema['ids'] + schema['roles']:
+        column = _match_column(raw.columns, name)
+        if column is not None:
+            columns[column] = name
+        elif name in schema['ids']:
+            raise ValueError(f"'{name}' column not found in {sheet_name} sheet")
+    typed = raw[list(columns)].rename(columns=columns)
+
+    for name in schema['ids']:
+        typed[name] = typed[name].map(normalize_id, na_action='ignore').astype('string')
+    for name in schema['roles']:
+        if name in typed.columns:
+            roles = typed[name].map(lambda value: str(value).strip(), na_action='ignore')
+            typed[name] = roles.where(~roles.isin(NA_STRINGS)).astype('category')
+
+    # Both sizes cover the schema's columns only, so the saving is not inflated by the dropped ones
+    report = {
+        'Sheet': sheet_name,
+        'Rows': len(typed),
+        'Untyped_Bytes': int(raw[list(columns)].memory_usage(deep=True).sum()),
+        'Typed_Bytes': int(typed.memory_usage(deep=True).sum())
+    }
+    return typed, report
+
+
+def format_memory_report(report):
+    """'Scheduling: 812 rows, 402 KB untyped -> 61 KB typed (85% less)'"""
+    untyped, typed = report['Untyped_Bytes'], report['Typed_Bytes']
+    saved = 100 * (1 - typed / untyped) if untyped else 0
+    return (f"{report['Sheet']}: {report['Rows']:,} rows, {untyped / 1024:,.0f} KB untyped -> "
+            f"{typed / 1024:,.0f} KB typed ({saved:.0f}% less)")
@@ -0,0 +1,84 @@
+import heapq
+import itertools
+import pickle
+import tempfile
+
+# Records sorted in memory before a run is spilled to a temporary file
+RUN_SIZE = 200000
+# Records per pickle frame in a run file; a merge holds one frame per run
+FRAME_SIZE = 4096
+
+
+def _spill(run):
+    """Write a sorted run to a temporary file, FRAME_SIZE records per pickle frame"""
+    f = tempfile.TemporaryFile()
+    for start in range(0, len(run), FRAME_SIZE):
+        pickle.dump(run[start:start + FRAME_SIZE], f, pickle.HIGHEST_PROTOCOL)
+    f.seek(0)
+    return f
+
+
+def _read_run(f):
+    with f:
+        while True:
+            try:
+                frame = pickle.load(f)
+            except EOFError:
+                return
+            yield from frame
+
+
+def external_sort(records, run_size=RUN_SIZE):
+    """
+    Sort a stream of records holding at most run_size of them in memory
+
+    Records are sorted in runs of run_size and spilled to temporary files, then merged. Input
+    that is already sorted costs one linear pass per run (timsort) and the runs are concatenated
+    instead of merged.
+
+    Args:
+        records: Iterable of mutually comparable records (e.g. tuples of strings)
+        run_size: Records per in-memory run
+
+    Yields:
+        The records in sorted order
+    """
+    runs = []
+    in_order = True
+    last = None
+    records = iter(records)
+    while True:
+        run = list(itertools.islice(records, run_size))
+        if not run:
+            break
+        run.sort()
+        if last is not None and run[0] < last:
+            in_order = False
+        last = run[-1]
+        if len(run) < run_size and not runs:
+            yield from run  # Everything fit in one run, nothing to spill
+            return
+        runs.append(_spill(run))
+
+    readers = [_read_run(f) for f in runs]
+    yield from itertools.chain(*readers) if in_order else heapq.merge(*readers)
+
+
+def merge_groups(xml_records, excel_records):
+    """
+    Walk two sorted (key, user_id, role) streams in one linear pass
+
+    Args:
+        xml_records: Sorted records of the XML feed
+        excel_records: Sorted records of the Excel workbook
+
+    Yields:
+        (key, {user_id: roles} of the XML, {user_id: roles} of Excel) for each key, in key order
+    """
+    tagged = heapq.merge(((key, 0, user_id, role) for key, user_id, role in xml_records),
+                         ((key, 1, user_id, role) for key, user_id, role in excel_records))
+    for key, group in itertools.groupby(tagged, key=lambda record: record[0]):
+        sides = ({}, {})
+        for _, side, user_id, role in group:
+            sides[side].setdefault(user_id, set()).add(role)
+        yield key, sides[0], sides[1]
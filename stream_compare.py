@@ -0,0 +1,233 @@
+import itertools
+import queue
+from collections import Counter
+import sys
+import threading
+import xml.etree.ElementTree as ET
+
+from excel_io import RowSpool
+from id_keys import normalize_id
+from sort_merge import external_sort
+
+# Accounts per queue item, and queue items in flight between two stages
+BATCH_SIZE = 500
+QUEUE_SIZE = 8
+
+_DONE = object()
+
+
+def iter_account_elements(xml_file):
+    """Yield each parsed <account> element, dropping it afterwards so memory holds only the one in flight"""
+    stack = []
+    for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag == 'account':
+            yield elem
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+
+def iter_accounts(xml_file, account_roles, profile=None):
+    """
+    Stream the <account> elements of a feed without building the whole tree
+
+    Args:
+        xml_file: XML feed
+        account_roles: The comparator's account_roles(account) -> set of roles
+        profile: FeedProfile that observes every account on the way
+
+    Yields:
+        (user_id, roles) for each account with an id and at least one role, like parse_xml keeps them
+    """
+    for account in iter_account_elements(xml_file):
+        if profile is not None:
+            profile.observe(account)
+        user_id = normalize_id(account.get('id'))
+        roles = account_roles(account)
+        if user_id and roles:
+            yield user_id, roles
+
+
+def iter_account_ids(xml_file, profile=None):
+    """
+    Yield the non-empty id of each <account>, like AWF_Users_Comparator.parse_xml keeps them
+
+    profile, a FeedProfile, observes every account on the way.
+    """
+    for account in iter_account_elements(xml_file):
+        if profile is not None:
+            profile.observe(account)
+        user_id = normalize_id(account.get('id'))
+        if user_id:
+            yield user_id
+
+
+def confirm_duplicate_ids(xml_file, profile):
+    """
+    Count the duplicate-id candidates of a bounded FeedProfile exactly with one more pass over the feed
+
+    Memory holds only the candidates (true duplicates plus the Bloom filter's false positives).
+    Does nothing for a profile without a Bloom filter, whose duplicate counts are already exact.
+    """
+    if profile is None or not profile.bounded:
+        return
+    candidates = profile.duplicate_candidates()
+    occurrences = Counter()
+    if candidates:
+        for user_id in iter_account_ids(xml_file):
+            if user_id in candidates:
+                occurrences[user_id] += 1
+    profile.confirm_duplicates(occurrences)
+
+
+def count_accounts(xml_file, chunk_size=1 << 20):
+    """Upper bound on the <account> elements of a feed from a raw byte scan (no XML parsing)"""
+    tag = b'<account'
+    count = 0
+    tail = b''
+    with open(xml_file, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return count
+            data = tail + chunk
+            count += data.count(tag)
+            # A tag cut at the chunk boundary is completed (and counted) with the next read
+            tail = data[-(len(tag) - 1):]
+
+
+def run_pipeline(xml_file, account_roles, reconcile, batch_size=BATCH_SIZE, queue_size=QUEUE_SIZE, profile=None,
+                 revise=None, sorted_sheets=()):
+    """
+    Reconcile a feed account by account while it is still being parsed
+
+    Three stages joined by bounded queues: a parser thread streams batches of accounts, the
+    calling thread passes each one to reconcile, and an exporter thread spools the emitted rows
+    to disk. Memory holds the comparator's Excel-side index, the feed's user IDs (each with its
+    roles, equal role sets shared) and the batches in flight.
+
+    A user ID is reconciled once, with the roles of its first account. When later accounts with
+    the same ID add roles, the rows emitted for that user are dropped at the end of the feed and
+    it is reconciled again with the merged roles, so duplicates come out like parse_xml merges them.
+
+    Args:
+        xml_file: XML feed
+        account_roles: The comparator's account_roles(account) -> set of roles
+        reconcile: reconcile(user_id, roles) -> [(sheet, row)] result rows for that user
+        batch_size: Accounts per queue item
+        queue_size: Queue items in flight between two stages
+        profile: FeedProfile the parser thread fills with every account
+        revise: revise(user_id, merged_roles) -> [(sheet, row)] for a user reconciled before
+            (default: reconcile)
+        sorted_sheets: Sheets whose rows are spooled in sorted order (e.g. the XML-only IDs)
+
+    Returns:
+        {sheet: RowSpool} of the emitted rows, in emission order unless sorted
+    """
+    accounts = queue.Queue(queue_size)
+    emitted = queue.Queue(queue_size)
+    stop = threading.Event()
+    spools = {}  # sheet -> RowSpool of [user_id, row]
+    errors = []
+    seen = {}  # user id -> frozenset of the roles of all its accounts so far
+    shared_roles = {}
+    revised = set()
+
+    def put(target, item):
+        # Give up once another stage has failed, so nobody blocks on a dead consumer
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def get(source):
+        while not stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def parse():
+        try:
+            batch = []
+            for account in iter_accounts(xml_file, account_roles, profile):
+                batch.append(account)
+                if len(batch) >= batch_size:
+                    put(accounts, batch)
+                    batch = []
+                    if stop.is_set():
+                        return
+            put(accounts, batch)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            put(accounts, _DONE)
+
+    def export():
+        try:
+            while True:
+                rows = get(emitted)
+                if rows is _DONE:
+                    return
+                for user_id, sheet, row in rows:
+                    if sheet not in spools:
+                        spools[sheet] = RowSpool()
+                    spools[sheet].append([user_id, row])
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+
+    parser = threading.Thread(target=parse, daemon=True)
+    exporter = threading.Thread(target=export, daemon=True)
+    parser.start()
+    exporter.start()
+    try:
+        while True:
+            batch = get(accounts)
+            if batch is _DONE:
+                break
+            rows = []
+            for user_id, roles in batch:
+                known = seen.get(user_id)
+                if known is None:
+                    seen[user_id] = shared_roles.setdefault(frozenset(roles), frozenset(roles))
+                    rows.extend((user_id, sheet, row) for sheet, row in reconcile(user_id, roles))
+                elif not roles <= known:
+                    merged = known | roles
+                    seen[user_id] = shared_roles.setdefault(merged, merged)
+                    revised.add(user_id)
+            if rows:
+                put(emitted, rows)
+        put(emitted, _DONE)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        parser.join()
+        exporter.join()
+
+    if errors:
+        if isinstance(errors[0], ET.ParseError):
+            sys.exit(f"Error parsing XML file: {errors[0]}")
+        raise errors[0]
+
+    revise = revise or reconcile
+    revisions = [(sheet, row) for user_id in sorted(revised) for sheet, row in revise(user_id, set(seen[user_id]))]
+    results = {}
+    for sheet in dict.fromkeys(list(spools) + [sheet for sheet, _ in revisions]):
+        spool = spools.get(sheet, [])
+        rows = itertools.chain((row for user_id, row in spool if user_id not in revised),
+                               (row for revised_sheet, row in revisions if revised_sheet == sheet))
+        results[sheet] = RowSpool()
+        for row in external_sort(rows) if sheet in sorted_sheets else rows:
+            results[sheet].append(row)
+        if spool:
+            spool.close()
+    return results
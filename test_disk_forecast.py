@@ -0,0 +1,44 @@
+import numpy as np
+
+from disk_forecast import FIT_METHODS, forecast_disks, series_matrix, to_violations
+
+
+def test_linear_growth():
+    """A disk growing 1 point a day from 50% fills 50 days after its last point"""
+    usage = np.array([[50.0 + day for day in range(30)], [40.0] * 30])
+    for method in FIT_METHODS:
+        forecast = forecast_disks(usage, method=method)
+        assert abs(forecast['growthPerDay'][0] - 1.0) < 1e-9, method
+        assert abs(forecast['daysUntilFull'][0] - 21.0) < 1e-9, method
+        assert forecast['daysUntilFull'][1] == np.inf, method
+        assert forecast['usedPercentage'].tolist() == [79.0, 40.0], method
+
+
+def test_no_points():
+    """A matrix without columns (no series had data) gives NaN for every disk instead of raising"""
+    for method in FIT_METHODS:
+        forecast = forecast_disks(np.zeros((2, 0)), method=method)
+        for key, values in forecast.items():
+            assert values.shape == (2,), (method, key)
+            assert np.isnan(values).all(), (method, key)
+        assert to_violations(['DISK-1', 'DISK-2'], forecast) == []
+
+
+def test_no_points_from_records():
+    """Records whose series are all empty go through series_matrix and the forecast without errors"""
+    records = [{'dt.entity.disk': 'DISK-1'}, {'dt.entity.disk': 'DISK-2', 'max(dt.host.disk.used.percent)': []}]
+    disk_ids, usage = series_matrix(records)
+    assert usage.shape == (2, 0)
+    assert to_violations(disk_ids, forecast_disks(usage)) == []
+
+
+def main():
+    tests = [value for name, value in sorted(globals().items()) if name.startswith('test_')]
+    for test in tests:
+        test()
+        print(f"ok   {test.__name__}")
+    print(f"\n{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
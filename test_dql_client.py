@@ -0,0 +1,148 @@
+import json
+
+from dql_client import DQLClient, DQLQueryError, _RecordStream, build_query
+from mock_dynatrace_server import MockDynatraceServer, generate_disk_inventory, synthesize_dql_records
+
+TOKEN = 'test-token'
+
+# Strings that look like JSON structure, escapes and multi-byte UTF-8 inside records
+TRICKY_RESPONSE = {
+    'state': 'SUCCEEDED',
+    'progress': 100,
+    'result': {
+        'metadata': {'note': 'records: [not the array]', 'records': 'a string, not the array'},
+        'records': [
+            {'id': 'DISK-1', 'name': 'C:\\', 'label': 'quote " and brace } and bracket ]'},
+            {'id': 'DISK-2', 'name': 'Ümlaut – €', 'values': [1.5, None, {'nested': [1, 2]}]},
+            {'id': 'DISK-3', 'records': []}
+        ],
+        'types': []
+    }
+}
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_record_stream_any_chunking():
+    """Records parse the same whatever the chunk boundaries, including inside UTF-8 sequences"""
+    data = json.dumps(TRICKY_RESPONSE, ensure_ascii=False).encode('utf-8')
+    expected = TRICKY_RESPONSE['result']['records']
+    for size in (1, 2, 3, 7, 64, len(data)):
+        stream = _RecordStream(_chunks(data, size))
+        assert stream.find_records(), size
+        assert list(stream.iter_records()) == expected, size
+
+
+def test_record_stream_without_records():
+    """A RUNNING document has no records array; its text stays available for the state check"""
+    data = json.dumps({'state': 'RUNNING', 'requestToken': 'abc', 'progress': 40}).encode('utf-8')
+    stream = _RecordStream(_chunks(data, 5))
+    assert not stream.find_records()
+    assert json.loads(stream.buffer)['requestToken'] == 'abc'
+
+
+def test_record_stream_truncated():
+    """A response cut off inside the array raises instead of silently dropping records"""
+    data = json.dumps(TRICKY_RESPONSE).encode('utf-8')
+    cut = data[:data.index(b'DISK-2') + 3]
+    stream = _RecordStream(_chunks(cut, 16))
+    assert stream.find_records()
+    records = stream.iter_records()
+    assert next(records)['id'] == 'DISK-1'
+    try:
+        next(records)
+    except DQLQueryError:
+        pass
+    else:
+        raise AssertionError('truncated response did not raise DQLQueryError')
+
+
+def test_streamed_query_matches_server():
+    """A response larger than one read chunk streams back every record, in order"""
+    disks = generate_disk_inventory(disk_count=1500)
+    query = build_query('disk_entities')
+    with MockDynatraceServer(api_token=TOKEN, disks=disks) as server:
+        client = DQLClient(server.url, TOKEN, verbose=False)
+        try:
+            records = list(client.iter_records(query))
+        finally:
+            client.close()
+
+    expected = synthesize_dql_records(query, disks)
+    assert len(json.dumps(expected)) > 65536  # spans several iter_content chunks
+    assert [r['id'] for r in records] == [r['id'] for r in expected]
+    assert records[0].keys() == expected[0].keys()
+
+
+def test_polls_until_query_finishes():
+    """A query still RUNNING after the execute long-poll is polled until it succeeds"""
+    disks = generate_disk_inventory(disk_count=20)
+    with MockDynatraceServer(api_token=TOKEN, disks=disks, query_duration=0.6) as server:
+        client = DQLClient(server.url, TOKEN, poll_timeout_ms=200, verbose=False)
+        try:
+            records = list(client.iter_records(build_query('disk_entities')))
+        finally:
+            client.close()
+        requests_made = server.state.stats['requests']
+
+    assert len(records) == len(disks)
+    assert requests_made >= 3  # execute plus at least two polls
+
+
+def test_record_chunks():
+    """iter_record_chunks pages the stream into lists of at most chunk_size records"""
+    disks = generate_disk_inventory(disk_count=25)
+    with MockDynatraceServer(api_token=TOKEN, disks=disks) as server:
+        client = DQLClient(server.url, TOKEN, verbose=False)
+        try:
+            chunks = list(client.iter_record_chunks(build_query('disk_entities'), chunk_size=10))
+            truncated = list(client.iter_records(build_query('disk_entities'), max_result_records=7))
+        finally:
+            client.close()
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert [r['id'] for chunk in chunks for r in chunk] == [disk['id'] for disk in disks]
+    assert len(truncated) == 7
+
+
+def test_throttled_requests_are_retried():
+    """HTTP 429 answers are retried after Retry-After until the query goes through"""
+    disks = generate_disk_inventory(disk_count=10)
+    with MockDynatraceServer(api_token=TOKEN, disks=disks, rate_limit=2, retry_after=0.2) as server:
+        client = DQLClient(server.url, TOKEN, max_retries=10, verbose=False)
+        try:
+            counts = [len(list(client.iter_records(build_query('disk_entities')))) for _ in range(4)]
+        finally:
+            client.close()
+        throttled = server.state.stats['throttled']
+
+    assert counts == [len(disks)] * 4
+    assert throttled > 0
+
+
+def test_rejected_query_raises():
+    """A query the server rejects surfaces as DQLQueryError with the server's message"""
+    with MockDynatraceServer(api_token=TOKEN) as server:
+        client = DQLClient(server.url, TOKEN, verbose=False)
+        try:
+            list(client.iter_records('fetch nothing.we.know'))
+        except DQLQueryError as e:
+            assert 'HTTP 400' in str(e)
+        else:
+            raise AssertionError('rejected query did not raise DQLQueryError')
+        finally:
+            client.close()
+
+
+def main():
+    tests = [value for name, value in sorted(globals().items()) if name.startswith('test_')]
+    for test in tests:
+        test()
+        print(f"ok   {test.__name__}")
+    print(f"\n{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
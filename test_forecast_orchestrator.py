@@ -0,0 +1,157 @@
+import random
+
+from dql_client import build_query
+from forecast_orchestrator import (ANALYZER_NAME, AdaptivePoller, AnalyzerClient, AnalyzerError, ForecastOrchestrator,
+                                   output_to_violation)
+from mock_dynatrace_server import MockDynatraceServer, generate_disk_inventory, synthesize_forecast_output
+
+TOKEN = 'test-token'
+HORIZON = 90
+HISTORY_DAYS = 30
+
+
+def _disks(inventory):
+    return [{'id': disk['id'], 'name': disk['name'], 'host': disk['host_id'], 'hostName': disk['host_name']}
+            for disk in inventory]
+
+
+def _expected_violations(inventory):
+    """Violations computed offline from the same synthetic forecasts the mock analyzer returns"""
+    expected = {}
+    for disk in _disks(inventory):
+        expression = build_query('disk_used_percent_daily', days=HISTORY_DAYS, disk_ids=[disk['id']])
+        violation = output_to_violation(synthesize_forecast_output(expression, inventory, HORIZON), disk)
+        if violation:
+            expected[disk['id']] = violation
+    return expected
+
+
+def test_first_delay_follows_observed_durations():
+    """The first poll starts at `initial`, then at a fraction of the moving average, within bounds"""
+    poller = AdaptivePoller(initial=0.2, maximum=5.0, first_fraction=0.8)
+    assert poller.first_delay() == 0.2
+
+    poller.observe(2.0)
+    assert abs(poller.first_delay() - 1.6) < 1e-9
+    poller.observe(1.0)  # 0.8 * 2.0 + 0.2 * 1.0
+    assert abs(poller.first_delay() - 0.8 * 1.8) < 1e-9
+
+    poller.observe(100.0)
+    assert poller.first_delay() == 5.0
+    fast = AdaptivePoller(initial=0.2)
+    fast.observe(0.01)
+    assert fast.first_delay() == 0.2
+
+
+def test_next_delay_backs_off_to_maximum():
+    """Later polls grow by `multiplier` (with +-15% jitter) and never pass maximum by more than the jitter"""
+    random.seed(7)
+    poller = AdaptivePoller(initial=0.2, maximum=5.0, multiplier=1.6)
+    delay = 0.2
+    for _ in range(5):
+        following = poller.next_delay(delay)
+        assert 0.85 * min(5.0, delay * 1.6) <= following <= 1.15 * min(5.0, delay * 1.6)
+        delay = following
+    for _ in range(20):
+        delay = poller.next_delay(delay)
+    assert 0.85 * 5.0 <= delay <= 1.15 * 5.0
+
+
+def test_run_completes_every_disk():
+    """Every disk's execution is polled to completion and yields the offline violation"""
+    inventory = generate_disk_inventory(disk_count=24)
+    with MockDynatraceServer(api_token=TOKEN, disks=inventory, analyzer_duration=0.4) as server:
+        client = AnalyzerClient(server.url, TOKEN)
+        orchestrator = ForecastOrchestrator(client, max_in_flight=8, forecast_horizon=HORIZON,
+                                            history_days=HISTORY_DAYS)
+        try:
+            summary = orchestrator.run(_disks(inventory))
+        finally:
+            client.close()
+        stats = dict(server.state.stats)
+        pending = len(server.state.executions)
+
+    assert summary['status'] == 'complete'
+    assert summary['errors'] == []
+    assert summary['metrics']['analyzedDisks'] == len(inventory)
+    assert stats['analyzer_executions'] == len(inventory)
+    assert stats['analyzer_polls'] >= len(inventory)  # every execution was still running when submitted
+    assert pending == 0  # every execution reached COMPLETED and was collected
+
+    expected = _expected_violations(inventory)
+    assert expected, 'fixture should contain disks that fill up'
+    found = {v['diskId']: v for v in summary['violations']}
+    assert found.keys() == expected.keys()
+    for disk_id, violation in found.items():
+        assert violation['daysUntilFull'] == expected[disk_id]['daysUntilFull']
+        assert violation['certainty'] == expected[disk_id]['certainty']
+    assert [v['daysUntilFull'] for v in summary['violations']] == sorted(v['daysUntilFull'] for v in found.values())
+
+
+def test_throttled_executions_back_off():
+    """With more executions in flight than the analyzer allows, 429s are retried and all disks still finish"""
+    inventory = generate_disk_inventory(disk_count=12)
+    with MockDynatraceServer(api_token=TOKEN, disks=inventory, analyzer_duration=0.3,
+                             analyzer_max_concurrent=3, retry_after=0.1) as server:
+        client = AnalyzerClient(server.url, TOKEN, max_retries=50)
+        orchestrator = ForecastOrchestrator(client, max_in_flight=8, forecast_horizon=HORIZON,
+                                            history_days=HISTORY_DAYS)
+        try:
+            summary = orchestrator.run(_disks(inventory))
+        finally:
+            client.close()
+        stats = dict(server.state.stats)
+
+    assert summary['metrics']['analyzedDisks'] == len(inventory)
+    assert summary['metrics']['failedDisks'] == 0
+    assert stats['throttled'] > 0
+    assert stats['analyzer_peak_running'] <= 3
+    assert {v['diskId'] for v in summary['violations']} == set(_expected_violations(inventory))
+
+
+def test_slow_execution_times_out():
+    """An execution still running at execution_timeout is reported as a failed disk, not awaited"""
+    inventory = generate_disk_inventory(disk_count=2)
+    with MockDynatraceServer(api_token=TOKEN, disks=inventory, analyzer_duration=5.0) as server:
+        client = AnalyzerClient(server.url, TOKEN)
+        orchestrator = ForecastOrchestrator(client, execution_timeout=0.5, forecast_horizon=HORIZON,
+                                            history_days=HISTORY_DAYS)
+        try:
+            summary = orchestrator.run(_disks(inventory))
+        finally:
+            client.close()
+
+    assert summary['metrics']['failedDisks'] == len(inventory)
+    assert summary['metrics']['elapsedSeconds'] < 2.0
+    assert all('did not complete' in error['error'] for error in summary['errors'])
+
+
+def test_execute_not_retried_on_server_error():
+    """A 5xx on execute may follow a started execution, so only polls are retried on it"""
+    with MockDynatraceServer(api_token=TOKEN, error_rate=1.0) as server:
+        client = AnalyzerClient(server.url, TOKEN, max_retries=1)
+        try:
+            for call in (lambda: client.execute(ANALYZER_NAME, {}), lambda: client.poll(ANALYZER_NAME, 'token')):
+                try:
+                    call()
+                except AnalyzerError as e:
+                    assert 'HTTP 500' in str(e)
+                else:
+                    raise AssertionError('injected server error did not raise AnalyzerError')
+        finally:
+            client.close()
+        requests_made = server.state.stats['requests']
+
+    assert requests_made == 1 + 2  # execute once, poll once plus one retry
+
+
+def main():
+    tests = [value for name, value in sorted(globals().items()) if name.startswith('test_')]
+    for test in tests:
+        test()
+        print(f"ok   {test.__name__}")
+    print(f"\n{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
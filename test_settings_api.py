@@ -0,0 +1,74 @@
+from D_daskboard import DynatraceSettingsAPI
+from mock_dynatrace_server import MockDynatraceServer
+
+TOKEN = 'test-token'
+
+
+def _objects(count, external_ids=True):
+    objects = []
+    for i in range(count):
+        obj = {'schemaId': 'builtin:test.schema', 'scope': 'environment', 'value': {'name': f"object-{i}"}}
+        if external_ids:
+            obj['externalId'] = f"test-{i}"
+        objects.append(obj)
+    return objects
+
+
+def test_pooled_posts_survive_throttling():
+    """Throttled POSTs on pooled keep-alive connections are retried without corrupting the connection"""
+    objects = _objects(40)
+    with MockDynatraceServer(api_token=TOKEN, rate_limit=10, retry_after=0.05) as server:
+        api = DynatraceSettingsAPI(server.url, TOKEN, use_session=True, max_retries=100, verbose=False)
+        try:
+            results = api.create_settings_objects(objects, max_workers=4, max_batch_items=1)
+        finally:
+            api.close()
+        stats = dict(server.state.stats)
+
+    assert stats['throttled'] > 0
+    assert [r['error'] for r in results if r['error']] == []
+    assert [r['code'] for r in results] == [200] * len(objects)
+
+
+def test_pooled_posts_survive_rejected_auth():
+    """A 401 answered before the body is read leaves the connection usable for the next request"""
+    with MockDynatraceServer(api_token=TOKEN) as server:
+        api = DynatraceSettingsAPI(server.url, 'wrong-token', use_session=True, max_retries=0, verbose=False)
+        try:
+            rejected = api.create_settings_objects(_objects(3), max_workers=1, max_batch_items=1)
+            api.headers['Authorization'] = f"Api-Token {TOKEN}"
+            api.session.headers['Authorization'] = f"Api-Token {TOKEN}"
+            accepted = api.create_settings_objects(_objects(3), max_workers=1, max_batch_items=1)
+        finally:
+            api.close()
+
+    assert [r['code'] for r in rejected] == [401] * 3
+    assert [r['code'] for r in accepted] == [200] * 3
+
+
+def test_server_errors_retried_only_for_upserts():
+    """A POST without externalIds is not idempotent, so a 5xx is not retried; upserts are"""
+    with MockDynatraceServer(api_token=TOKEN, error_rate=1.0) as server:
+        api = DynatraceSettingsAPI(server.url, TOKEN, use_session=True, max_retries=2, verbose=False)
+        try:
+            api.create_settings_objects(_objects(1, external_ids=False), max_workers=1)
+            creates = server.state.stats['requests']
+            api.create_settings_objects(_objects(1), max_workers=1)
+            upserts = server.state.stats['requests'] - creates
+        finally:
+            api.close()
+
+    assert creates == 1
+    assert upserts == 3
+
+
+def main():
+    tests = [value for name, value in sorted(globals().items()) if name.startswith('test_')]
+    for test in tests:
+        test()
+        print(f"ok   {test.__name__}")
+    print(f"\n{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+from settings_diff import diff_settings, object_key
+
+
+def _obj(object_id, value, **fields):
+    return {'objectId': object_id, 'schemaId': 'builtin:test.schema', 'scope': 'environment', 'value': value, **fields}
+
+
+def test_unkeyed_objects_match_across_environments():
+    """Objects without externalId or key fields are matched by value, not by their per-environment objectId"""
+    source = [_obj('prod-1', {'enabled': True, 'threshold': 90}), _obj('prod-2', {'enabled': False})]
+    target = [_obj('test-7', {'threshold': 90, 'enabled': True}), _obj('test-8', {'enabled': False})]
+    summary = diff_settings(source, target)['summary']
+    assert (summary['added'], summary['removed'], summary['changed'], summary['unchanged']) == (0, 0, 0, 2)
+
+
+def test_keyed_objects_report_changes():
+    """An object identified by name or externalId is reported as changed when its value differs"""
+    source = [_obj('prod-1', {'name': 'disk alert', 'threshold': 90}),
+              _obj('prod-2', {'threshold': 1}, externalId='ext-1')]
+    target = [_obj('test-1', {'name': 'disk alert', 'threshold': 95}),
+              _obj('test-2', {'threshold': 2}, externalId='ext-1')]
+    report = diff_settings(source, target)
+    assert report['summary']['changed'] == 2
+    assert all(entry['changedFields'] == ['threshold'] for entry in report['changed'])
+    assert object_key(source[0])[2] == 'name="disk alert"'
+
+
+def main():
+    tests = [value for name, value in sorted(globals().items()) if name.startswith('test_')]
+    for test in tests:
+        test()
+        print(f"ok   {test.__name__}")
+    print(f"\n{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from dql_client import DQLClient, build_query
+
+DEFAULT_STORE_DIR = 'timeseries_store'
+# How far back the first fetch of a metric goes
+DEFAULT_INITIAL_LOOKBACK_SECONDS = 7 * 86400
+
+# Metrics from dql_queries kept in the store: query name, stored aggregations and series dimensions
+METRIC_SYNC_SPECS = {
+    'dt.host.cpu.usage': {
+        'query': 'host_cpu_usage',
+        'values': ['avg(value)'],
+        'dimensions': ['host', 'os', 'environment']
+    },
+    'dt.host.disk.free': {
+        'query': 'host_disk_free',
+        'values': ['min(value)', 'avg(value)'],
+        'dimensions': ['host', 'disk']
+    },
+    'dt.host.disk.utilization': {
+        'query': 'host_disk_utilization',
+        'values': ['max(value)'],
+        'dimensions': ['host', 'disk']
+    },
+    'dt.process.mem.working_set': {
+        'query': 'process_memory_working_set',
+        'values': ['avg(value)'],
+        'dimensions': ['process', 'host']
+    }
+}
+
+_BIN_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def bin_seconds(bin_size: str) -> int:
+    """'5m' -> 300"""
+    match = re.fullmatch(r'(\d+)([smhd])', bin_size.strip())
+    if not match:
+        raise ValueError(f"Unsupported bin size '{bin_size}'")
+    return int(match.group(1)) * _BIN_SECONDS[match.group(2)]
+
+
+def _slug(text: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', text).strip('_')
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class SeriesView:
+    """Read-only, memory-mapped view of one stored series; values are not copied"""
+
+    def __init__(self, dimensions: Dict[str, str], start: float, step: int, values: np.ndarray):
+        self.dimensions = dimensions
+        self.start = start
+        self.step = step
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def end(self) -> float:
+        """Timestamp just after the last stored point"""
+        return self.start + len(self.values) * self.step
+
+    def timestamps(self) -> np.ndarray:
+        """Epoch seconds of every point (computed, since points are evenly spaced)"""
+        return self.start + np.arange(len(self.values)) * self.step
+
+
+class TimeSeriesStore:
+    def __init__(self, root: str = DEFAULT_STORE_DIR):
+        """
+        Append-only local store of evenly spaced metric series
+
+        Each series is a flat float64 file (NaN for missing bins) that is memory-mapped for reads;
+        a small JSON index per metric records the bin size, each series' first timestamp and
+        dimensions, and how far the metric has been fetched.
+
+        Args:
+            root: Directory holding one sub-directory per metric
+        """
+        self.root = root
+        self._lock = threading.Lock()
+        self._indexes = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _metric_dir(self, metric: str) -> str:
+        return os.path.join(self.root, _slug(metric))
+
+    def _index(self, metric: str) -> Dict[str, Any]:
+        if metric not in self._indexes:
+            path = os.path.join(self._metric_dir(metric), 'index.json')
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    self._indexes[metric] = json.load(f)
+            else:
+                self._indexes[metric] = {'metric': metric, 'step': None, 'fetchedUntil': None, 'series': {}}
+        return self._indexes[metric]
+
+    def _save_index(self, metric: str):
+        directory = self._metric_dir(metric)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, 'index.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self._indexes[metric], f)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def series_key(dimensions: Dict[str, Any]) -> str:
+        return json.dumps(dimensions, sort_keys=True, separators=(',', ':'))
+
+    def metrics(self) -> List[str]:
+        metrics = []
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name, 'index.json')
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    metrics.append(json.load(f)['metric'])
+        return metrics
+
+    def fetched_until(self, metric: str) -> Optional[float]:
+        """End of the last fetched time range of a metric (epoch seconds), None if never fetched"""
+        return self._index(metric)['fetchedUntil']
+
+    def append(
+            self,
+            metric: str,
+            dimensions: Dict[str, Any],
+            timestamps: np.ndarray,
+            values: np.ndarray,
+            step: int
+    ) -> int:
+        """
+        Append points to one series
+
+        Points at or before the stored end are ignored (the store is append-only); skipped bins
+        between the stored end and the new points are filled with NaN. New series are indexed on
+        disk by the next mark_fetched() or flush().
+
+        Returns:
+            Number of bins written (including NaN fill)
+        """
+        timestamps = np.asarray(timestamps, dtype=float)
+        values = np.asarray(values, dtype=float)
+        if not len(timestamps):
+            return 0
+
+        with self._lock:
+            index = self._index(metric)
+            if index['step'] is None:
+                index['step'] = step
+            elif index['step'] != step:
+                raise ValueError(f"{metric} is stored with step {index['step']}s, not {step}s")
+
+            key = self.series_key(dimensions)
+            entry = index['series'].get(key)
+            if entry is None:
+                entry = {'file': f"{len(index['series']):06d}.f64", 'start': float(timestamps.min()),
+                         'dimensions': dimensions}
+                index['series'][key] = entry
+                os.makedirs(self._metric_dir(metric), exist_ok=True)
+                # A file left behind by a run that died before saving the index holds no indexed data
+                path = os.path.join(self._metric_dir(metric), entry['file'])
+                if os.path.exists(path):
+                    os.remove(path)
+
+            path = os.path.join(self._metric_dir(metric), entry['file'])
+            length = os.path.getsize(path) // 8 if os.path.exists(path) else 0
+            positions = np.rint((timestamps - entry['start']) / step).astype(np.int64)
+            new = positions >= length
+            if not new.any():
+                return 0
+
+            block = np.full(int(positions[new].max()) - length + 1, np.nan)
+            block[positions[new] - length] = values[new]
+            with open(path, 'ab') as f:
+                f.write(block.tobytes())
+            return len(block)
+
+    def append_records(
+            self,
+            metric: str,
+            records: Iterable[Dict[str, Any]],
+            value_field: str,
+            dimension_fields: Sequence[str],
+            time_field: str,
+            step: int
+    ) -> int:
+        """
+        Append long-format DQL rows (one row per series and bin) to the store
+
+        Returns:
+            Number of rows stored
+        """
+        grouped = {}
+        for record in records:
+            dims = tuple(record.get(field) for field in dimension_fields)
+            grouped.setdefault(dims, ([], []))
+            grouped[dims][0].append(record[time_field])
+            grouped[dims][1].append(record.get(value_field))
+
+        rows = 0
+        for dims, (times, values) in grouped.items():
+            # ISO strings parse in one vectorized call; drop the 'Z' so NumPy does not warn
+            timestamps = np.array([t.rstrip('Z') for t in times], dtype='datetime64[ms]').astype(np.int64) / 1000
+            order = np.argsort(timestamps, kind='stable')
+            self.append(metric, dict(zip(dimension_fields, dims)), timestamps[order],
+                        np.array(values, dtype=float)[order], step)
+            rows += len(times)
+        return rows
+
+    def flush(self):
+        """Persist the index of every metric touched in this process"""
+        with self._lock:
+            for metric in self._indexes:
+                if self._indexes[metric]['series']:
+                    self._save_index(metric)
+
+    def mark_fetched(self, metric: str, until: float, step: int):
+        """Record that the metric is complete up to 'until' and persist the index"""
+        with self._lock:
+            index = self._index(metric)
+            if index['step'] is None:
+                index['step'] = step
+            index['fetchedUntil'] = until
+            self._save_index(metric)
+
+    def series(self, metric: str, dimensions: Dict[str, Any]) -> Optional[SeriesView]:
+        """Memory-mapped view of one series, or None if it is not stored"""
+        index = self._index(metric)
+        entry = index['series'].get(self.series_key(dimensions))
+        return self._view(metric, index, entry) if entry else None
+
+    def iter_series(self, metric: str, **filters) -> Iterator[SeriesView]:
+        """Views of all stored series of a metric, optionally filtered by dimension values"""
+        index = self._index(metric)
+        for entry in index['series'].values():
+            if all(entry['dimensions'].get(name) == value for name, value in filters.items()):
+                view = self._view(metric, index, entry)
+                if view is not None:
+                    yield view
+
+    def _view(self, metric: str, index: Dict[str, Any], entry: Dict[str, Any]) -> Optional[SeriesView]:
+        path = os.path.join(self._metric_dir(metric), entry['file'])
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return None
+        values = np.memmap(path, dtype=np.float64, mode='r')
+        return SeriesView(entry['dimensions'], entry['start'], index['step'], values)
+
+
+def sync_metric(
+        client: DQLClient,
+        store: TimeSeriesStore,
+        metric: str,
+        bin_size: str = '5m',
+        initial_lookback: float = DEFAULT_INITIAL_LOOKBACK_SECONDS,
+        now: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Fetch only the bins of a metric that are not stored yet and append them
+
+    The requested range ends at the last complete bin, so partially filled bins are never stored
+    and the next sync continues exactly where this one stopped.
+
+    Returns:
+        {'metric', 'from', 'to', 'rows'}
+    """
+    spec = METRIC_SYNC_SPECS[metric]
+    step = bin_seconds(bin_size)
+    now = now if now is not None else time.time()
+    end = (now // step) * step
+
+    start = store.fetched_until(f"{metric}:{spec['values'][0]}") or (end - initial_lookback)
+    if start >= end:
+        return {'metric': metric, 'from': _iso(start), 'to': _iso(end), 'rows': 0}
+
+    query = build_query(spec['query'], bin=bin_size)
+    time_field = f"bin(timestamp, {bin_size})"
+    records = list(client.iter_records(query, timeframe_start=_iso(start), timeframe_end=_iso(end)))
+
+    for value_field in spec['values']:
+        stored_metric = f"{metric}:{value_field}"
+        store.append_records(stored_metric, records, value_field, spec['dimensions'], time_field, step)
+        store.mark_fetched(stored_metric, end, step)
+    return {'metric': metric, 'from': _iso(start), 'to': _iso(end), 'rows': len(records)}
+
+
+def main():
+    from mock_dynatrace_server import MockDynatraceServer
+
+    # Configuration - point at a real platform URL and token to sync a tenant
+    STORE_DIR = DEFAULT_STORE_DIR
+
+    with MockDynatraceServer(api_token='demo') as server:
+        client = DQLClient(server.url, 'demo', verbose=False)
+        store = TimeSeriesStore(STORE_DIR)
+
+        for metric in METRIC_SYNC_SPECS:
+            start = time.perf_counter()
+            result = sync_metric(client, store, metric)
+            print(f"{metric:<28} {result['rows']:>7} rows {result['from']} -> {result['to']} "
+                  f"in {time.perf_counter() - start:.2f}s")
+
+        views = list(store.iter_series('dt.host.disk.free:avg(value)'))
+        if views:
+            print(f"\n{len(views)} disk series, {len(views[0])} points each; first: {views[0].dimensions}")
+        client.close()
+
+
+if __name__ == "__main__":
+    main()